@@ -2,5 +2,19 @@ from bdd.tipos import *
 from bdd.errores import *
 from bdd.utiles import *
 from bdd.bdd import *
+from bdd.sesion import *
+from bdd.instrumentacion import *
+from bdd.columnas import *
 from bdd.tabla import *
-from bdd.registro import *
\ No newline at end of file
+from bdd.registro import *
+from bdd.asincrono import *
+from bdd.replicas import *
+
+
+def __getattr__(nombre : str) -> Any:
+    # El backend SQLite se carga recién al pedirlo (`bdd.BaseDeDatos_SQLite`), para que importar `bdd`
+    # no importe sqlite3. `from bdd import *` no lo incluye: usar `from bdd.sqlite import BaseDeDatos_SQLite`.
+    if nombre == 'BaseDeDatos_SQLite':
+        from bdd.sqlite import BaseDeDatos_SQLite
+        return BaseDeDatos_SQLite
+    raise AttributeError(f"module 'bdd' has no attribute '{nombre}'")
@@ -0,0 +1,423 @@
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from time import monotonic
+from typing import Self, Optional as Opcional, Any, AsyncIterator as IteradorAsincrono
+from weakref import WeakKeyDictionary
+
+from bdd.tipos import *
+from bdd.errores import *
+from bdd.bdd import Consulta, ConfigBDDMysql, BaseDeDatos_MySQL, _versionAdmiteAliasFila, _expirarRegistros
+from bdd.utiles import limitarSQL
+
+# El conector asincrónico (aiomysql) es una dependencia opcional: se importa recién al abrir una conexión.
+ER_CON_COUNT_ERROR : int = 1040
+
+
+def _aiomysql():
+    try:
+        import aiomysql
+    except ImportError as e:
+        raise ImportError("El backend asincrónico requiere el paquete 'aiomysql' (pip install bdd[async]).") from e
+    return aiomysql
+
+
+# asyncio tampoco se importa con `bdd`: este backend sólo se usa dentro de un bucle de eventos, cuando ya está cargado.
+def _tareaActual():
+    from asyncio import current_task
+    return current_task()
+
+
+def _parametrosAiomysql(parametros : dict) -> dict:
+    # Traduce PARAMETROS_CONEXION (formato de mysql.connector) al de aiomysql.
+    traducidos : dict = dict(parametros)
+    traducidos.pop("use_pure", None)
+    if "database" in traducidos: traducidos["db"] = traducidos.pop("database")
+    traducidos["autocommit"] = False
+    return traducidos
+
+
+class PoolConexionesAsincrono():
+    '''
+        Contraparte asincrónica de `PoolConexiones`: acotado entre `minimo` y `maximo` conexiones,
+        hace ping antes de prestar una conexión libre y expone los mismos contadores.
+
+        Debe abrirse con `await pool.abrir()` (o `async with pool:`) antes de usarse.
+
+        CASOS DE ERROR
+        - ErrorPoolLlena: las `maximo` conexiones están en uso y ninguna se liberó en `espera_maxima` segundos.
+        - ErrorDemasiadasConexiones: el servidor rechazó la conexión por exceso de conexiones.
+        - ErrorBDD: se pidió una conexión a un pool cerrado.
+    '''
+
+    __slots__ = \
+    (
+        '__parametros',
+        '__minimo',
+        '__maximo',
+        '__espera_maxima',
+        '__libres',
+        '__abiertas',
+        '__condicion',
+        '__cerrado',
+        '__prestamos',
+        '__esperas',
+        '__tiempo_espera',
+        '__creadas',
+        '__descartadas',
+    )
+
+    def __init__(self, parametros : dict, minimo : int = 1, maximo : int = 10, espera_maxima : Opcional[float] = 30.0) -> None:
+        if minimo < 0 or maximo < 1 or minimo > maximo:
+            raise ValueError(f"Tamaño de pool inválido: minimo={minimo}, maximo={maximo}.")
+        self.__parametros = _parametrosAiomysql(parametros)
+        self.__minimo = minimo
+        self.__maximo = maximo
+        self.__espera_maxima = espera_maxima
+        self.__libres : deque = deque()
+        self.__abiertas = 0
+        self.__condicion : Opcional['CondicionAsincrona'] = None
+        self.__cerrado = False
+
+        self.__prestamos = 0
+        self.__esperas = 0
+        self.__tiempo_espera = 0.0
+        self.__creadas = 0
+        self.__descartadas = 0
+
+    @classmethod
+    def desdeConfiguracion(cls, configuracion : ConfigBDDMysql) -> Self:
+        return cls(configuracion.PARAMETROS_CONEXION, **configuracion.OPCIONES_POOL)
+
+    async def abrir(self) -> Self:
+        # La condición se crea dentro del bucle de eventos que va a usar el pool.
+        from asyncio import Condition as CondicionAsincrona
+        if self.__condicion is None: self.__condicion = CondicionAsincrona()
+        while self.__abiertas < self.__minimo:
+            self.__abiertas += 1
+            self.__libres.append(await self.__abrir())
+            self.__creadas += 1
+        return self
+
+    async def __abrir(self):
+        aiomysql = _aiomysql()
+        try:
+            return await aiomysql.connect(**self.__parametros)
+        except aiomysql.Error as e:
+            if e.args and e.args[0] == ER_CON_COUNT_ERROR:
+                raise ErrorDemasiadasConexiones("El servidor rechazó la conexión: demasiadas conexiones abiertas.") from e
+            raise
+
+    @staticmethod
+    async def __estaViva(conexion) -> bool:
+        try:
+            await conexion.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    async def obtener(self):
+        """Presta una conexión: reutiliza una libre, abre una nueva si hay lugar o espera a que se libere una."""
+        from asyncio import timeout as plazo
+        if self.__condicion is None: await self.abrir()
+        inicio : float = monotonic()
+        esperó : bool = False
+        while True:
+            conexion = None
+            async with self.__condicion:
+                while True:
+                    if self.__cerrado: raise ErrorBDD("El pool de conexiones está cerrado.")
+                    if self.__libres:
+                        conexion = self.__libres.pop()
+                        break
+                    if self.__abiertas < self.__maximo:
+                        self.__abiertas += 1
+                        break
+                    restante : Opcional[float] = None if self.__espera_maxima is None else self.__espera_maxima - (monotonic() - inicio)
+                    if restante is not None and restante <= 0:
+                        self.__tiempo_espera += monotonic() - inicio
+                        raise ErrorPoolLlena(f"No se liberó ninguna de las {self.__maximo} conexiones en {self.__espera_maxima} segundos.")
+                    if not esperó:
+                        esperó = True
+                        self.__esperas += 1
+                    try:
+                        async with plazo(restante):
+                            await self.__condicion.wait()
+                    except TimeoutError:
+                        pass
+
+            recien_abierta : bool = conexion is None
+            if recien_abierta:
+                try:
+                    conexion = await self.__abrir()
+                except BaseException:
+                    async with self.__condicion:
+                        self.__abiertas -= 1
+                        self.__condicion.notify()
+                    raise
+            elif not await self.__estaViva(conexion):
+                await self.descartar(conexion)
+                continue
+
+            if recien_abierta: self.__creadas += 1
+            self.__prestamos += 1
+            if esperó: self.__tiempo_espera += monotonic() - inicio
+            return conexion
+
+    async def devolver(self, conexion) -> None:
+        """Devuelve una conexión prestada, revirtiendo la transacción que haya quedado abierta."""
+        try:
+            if conexion.get_transaction_status(): await conexion.rollback()
+        except Exception:
+            await self.descartar(conexion)
+            return
+        async with self.__condicion:
+            if not self.__cerrado:
+                self.__libres.append(conexion)
+                self.__condicion.notify()
+                return
+            self.__abiertas -= 1
+        conexion.close()
+
+    async def descartar(self, conexion) -> None:
+        """Cierra una conexión prestada (p. ej. rota) y libera su lugar en el pool."""
+        conexion.close()
+        async with self.__condicion:
+            self.__abiertas -= 1
+            self.__descartadas += 1
+            self.__condicion.notify()
+
+    async def cerrar(self) -> None:
+        """Cierra las conexiones libres; las prestadas se cierran a medida que se devuelven."""
+        if self.__condicion is None: return
+        async with self.__condicion:
+            self.__cerrado = True
+            libres = list(self.__libres)
+            self.__libres.clear()
+            self.__abiertas -= len(libres)
+            self.__condicion.notify_all()
+        for conexion in libres:
+            conexion.close()
+
+    def estadisticas(self) -> dict[str, int | float]:
+        """Mismos contadores que `PoolConexiones.estadisticas`."""
+        return \
+        {
+            "prestamos" : self.__prestamos,
+            "esperas" : self.__esperas,
+            "tiempo_espera" : self.__tiempo_espera,
+            "creadas" : self.__creadas,
+            "descartadas" : self.__descartadas,
+            "abiertas" : self.__abiertas,
+            "libres" : len(self.__libres),
+            "en_uso" : self.__abiertas - len(self.__libres),
+        }
+
+    async def __aenter__(self) -> Self:
+        return await self.abrir()
+
+    async def __aexit__(self, exc_type, excl_val, exc_tb) -> None:
+        await self.cerrar()
+
+
+class _EstadoConexion():
+    # Conexión tomada por una tarea de asyncio. Cada tarea tiene la suya aunque compartan la instancia.
+    __slots__ = ('tarea', 'conexion', 'cursor', 'profundidad', 'transacciones')
+
+    def __init__(self) -> None:
+        self.tarea = _tareaActual()
+        self.conexion = None
+        self.cursor = None
+        self.profundidad = 0
+        self.transacciones = 0
+
+
+# Estado de cada instancia en el contexto actual. Una única variable para todo el módulo (crear una
+# por instancia las deja vivas en cada contexto); el diccionario no retiene a las instancias.
+_estados : ContextVar[Opcional[WeakKeyDictionary]] = ContextVar("bdd_estados_asincronos", default=None)
+
+class BaseDeDatos_MySQLAsincrono():
+    '''
+        Contraparte asincrónica de `BaseDeDatos_MySQL`, sobre aiomysql. Los métodos que hablan con el
+        servidor (`ejecutar`, `devolverResultados`, `devolverUnResultado`, ...) son corrutinas.
+
+        La conexión tomada es propia de cada tarea de asyncio, de modo que una única instancia (con un
+        `PoolConexionesAsincrono`) puede atender muchas tareas concurrentes, cada una con su conexión.
+
+        > bdd = BaseDeDatos_MySQLAsincrono(config, pool=PoolConexionesAsincrono.desdeConfiguracion(config))
+        > async with bdd:
+        >     await bdd.ejecutar(Consulta().Select('Discos', ['id', 'nombre']).Where(id=2))
+        >     fila = await bdd.devolverUnResultado()
+        > disco = await Discos.obtenerAsincrono(bdd, 2)
+
+        Los registros que carga no resuelven sus `Relacion` al accederlas (eso sería una consulta
+        sincrónica): deben precargarse con `await Modelo.precargarAsincrono(bdd, registros, ...)`.
+
+        CASOS DE ERROR
+        - ErrorBDD: si falla una consulta; el error del conector queda en `__cause__`.
+    '''
+
+    __slots__ = \
+    (
+        "__config",
+        "__pool",
+        "__variables",
+        "__weakref__",
+    )
+
+    def __init__(self, configuracion : ConfigBDDMysql = None, pool : Opcional[PoolConexionesAsincrono] = None) -> None:
+        self.__config = configuracion
+        self.__pool = pool
+        self.__variables : Opcional[dict[str, int]] = None
+
+    @property
+    def pool(self) -> Opcional[PoolConexionesAsincrono]:
+        return self.__pool
+
+    def __estadoActual(self) -> _EstadoConexion:
+        # Una tarea hija hereda el contexto de su madre: no debe usar la conexión de otra tarea.
+        estados : Opcional[WeakKeyDictionary] = _estados.get()
+        estado : Opcional[_EstadoConexion] = estados.get(self) if estados is not None else None
+        if estado is None or estado.tarea is not _tareaActual():
+            estado = _EstadoConexion()
+            # Se copia el diccionario: el contexto heredado lo comparte con la tarea madre.
+            nuevos : WeakKeyDictionary = WeakKeyDictionary(estados or {})
+            nuevos[self] = estado
+            _estados.set(nuevos)
+        return estado
+
+    async def conectar(self) -> Self:
+        estado : _EstadoConexion = self.__estadoActual()
+        if estado.conexion: return self
+        aiomysql = _aiomysql()
+        estado.conexion = await self.__pool.obtener() if self.__pool else await aiomysql.connect(**_parametrosAiomysql(self.__config.PARAMETROS_CONEXION))
+        estado.cursor = await estado.conexion.cursor(aiomysql.DictCursor)
+        return self
+
+    async def desconectar(self) -> None:
+        await self.__liberar(descartar=False)
+
+    async def reconectar(self) -> Self:
+        await self.__liberar(descartar=True)
+        return await self.conectar()
+
+    async def __liberar(self, descartar : bool) -> None:
+        estado : _EstadoConexion = self.__estadoActual()
+        if estado.cursor: await estado.cursor.close()
+        if estado.conexion:
+            if not self.__pool: estado.conexion.close()
+            elif descartar: await self.__pool.descartar(estado.conexion)
+            else: await self.__pool.devolver(estado.conexion)
+        estado.cursor = None
+        estado.conexion = None
+
+    async def ejecutar(self, consulta : str | Consulta | tuple[str, tuple[Any]]) -> Self:
+        sql, parametros = BaseDeDatos_MySQL.compilar(consulta)
+        estado : _EstadoConexion = self.__estadoActual()
+        try:
+            await estado.cursor.execute(sql, parametros)
+            if not estado.transacciones: await estado.conexion.commit()
+        except AttributeError as e:
+            raise ErrorBDD("No hay una conexión abierta: use 'async with bdd:'.") from e
+        except Exception as f:
+            raise ErrorBDD(f"No se pudo completar la consulta.\n {sql}\n Parámetros: {parametros}\n") from f
+        _expirarRegistros(consulta, sql)
+        return self
+
+    async def devolverResultados(self, cantidad : Opcional[int] = None) -> Opcional[list[Resultado]]:
+        if cantidad is not None and cantidad < 0: raise IndexError("Se solicitó una cantidad negativa de resultados, lo cual es un sinsentido.")
+        if cantidad == 0: return []
+        cursor = self.__estadoActual().cursor
+        resultados = await cursor.fetchall() if cantidad is None else await cursor.fetchmany(cantidad)
+        return list(resultados) or None
+
+    async def devolverUnResultado(self) -> Opcional[Resultado]:
+        return await self.__estadoActual().cursor.fetchone()
+
+    def devolverIdUltimaInsercion(self) -> Opcional[int]:
+        return self.__estadoActual().cursor.lastrowid
+
+    def devolverFilasAfectadas(self) -> int:
+        return self.__estadoActual().cursor.rowcount
+
+    async def maximoPaquete(self) -> int:
+        return (await self.__variablesServidor())["maximo_paquete"]
+
+    async def incrementoAutonumerico(self) -> int:
+        return (await self.__variablesServidor())["incremento"]
+
+    async def idsConsecutivos(self) -> bool:
+        return bool((await self.__variablesServidor())["ids_consecutivos"])
+
+    def maximoParametros(self) -> int:
+        return 65535
+
+    async def admiteAliasFila(self) -> bool:
+        return bool((await self.__variablesServidor())["alias_fila"])
+
+    async def __variablesServidor(self) -> dict[str, int]:
+        if self.__variables is None:
+            await self.ejecutar("SELECT @@max_allowed_packet AS maximo_paquete, @@auto_increment_increment AS incremento, @@innodb_autoinc_lock_mode AS modo_autonumerico, @@version AS version;")
+            fila : Resultado = await self.devolverUnResultado()
+            version : Any = fila["version"]
+            if isinstance(version, (bytes, bytearray)): version = version.decode()
+            self.__variables = {"maximo_paquete" : int(fila["maximo_paquete"]), "incremento" : int(fila["incremento"]), "ids_consecutivos" : int(int(fila["modo_autonumerico"]) != 2), "alias_fila" : int(_versionAdmiteAliasFila(version))}
+        return self.__variables
+
+    async def iterarResultados(self, consulta : str | Consulta | tuple[str, tuple[Any]], tamano_lote : int = 1000, cantidad : Opcional[int] = None) -> IteradorAsincrono[Resultado]:
+        """Como `BaseDeDatos_MySQL.iterarResultados`: filas de a una, traídas de a lotes con un cursor sin buffer."""
+        if tamano_lote < 1: raise ValueError(f"El tamaño de lote debe ser positivo: {tamano_lote}.")
+        sql, parametros = BaseDeDatos_MySQL.compilar(consulta)
+        if cantidad is not None:
+            sql, parametros = limitarSQL(sql, parametros, cantidad)
+
+        cursor = await self.__estadoActual().conexion.cursor(_aiomysql().SSDictCursor)
+        try:
+            await cursor.execute(sql, parametros)
+            while filas := await cursor.fetchmany(tamano_lote):
+                for fila in filas:
+                    yield fila
+        finally:
+            # SSCursor.close lee las filas pendientes antes de cerrar.
+            await cursor.close()
+
+    @property
+    def enTransaccion(self) -> bool:
+        return self.__estadoActual().transacciones > 0
+
+    @asynccontextmanager
+    async def transaccion(self) -> IteradorAsincrono[Self]:
+        """Como `BaseDeDatos_MySQL.transaccion`: confirma al salir, revierte ante excepciones y anida con SAVEPOINT."""
+        async with self:
+            estado : _EstadoConexion = self.__estadoActual()
+            nivel : int = estado.transacciones
+            punto : str = f"bdd_punto_{nivel}"
+            if nivel: await estado.cursor.execute(f"SAVEPOINT {punto}")
+            estado.transacciones += 1
+            try:
+                yield self
+            except BaseException:
+                estado.transacciones -= 1
+                if nivel: await estado.cursor.execute(f"ROLLBACK TO SAVEPOINT {punto}")
+                else: await estado.conexion.rollback()
+                raise
+            estado.transacciones -= 1
+            if nivel: await estado.cursor.execute(f"RELEASE SAVEPOINT {punto}")
+            else: await estado.conexion.commit()
+
+    def estaConectado(self) -> bool:
+        estados : Opcional[WeakKeyDictionary] = _estados.get()
+        estado : Opcional[_EstadoConexion] = estados.get(self) if estados is not None else None
+        return bool(estado and estado.tarea is _tareaActual() and estado.conexion and not estado.conexion.closed)
+
+    # async with bdd: los bloques pueden anidarse; la conexión se libera al salir del más externo.
+    async def __aenter__(self) -> Self:
+        estado : _EstadoConexion = self.__estadoActual()
+        if estado.conexion is None: await self.conectar()
+        estado.profundidad += 1
+        return self
+
+    async def __aexit__(self, exc_type, excl_val, exc_tb) -> None:
+        estado : _EstadoConexion = self.__estadoActual()
+        estado.profundidad = max(estado.profundidad - 1, 0)
+        if not estado.profundidad: await self.desconectar()
@@ -1,32 +1,63 @@
-from typing import Protocol as Protocolo, Self, List, Dict, TypeAlias as AliasDeTipo, Optional as Opcional, Unpack, Any
-from mysql.connector import connect
-from mysql.connector.cursor import MySQLCursorBufferedDict, MySQLCursorBufferedNamedTuple
-from mysql.connector.errors import DatabaseError as ErrorMySQL, ProgrammingError as ErrorMalaSintaxisSQL
+from typing import Protocol as Protocolo, Self, List, Dict, TypeAlias as AliasDeTipo, Optional as Opcional, Unpack, Any, Iterator as Iterador
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from re import compile as compilarRegex, findall, IGNORECASE
+from threading import Condition, Lock
+from time import monotonic, perf_counter
 from solteron import Solteron
 
 
 from bdd.tipos import *
 from bdd.errores import *
 from bdd.utiles import *
+from bdd.instrumentacion import Instrumentacion
+from bdd.sesion import MapaIdentidad
+from bdd.columnas import ConstructorColumnas
+
+# El conector (mysql.connector) se importa recién al abrir la primera conexión, para que importar `bdd`
+# sólo para armar consultas no lo cargue.
+ER_CON_COUNT_ERROR : int = 1040
+CR_NO_RESULT_SET : int = 2053
+class _SinConector(Exception): ...
+_connect : Opcional[Callable[..., Any]] = None
+_ErrorConector : type[Exception] = _SinConector
+
+def errorConector() -> type[Exception]:
+    """
+    Clase base de los errores del conector (`mysql.connector.Error`), para usar en `except errorConector():`.
+    Mientras el conector no se haya cargado devuelve una excepción que nunca se lanza.
+    """
+    return _ErrorConector
+
+def _conectar(**parametros):
+    global _connect, _ErrorConector
+    if _connect is None:
+        try:
+            from mysql.connector import connect
+            from mysql.connector.errors import Error
+        except ImportError as e:
+            raise ImportError("El backend MySQL requiere el paquete 'mysql-connector-python'.") from e
+        _ErrorConector = Error
+        _connect = connect
+    return _connect(**parametros)
+
+def _versionAdmiteAliasFila(version : str) -> bool:
+    # `INSERT ... VALUES (...) AS alias` existe desde MySQL 8.0.19; MariaDB (que informa 10.x, 11.x) no lo admite.
+    if 'mariadb' in version.lower(): return False
+    return tuple(int(numero) for numero in findall(r'\d+', version)[:3]) >= (8, 0, 19)
 
 @runtime_checkable
 class ProtocoloBaseDeDatos(Protocol):
-    def DESCRIBE(self: Self, base_de_datos:str, tabla :str) -> Self: ...
-    
-    def SELECT(self: Self, *columnas : str) -> Self: ...
-    def FROM(self: Self, tabla : str) -> Self: ...
-    def JOIN(self: Self, tipo: TipoUnion, tabla: str, columna_origen : str, columna_destino: str) -> Self: ...
-    def WHERE(self: Self, **columnas : Unpack[dict[str,any]]) -> Self: ...
-    def LIMIT(self: Self, desplazamiento : int, cantidad: int) -> Self: ...
-    
-    def UPDATE(self: Self, tabla: str) -> Self: ...
-    def INSERT(self: Self, tabla: str) -> Self: ...
-    def SET(self: Self, **valores : Unpack[dict[str,any]]) -> Self: ...
-
-    def Ejecutar(self: Self) -> Self :...
-    def DevolverUnResultado(self: Self) -> Resultado :...
-    def DevolverResultados(self: Self) -> tuple[Resultado] :...
-    def DevolverIdUltimaInsercion(self:Self) -> int :...
+    def ejecutar(self: Self, consulta : 'str | Consulta | tuple[str, tuple[Any]]') -> Self :...
+    def devolverResultados(self: Self, cantidad : Opcional[int] = None) -> Opcional[list[Resultado]] :...
+    def devolverUnResultado(self: Self) -> Opcional[Resultado] :...
+    def iterarResultados(self: Self, consulta : 'str | Consulta | tuple[str, tuple[Any]]', tamano_lote : int = 1000, cantidad : Opcional[int] = None) -> Iterador[Resultado] :...
+    def devolverIdUltimaInsercion(self: Self) -> Opcional[int] :...
+    def maximoPaquete(self: Self) -> int :...
+    def incrementoAutonumerico(self: Self) -> int :...
+    def idsConsecutivos(self: Self) -> bool :...
+    def maximoParametros(self: Self) -> int :...
+    def admiteAliasFila(self: Self) -> bool :...
 
 class BaseDeDatos_MySQL: ...
 
@@ -61,28 +92,89 @@ class InstruccionPrincipal():
         self.__instruccion = 'DELETE'
     def esUpdate(self):
         self.__instruccion = 'UPDATE'
-    def construirConsulta(self, parametrosPrincipales, condicion, union, limite):
+    @property
+    def instruccion(self) -> str:
+        return self.__instruccion
+    def construirConsulta(self, parametrosPrincipales, condicion, union, limite, orden = ''):
         if not self.__instruccion: raise ErrorMalaSintaxisSQL("No se ha definido una clausula principal.")
         if self.__instruccion == 'INSERT':
-            if condicion or union or limite: raise ErrorMalaSintaxisSQL("Las instrucciones INSERT no pueden tener clausulas WHERE, JOIN o LIMIT.")
-        return self.__instruccion + '\n' + parametrosPrincipales + condicion + union + limite + ';'
+            if condicion or union or limite or orden: raise ErrorMalaSintaxisSQL("Las instrucciones INSERT no pueden tener clausulas WHERE, JOIN, ORDER BY o LIMIT.")
+        return self.__instruccion + '\n' + parametrosPrincipales + union + condicion + orden + limite + ';'
+
+
+class PlantillaConsulta():
+    '''
+        Forma compilada y congelada de una `Consulta`: el SQL con marcadores `%s` y el nombre de cada
+        parámetro. Se obtiene con `Consulta.congelar()` y permite vincular valores nuevos tantas veces
+        como se quiera sin volver a construir el SQL.
+
+        > plantilla = Consulta().Select('Discos', ['id', 'nombre']).Where(id=0).congelar()
+        > bdd.ejecutar(plantilla.vincular(id=2))
+        > bdd.ejecutar(plantilla.vincular(3))
+    '''
+
+    __slots__ = \
+    (
+        '__sql',
+        '__claves',
+        '__valores',
+        '__indices',
+    )
+
+    def __init__(self, sql : str, claves : tuple[str], valores : tuple[Any]) -> None:
+        self.__sql = sql
+        self.__claves = claves
+        self.__valores = valores
+        self.__indices = {clave : i for i, clave in enumerate(claves)}
+
+    @property
+    def sql(self) -> str:
+        return self.__sql
+
+    @property
+    def claves(self) -> tuple[str]:
+        return self.__claves
+
+    def vincular(self, *posicionales : Any, **nominales : Any) -> tuple[str, tuple[Any]]:
+        """
+        Devuelve el par `(sql, parametros)` listo para `BaseDeDatos_MySQL.ejecutar`.
+        Los valores posicionales reemplazan a todos los parámetros, en orden; los nominales reemplazan
+        sólo a los parámetros con esa clave. Los parámetros no provistos conservan el valor original.
+        """
+        if posicionales and len(posicionales) != len(self.__claves):
+            raise ErrorMalaSolicitud(f"La consulta espera {len(self.__claves)} parámetros y se recibieron {len(posicionales)}.")
+        valores : list[Any] = list(posicionales or self.__valores)
+        for clave, valor in nominales.items():
+            if clave not in self.__indices: raise ErrorMalaSolicitud(f"La consulta no tiene un parámetro '{clave}'. Parámetros: {', '.join(self.__claves)}.")
+            valores[self.__indices[clave]] = valor
+        return self.__sql, tuple(formatearParametroSQL(valor) for valor in valores)
 
 
 class Consulta():
     '''
     Clase que permite generar consultas SQL de forma programática. Las consultas se construyen concatenando
     las clausulas principales (Select, Delete, Insert, Update) y las clausulas secundarias (Where, Join). Luego
-    se espera que el objeto sea convertido a string para obtener la consulta SQL.
+    se compilan con `compilar()` en un par `(sql, parametros)`, donde los valores viajan como parámetros `%s`
+    y no dentro del texto SQL, de modo que consultas con la misma forma comparten el mismo SQL.
+    Convertir el objeto a string devuelve el SQL con los valores ya escapados, útil para depurar.
 
 
     METODOS PUBLICOS
     - Select(tabla : str, columnas : list[str] columnasSecundarias: Optional[Dict[str, List[str]] ] = {}) -> Self
     - Delete(tabla : str) -> Self
     - Insert(tabla : str, **asignaciones : Unpack[dict[str, Any]]) -> Self
+    - InsertMultiple(tabla : str, columnas : list[str], filas : list[tuple]) -> Self
+    - OnDuplicateKeyUpdate(*columnas : str, alias_fila : Optional[str] = None, **asignaciones : Unpack[dict[str, Any]]) -> Self
     - Update(tabla : str, **asignaciones : Unpack[dict[str, Any]]) -> Self
     - Where(tipoCondicion : TipoCondicion = TipoCondicion.IGUAL , **columnaValor : Unpack[dict[str, Any]]) -> Self
     - Join(tablaSecundaria, columnaPrincipal, columnaSecundaria, tipoUnion : TipoUnion = TipoUnion.INNER) -> Self
+    - OrderBy(columna : str, descendente : bool = False) -> Self
     - Limit(desplazamiento: int  , limite : int) -> Self
+    - tablas() -> tuple[str]
+    - ids() -> Optional[tuple]
+    - compilar() -> tuple[str, tuple]
+    - congelar() -> PlantillaConsulta
+    - lotesInsertMultiple(tabla, columnas, filas, maximo_bytes, maximo_parametros, actualizar, alias_fila) -> Iterator[tuple[Consulta, int]]  (método de clase)
     Aclaracion: Los metodos From, Set y Limit no son metodos publicos, ya que son llamados internamente por los metodos que invocan clausulas principales.
 
     ATRIBUTOS PUBLICOS
@@ -93,6 +185,10 @@ class Consulta():
 
 
     > consulta = Consulta().Select(tabla='Usuarios', columnas=['nombreUsuario', 'correo']).Where(id=1).Limit(10, 5)
+    > consulta.compilar()
+
+    ('SELECT\nUsuarios.nombreUsuario, Usuarios.correo\nFROM Usuarios\nWHERE Usuarios.id = %s\nLIMIT %s, %s\n;', (1, 10, 5))
+
     > print(consulta)
 
 
@@ -103,17 +199,49 @@ class Consulta():
     LIMIT 10, 5
     ;
 
+    > consulta = Consulta().Select(tabla='Usuarios', columnas=['id']).Where(TipoCondicion.EN, id=[1, 2, 3])
+    > consulta.compilar()
+
+    ('SELECT\nUsuarios.id\nFROM Usuarios\nWHERE Usuarios.id IN (%s, %s, %s)\n;', (1, 2, 3))
+
     > consulta = Consulta().Delete(tabla='Usuarios').Where(id=1)
     > print(consulta)
 
     DELETE 
     FROM Usuarios
-    WHERE Usuarios.PRIMARY_KEY != 'NULL'
+    WHERE Usuarios.id IS NOT NULL
     AND Usuarios.id = 1
     ;
 
     > consulta = Consulta().Insert(tabla='Usuarios', nombreUsuario='Juan')
 
+    > consulta = Consulta().InsertMultiple(tabla='Usuarios', columnas=['nombreUsuario', 'correo'], filas=[('Juan', 'j@a.ar'), ('Ana', None)])
+    > print(consulta)
+
+    INSERT
+    INTO Usuarios (nombreUsuario, correo)
+    VALUES ('Juan', 'j@a.ar'), ('Ana', NULL)
+    ;
+
+    > consulta = Consulta().InsertMultiple(tabla='Usuarios', columnas=['id', 'correo'], filas=[(1, 'j@a.ar'), (2, None)]).OnDuplicateKeyUpdate('correo', activo=1)
+    > print(consulta)
+
+    INSERT
+    INTO Usuarios (id, correo)
+    VALUES (1, 'j@a.ar'), (2, NULL)
+    ON DUPLICATE KEY UPDATE correo = VALUES(correo), activo = 1
+    ;
+
+    > consulta = Consulta().Insert(tabla='Usuarios', id=1, correo='j@a.ar').OnDuplicateKeyUpdate('correo', alias_fila='nueva')
+    > print(consulta)
+
+    INSERT
+    INTO Usuarios (id, correo)
+    VALUES (1, 'j@a.ar')
+    AS nueva
+    ON DUPLICATE KEY UPDATE correo = nueva.correo
+    ;
+
     > consulta = Consulta().Select(tabla='Usuarios', columnas=['nombreUsuario', 'correo'], columnasSecundarias={'Discos': 'autor'})
     > consulta.Join(tablaSecundaria='Discos', columnaPrincipal='esPremium', columnaSecundaria ='esPremium', tipoUnion=TipoUnion.INNER)
     > print(consulta)
@@ -129,6 +257,7 @@ class Consulta():
     - Se intenta invocar una clausula principal (Select, Delete, Insert, Update) más de una vez.
     - Se intenta convertir a string sin clausula principal
     - Se intenta pedir columnas secundarias de una tabla que no ha sido unida.
+    - Se invoca OnDuplicateKeyUpdate sin un INSERT previo, sin columnas o más de una vez.
 
     La clase levanta errores de tipo ErrorMalaSolicitud en los siguientes casos:
 
@@ -144,7 +273,14 @@ class Consulta():
         '__tablas_secundarias',
         '__condicion',
         '__union',
-        '__limite')
+        '__limite',
+        '__orden',
+        '__valores_principales',
+        '__valores_condicion',
+        '__valores_limite',
+        '__claves',
+        '__duplicados',
+        '__ids')
 
     
 
@@ -154,6 +290,14 @@ class Consulta():
         self.__condicion = ''
         self.__union = ''
         self.__limite = ''
+        self.__orden = ''
+
+        self.__valores_principales : list[tuple[str, Any]] = []
+        self.__valores_condicion : list[tuple[str, Any]] = []
+        self.__valores_limite : list[tuple[str, Any]] = []
+        self.__claves : dict[str, int] = {}
+        self.__duplicados = False
+        self.__ids : Optional[tuple[Any, ...]] = None
 
         self.__tabla_principal = ''
         self.__tablas_secundarias = {}
@@ -175,11 +319,64 @@ class Consulta():
         self.Where(TipoCondicion.NO_ES, id = None)
         return self
     def Insert(self, tabla : str, **asignaciones : Unpack[dict[str, Any]]):
+        return self.InsertMultiple(tabla, list(asignaciones.keys()), [tuple(asignaciones.values())])
+    def InsertMultiple(self, tabla : str, columnas : list[str], filas : list[tuple]):
+        if not filas: raise ErrorMalaSintaxisSQL("Un INSERT necesita al menos una fila.")
         self.__tabla_principal = tabla
         self.__instruccionPrincipal.esInsert()
-        self.__parametros_principales = 'INTO ' + tabla + '\n'
-        self.__Set(**asignaciones)
+        tuplas : list[str] = []
+        for fila in filas:
+            if len(fila) != len(columnas): raise ErrorMalaSintaxisSQL(f"La fila {fila} no tiene {len(columnas)} valores.")
+            tuplas.append('(' + ', '.join(self.__marcador(self.__valores_principales, columna, valor) for columna, valor in zip(columnas, fila)) + ')')
+        self.__parametros_principales = 'INTO ' + tabla + ' (' + ', '.join(columnas) + ')\n' + 'VALUES ' + ', '.join(tuplas) + '\n'
         return self
+
+    def OnDuplicateKeyUpdate(self, *columnas : str, alias_fila : Optional[str] = None, **asignaciones : Unpack[dict[str, Any]]):
+        # Sólo tras Insert / InsertMultiple. Cada columna toma el valor de la fila propuesta: con `alias_fila`,
+        # como `alias.columna` (MySQL 8.0.19+); si no, con `VALUES(columna)`, obsoleto desde 8.0.20 pero
+        # el único que entienden MariaDB y los MySQL anteriores. Las asignaciones fijan un valor, como en Update.
+        if self.__instruccionPrincipal.instruccion != 'INSERT': raise ErrorMalaSintaxisSQL("La clausula ON DUPLICATE KEY UPDATE sólo puede seguir a un INSERT.")
+        if self.__duplicados: raise ErrorMalaSintaxisSQL("La clausula ON DUPLICATE KEY UPDATE ya ha sido definida.")
+        if not columnas and not asignaciones: raise ErrorMalaSintaxisSQL("La clausula ON DUPLICATE KEY UPDATE necesita al menos una columna.")
+        if alias_fila is not None and not alias_fila.isidentifier(): raise ErrorMalaSintaxisSQL(f"Alias de fila inválido: {alias_fila}.")
+        if alias_fila is not None:
+            actualizaciones : list[str] = [f"{columna} = {alias_fila}.{columna}" for columna in columnas]
+            self.__parametros_principales += f"AS {alias_fila}\n"
+        else:
+            actualizaciones = [f"{columna} = VALUES({columna})" for columna in columnas]
+        actualizaciones += [f"{columna} = {self.__marcador(self.__valores_principales, columna, valor)}" for columna, valor in asignaciones.items()]
+        self.__parametros_principales += 'ON DUPLICATE KEY UPDATE ' + ', '.join(actualizaciones) + '\n'
+        self.__duplicados = True
+        return self
+
+    @classmethod
+    def lotesInsertMultiple(cls, tabla : str, columnas : list[str], filas : list[tuple], maximo_bytes : int, maximo_parametros : int = 65535, actualizar : Optional[Iterable[str]] = None, alias_fila : Optional[str] = None) -> Iterador[tuple[Self, int]]:
+        """
+        Divide `filas` en INSERT de varias filas, cada uno de a lo sumo `maximo_bytes` estimados
+        (p. ej. `max_allowed_packet`) y `maximo_parametros` marcadores. Devuelve pares `(consulta, cantidad_de_filas)`.
+        Con `actualizar`, cada INSERT lleva `ON DUPLICATE KEY UPDATE` de esas columnas (ver `OnDuplicateKeyUpdate`
+        para `alias_fila`).
+        """
+        actualizar = list(actualizar or ())
+        encabezado : int = len(tabla) + sum(len(columna) + 2 for columna in columnas) + 32
+        if actualizar: encabezado += 24 + sum(2 * len(columna) + 12 + len(alias_fila or '') for columna in actualizar) + len(alias_fila or '')
+
+        def armar(lote : list[tuple]) -> Self:
+            consulta : Self = cls().InsertMultiple(tabla, columnas, lote)
+            return consulta.OnDuplicateKeyUpdate(*actualizar, alias_fila=alias_fila) if actualizar else consulta
+
+        por_fila : int = 2 * len(columnas) + 4
+        lote : list[tuple] = []
+        tamano : int = encabezado
+        for fila in filas:
+            tamano_fila : int = por_fila + sum(len(formatearValorParaSQL(valor).encode('utf-8')) for valor in fila)
+            if lote and (tamano + tamano_fila > maximo_bytes or (len(lote) + 1) * len(columnas) > maximo_parametros):
+                yield armar(lote), len(lote)
+                lote, tamano = [], encabezado
+            lote.append(fila)
+            tamano += tamano_fila
+        if lote:
+            yield armar(lote), len(lote)
     def Update(self, tabla : str, **asignaciones : Unpack[dict[str, Any]]):
         self.__tabla_principal = tabla
         self.__instruccionPrincipal.esUpdate()
@@ -189,9 +386,12 @@ class Consulta():
 
         return self
     def Where(self, tipoCondicion : TipoCondicion = TipoCondicion.IGUAL , **columnaValor : Unpack[dict[str, Any]]):
-        condiciones : str = '   AND '.join(f"{self.etiquetar(self.__tabla_principal, [columna]) } {tipoCondicion} {self.adaptar(valor)}" for columna, valor in columnaValor.items())
+        condiciones : str = '   AND '.join(f"{self.etiquetar(self.__tabla_principal, [columna]) } {tipoCondicion} {self.__marcadores(self.__valores_condicion, columna, valor, tipoCondicion)}" for columna, valor in columnaValor.items())
         if not self.__condicion: self.__condicion = f'WHERE {condiciones}\n'
         else: self.__condicion += f' AND {condiciones}\n'
+        if 'id' in columnaValor and tipoCondicion in (TipoCondicion.IGUAL, TipoCondicion.EN):
+            ids : tuple[Any, ...] = tuple(columnaValor['id']) if tipoCondicion == TipoCondicion.EN else (columnaValor['id'],)
+            self.__ids = ids if self.__ids is None else tuple(id for id in self.__ids if id in ids)
         return self
 
     
@@ -201,43 +401,97 @@ class Consulta():
         self.__union += nuevoJoin        
         return self
     
+    def OrderBy(self, columna : str, descendente : bool = False):
+        # Puede llamarse varias veces: cada columna se agrega como criterio de desempate de la anterior.
+        criterio : str = self.etiquetar(self.__tabla_principal, [columna]) + (' DESC' if descendente else ' ASC')
+        self.__orden = (self.__orden.rstrip('\n') + ', ' + criterio if self.__orden else 'ORDER BY ' + criterio) + '\n'
+        return self
+
     def Limit(self, desplazamiento: int  , limite : int):
         if self.__limite : raise ErrorMalaSintaxisSQL("La clausula LIMIT ya ha sido definida.")
-        self.__limite  =  'LIMIT ' + str(desplazamiento) + ', ' + str(limite) + '\n'
+        self.__limite  =  'LIMIT ' + self.__marcador(self.__valores_limite, 'desplazamiento', int(desplazamiento)) + ', ' + self.__marcador(self.__valores_limite, 'limite', int(limite)) + '\n'
         return self
     def __From(self, tabla : str):
         self.__parametros_principales += 'FROM ' + tabla + '\n'
         return self
     def __Set(self, **columnaValor : Unpack[dict[str, Any]]):
-        asignaciones = ', '.join(f"{self.etiquetar(self.__tabla_principal, [columna]) } = {self.adaptar(valor)}" for columna, valor in columnaValor.items())
+        asignaciones = ', '.join(f"{columna} = {self.__marcador(self.__valores_principales, columna, valor)}" for columna, valor in columnaValor.items())
         self.__parametros_principales += f'SET {asignaciones}\n'
         return self
 
+    def __marcadores(self, valores : list[tuple[str, Any]], columna : str, valor : Any, tipoCondicion : str) -> str:
+        # IN recibe una secuencia de valores: un marcador por valor. Una lista vacía no coincide con nada.
+        if tipoCondicion != TipoCondicion.EN:
+            return self.__marcador(valores, columna, valor, tipoCondicion)
+        if not valor: return '(NULL)'
+        return '(' + ', '.join(self.__marcador(valores, columna, v) for v in valor) + ')'
+
+    def __marcador(self, valores : list[tuple[str, Any]], columna : str, valor : Any, tipoCondicion : Optional[str] = None) -> str:
+        # Registra el valor como parámetro y devuelve su marcador. IS / IS NOT sólo admiten NULL literal.
+        if valor is None and tipoCondicion in ('IS', TipoCondicion.NO_ES):
+            return 'NULL'
+        clave : str = columna
+        if clave in self.__claves:
+            self.__claves[columna] += 1
+            clave = f"{columna}_{self.__claves[columna]}"
+        self.__claves.setdefault(clave, 1)
+        valores.append((clave, valor))
+        return '%s'
     
-    
+    @property
+    def instruccion(self) -> str:
+        # 'SELECT', 'INSERT', 'UPDATE', 'DELETE' o '' si aún no se definió la clausula principal.
+        return self.__instruccionPrincipal.instruccion
+
+    def tablas(self) -> tuple[str]:
+        """Tablas que la consulta lee o escribe: la principal y las unidas con Join."""
+        return (self.__tabla_principal, *self.__tablas_secundarias.keys()) if self.__tabla_principal else tuple(self.__tablas_secundarias.keys())
+
+    def ids(self) -> Optional[tuple[Any, ...]]:
+        """Ids a los que la condición limita la consulta (`Where(id=...)` o `Where(TipoCondicion.EN, id=[...])`); None si no la limita por id."""
+        return self.__ids
+
     def etiquetar(self, tabla: str, columnas : list[str]):
         # Recibe una tabla y columnas. devuelve cada columna en el namespace de la tabla 
         return ', '.join([tabla + '.' + columna  for columna in columnas])
 
     def adaptar(self, valor : Any) -> str:
-        #En caso de que el valor sea de un tipo estpecial debe convertirse a string fuera del llamado para que la consulta no falle
-        if not valor:
-            return "NULL"
-        if type(valor) == int:
-            return str(valor)
-        else:
-            return "'" + str(valor) + "'"
+        # Representación literal (escapada) de un valor; sólo se usa al convertir la consulta a string.
+        return formatearValorParaSQL(valor)
 
     def reiniciar(self):
         self.consulta = ''
     
-    def __str__(self):
+    def __sql(self) -> str:
         if not self.__parametros_principales: raise ErrorMalaSintaxisSQL("No se ha definido una clausula principal.") 
         for tabla, valor in self.__tablas_secundarias.items():
             if valor == 0:
                 raise ErrorMalaSintaxisSQL(f"La tabla {tabla} no ha sido unida.")
         
-        return self.__instruccionPrincipal.construirConsulta(self.__parametros_principales, self.__condicion, self.__union, self.__limite)
+        return self.__instruccionPrincipal.construirConsulta(self.__parametros_principales, self.__condicion, self.__union, self.__limite, self.__orden)
+
+    def __valores(self) -> list[tuple[str, Any]]:
+        # Mismo orden en que construirConsulta concatena las clausulas (JOIN y ORDER BY no llevan valores).
+        return self.__valores_principales + self.__valores_condicion + self.__valores_limite
+
+    def compilar(self, formatear : Callable[[Any], Any] = formatearParametroSQL) -> tuple[str, tuple[Any]]:
+        """
+        Devuelve el par `(sql, parametros)`: el SQL con marcadores `%s` y los valores en el orden de los marcadores.
+        `formatear` adapta cada valor al conector (por defecto, el de MySQL).
+        """
+        return self.__sql(), tuple(formatear(valor) for _, valor in self.__valores())
+
+    def congelar(self) -> PlantillaConsulta:
+        """
+        Compila la consulta una única vez en una `PlantillaConsulta` reutilizable.
+        """
+        valores : list[tuple[str, Any]] = self.__valores()
+        return PlantillaConsulta(self.__sql(), tuple(clave for clave, _ in valores), tuple(valor for _, valor in valores))
+    
+    def __str__(self):
+        partes : list[str] = self.__sql().split('%s')
+        literales : list[str] = [self.adaptar(valor) for _, valor in self.__valores()]
+        return partes[0] + ''.join(literal + parte for literal, parte in zip(literales, partes[1:]))
         
 
 
@@ -249,10 +503,16 @@ class ConfigBDDMysql(metaclass=Solteron):
         '__HOST',  
         '__USUARIO',  
         '__CONTRASENA',  
-        '__NOMBRE_BDD'
+        '__NOMBRE_BDD',
+        '__POOL_MINIMO',
+        '__POOL_MAXIMO',
+        '__POOL_ESPERA_MAXIMA'
 
     )
 
+    __POOL_MINIMO : int = 1
+    __POOL_MAXIMO : int = 10
+    __POOL_ESPERA_MAXIMA : Opcional[float] = 30.0
 
     @property
     def PARAMETROS_CONEXION(self) -> dict: 
@@ -273,7 +533,520 @@ class ConfigBDDMysql(metaclass=Solteron):
            "named_tuple" : False,   
         }
 
+    @property
+    def OPCIONES_POOL(self) -> dict:
+        return \
+        {
+            "minimo" : self.__POOL_MINIMO,
+            "maximo" : self.__POOL_MAXIMO,
+            "espera_maxima" : self.__POOL_ESPERA_MAXIMA,
+        }
+
 
+class PoolConexiones():
+    '''
+        Pool de conexiones acotado y seguro entre hilos.
+
+        Mantiene abiertas entre `minimo` y `maximo` conexiones. `BaseDeDatos_MySQL` toma una conexión
+        prestada al conectar y la devuelve al desconectar, en lugar de abrir y cerrar una conexión
+        (saludo TCP + autenticación) en cada bloque `with bdd:`. Antes de entregar una conexión libre
+        se le hace ping; si no responde se descarta y se toma o abre otra.
+
+        METODOS PUBLICOS
+        - obtener() -> conexion
+        - devolver(conexion) -> None
+        - descartar(conexion) -> None
+        - cerrar() -> None
+        - estadisticas() -> dict[str, int | float]
+
+        CASOS DE ERROR
+        - ErrorPoolLlena: las `maximo` conexiones están en uso y ninguna se liberó en `espera_maxima` segundos.
+        - ErrorDemasiadasConexiones: el servidor rechazó la conexión por exceso de conexiones.
+        - ErrorBDD: se pidió una conexión a un pool cerrado.
+    '''
+
+    __slots__ = \
+    (
+        '__parametros',
+        '__minimo',
+        '__maximo',
+        '__espera_maxima',
+        '__libres',
+        '__abiertas',
+        '__condicion',
+        '__cerrado',
+        '__prestamos',
+        '__esperas',
+        '__tiempo_espera',
+        '__creadas',
+        '__descartadas',
+        '__contextos',
+    )
+
+    def __init__(self, parametros : dict, minimo : int = 1, maximo : int = 10, espera_maxima : Opcional[float] = 30.0) -> None:
+        if minimo < 0 or maximo < 1 or minimo > maximo:
+            raise ValueError(f"Tamaño de pool inválido: minimo={minimo}, maximo={maximo}.")
+        self.__parametros = dict(parametros)
+        self.__minimo = minimo
+        self.__maximo = maximo
+        self.__espera_maxima = espera_maxima
+        self.__libres : deque = deque()
+        self.__abiertas = 0
+        self.__condicion = Condition()
+        self.__cerrado = False
+
+        self.__prestamos = 0
+        self.__esperas = 0
+        self.__tiempo_espera = 0.0
+        self.__creadas = 0
+        self.__descartadas = 0
+        self.__contextos : dict[int, dict] = {}
+
+        for _ in range(minimo):
+            self.__libres.append(self.__abrir())
+            self.__abiertas += 1
+            self.__creadas += 1
+
+    @classmethod
+    def desdeConfiguracion(cls, configuracion : ConfigBDDMysql) -> Self:
+        return cls(configuracion.PARAMETROS_CONEXION, **configuracion.OPCIONES_POOL)
+
+    @property
+    def parametros(self) -> dict:
+        return dict(self.__parametros)
+
+    @property
+    def maximo(self) -> int:
+        return self.__maximo
+
+    def __abrir(self):
+        try:
+            conexion = _conectar(**self.__parametros)
+        except errorConector() as e:
+            if e.errno == ER_CON_COUNT_ERROR:
+                raise ErrorDemasiadasConexiones("El servidor rechazó la conexión: demasiadas conexiones abiertas.") from e
+            raise
+        return conexion
+
+    def __cerrarConexion(self, conexion) -> None:
+        with self.__condicion:
+            self.__contextos.pop(id(conexion), None)
+        try:
+            conexion.close()
+        except errorConector():
+            pass
+
+    @staticmethod
+    def __estaViva(conexion) -> bool:
+        try:
+            conexion.ping(reconnect=False)
+            return True
+        except errorConector():
+            return False
+
+    def obtener(self):
+        """
+        Presta una conexión del pool. Reutiliza una conexión libre si la hay, abre una nueva si no
+        se alcanzó `maximo` y, en otro caso, espera hasta `espera_maxima` segundos a que se libere una.
+        """
+        inicio : float = monotonic()
+        limite : Opcional[float] = None if self.__espera_maxima is None else inicio + self.__espera_maxima
+        esperó : bool = False
+        while True:
+            conexion = None
+            with self.__condicion:
+                while True:
+                    if self.__cerrado: raise ErrorBDD("El pool de conexiones está cerrado.")
+                    if self.__libres:
+                        conexion = self.__libres.pop()
+                        break
+                    if self.__abiertas < self.__maximo:
+                        self.__abiertas += 1
+                        break
+                    restante : Opcional[float] = None if limite is None else limite - monotonic()
+                    if restante is not None and restante <= 0:
+                        self.__tiempo_espera += monotonic() - inicio
+                        raise ErrorPoolLlena(f"No se liberó ninguna de las {self.__maximo} conexiones en {self.__espera_maxima} segundos.")
+                    if not esperó:
+                        esperó = True
+                        self.__esperas += 1
+                    self.__condicion.wait(restante)
+
+            recien_abierta : bool = conexion is None
+            if recien_abierta:
+                try:
+                    conexion = self.__abrir()
+                except BaseException:
+                    with self.__condicion:
+                        self.__abiertas -= 1
+                        self.__condicion.notify()
+                    raise
+            elif not self.__estaViva(conexion):
+                self.descartar(conexion)
+                continue
+
+            with self.__condicion:
+                if recien_abierta: self.__creadas += 1
+                self.__prestamos += 1
+                if esperó: self.__tiempo_espera += monotonic() - inicio
+            return conexion
+
+    def contexto(self, conexion) -> dict:
+        """
+        Estado asociado a una conexión del pool (p. ej. su caché de sentencias preparadas).
+        Se conserva entre préstamos y se descarta cuando el pool cierra la conexión.
+        """
+        with self.__condicion:
+            return self.__contextos.setdefault(id(conexion), {})
+
+    def devolver(self, conexion) -> None:
+        """
+        Devuelve una conexión prestada. Si quedó una transacción abierta se revierte; si eso falla,
+        o el pool está cerrado, la conexión se cierra en lugar de volver a la lista de libres.
+        """
+        try:
+            if conexion.in_transaction: conexion.rollback()
+        except errorConector():
+            self.descartar(conexion)
+            return
+        with self.__condicion:
+            if not self.__cerrado:
+                self.__libres.append(conexion)
+                self.__condicion.notify()
+                return
+            self.__abiertas -= 1
+        self.__cerrarConexion(conexion)
+
+    def descartar(self, conexion) -> None:
+        """Cierra una conexión prestada (p. ej. rota) y libera su lugar en el pool."""
+        self.__cerrarConexion(conexion)
+        with self.__condicion:
+            self.__abiertas -= 1
+            self.__descartadas += 1
+            self.__condicion.notify()
+
+    def cerrar(self) -> None:
+        """Cierra las conexiones libres; las prestadas se cierran a medida que se devuelven."""
+        with self.__condicion:
+            self.__cerrado = True
+            libres = list(self.__libres)
+            self.__libres.clear()
+            self.__abiertas -= len(libres)
+            self.__condicion.notify_all()
+        for conexion in libres:
+            self.__cerrarConexion(conexion)
+
+    def estadisticas(self) -> dict[str, int | float]:
+        """
+        Devuelve los contadores del pool:
+        - prestamos: conexiones entregadas por `obtener`.
+        - esperas / tiempo_espera: préstamos que tuvieron que esperar y segundos esperados en total.
+        - creadas / descartadas: conexiones abiertas y cerradas por rotación (ping fallido, errores).
+        - abiertas / libres / en_uso: estado actual.
+        """
+        with self.__condicion:
+            return \
+            {
+                "prestamos" : self.__prestamos,
+                "esperas" : self.__esperas,
+                "tiempo_espera" : self.__tiempo_espera,
+                "creadas" : self.__creadas,
+                "descartadas" : self.__descartadas,
+                "abiertas" : self.__abiertas,
+                "libres" : len(self.__libres),
+                "en_uso" : self.__abiertas - len(self.__libres),
+            }
+
+
+
+
+class CacheSentenciasPreparadas():
+    '''
+        Caché LRU de sentencias preparadas de una conexión, indexado por el texto SQL.
+
+        Cada sentencia se prepara en el servidor una única vez mediante un cursor preparado propio; las
+        ejecuciones siguientes con el mismo SQL sólo envían los parámetros, sin volver a analizar ni
+        planificar la sentencia. Al superar la `capacidad` se cierra el cursor menos usado, lo que
+        libera (DEALLOCATE) la sentencia en el servidor.
+    '''
+
+    __slots__ = \
+    (
+        '__conexion',
+        '__capacidad',
+        '__opciones_cursor',
+        '__cursores',
+        '__aciertos',
+        '__fallos',
+        '__desalojos',
+    )
+
+    def __init__(self, conexion, capacidad : int = 64, opciones_cursor : Opcional[dict] = None) -> None:
+        if capacidad < 1: raise ValueError(f"La capacidad del caché de sentencias preparadas debe ser positiva: {capacidad}.")
+        self.__conexion = conexion
+        self.__capacidad = capacidad
+        self.__opciones_cursor = opciones_cursor or {}
+        self.__cursores : OrderedDict[str, Any] = OrderedDict()
+        self.__aciertos = 0
+        self.__fallos = 0
+        self.__desalojos = 0
+
+    def obtener(self, sql : str):
+        """Devuelve el cursor preparado para `sql`, creándolo (y desalojando el menos usado) si hace falta."""
+        cursor = self.__cursores.get(sql)
+        if cursor is not None:
+            self.__cursores.move_to_end(sql)
+            self.__aciertos += 1
+            return cursor
+        self.__fallos += 1
+        cursor = self.__conexion.cursor(prepared=True, **self.__opciones_cursor)
+        self.__cursores[sql] = cursor
+        if len(self.__cursores) > self.__capacidad:
+            _, desalojado = self.__cursores.popitem(last=False)
+            self.__desalojos += 1
+            self.__cerrarCursor(desalojado)
+        return cursor
+
+    @staticmethod
+    def __cerrarCursor(cursor) -> None:
+        try:
+            cursor.close()
+        except errorConector():
+            pass
+
+    def vaciar(self) -> None:
+        """Cierra todos los cursores y libera sus sentencias en el servidor."""
+        while self.__cursores:
+            _, cursor = self.__cursores.popitem(last=False)
+            self.__cerrarCursor(cursor)
+
+    def estadisticas(self) -> dict[str, int]:
+        return \
+        {
+            "aciertos" : self.__aciertos,
+            "fallos" : self.__fallos,
+            "desalojos" : self.__desalojos,
+            "preparadas" : len(self.__cursores),
+            "capacidad" : self.__capacidad,
+        }
+
+
+class CacheResultados():
+    '''
+        Caché de resultados de SELECT, indexado por el SQL compilado y sus parámetros, con capacidad
+        acotada (desaloja la entrada menos usada) y vencimiento por consulta.
+
+        Cada entrada recuerda las tablas que leyó su consulta. Cuando `BaseDeDatos_MySQL` ejecuta una
+        escritura (INSERT, UPDATE o DELETE) se descartan las entradas que leyeron alguna de las tablas
+        escritas. Una escritura cuya tabla no se puede determinar (SQL arbitrario) vacía todo el caché.
+
+        Puede compartirse entre varias instancias de `BaseDeDatos_MySQL` (y entre hilos), pero sólo ve
+        las escrituras hechas a través de ellas: si otros procesos escriben las mismas tablas, use un
+        `ttl` corto.
+
+        > cache = CacheResultados(capacidad=512, ttl=30.0)
+        > bdd = BaseDeDatos_MySQL(config, pool=pool, cache=cache)
+        > with bdd:
+        >     bdd.ejecutar(Consulta().Select('Soportes', ['id', 'nombre']), ttl_cache=300).devolverResultados()
+
+        METODOS PUBLICOS
+        - analizar(consulta, sql) -> tuple[bool, Optional[frozenset[str]]]  (método estático)
+        - obtener(clave) -> Optional[list[Resultado]]
+        - guardar(clave, filas, tablas, ttl = None, generacion = None) -> None
+        - generacion() -> int
+        - invalidar(tablas) -> None
+        - vaciar() -> None
+        - estadisticas() -> dict[str, int]
+    '''
+
+    __slots__ = \
+    (
+        '__capacidad',
+        '__ttl',
+        '__entradas',
+        '__por_tabla',
+        '__cerrojo',
+        '__generacion',
+        '__aciertos',
+        '__fallos',
+        '__desalojos',
+        '__vencidas',
+        '__invalidadas',
+    )
+
+    __ESCRITURA = compilarRegex(r'^\s*(?:INSERT(?:\s+IGNORE)?\s+INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?)\s+`?(\w+)`?', IGNORECASE)
+    __TABLAS_LEIDAS = compilarRegex(r'\b(?:FROM|JOIN)\s+`?(\w+)`?', IGNORECASE)
+    __SIN_EFECTO = ('SELECT', 'SHOW', 'DESCRIBE', 'DESC', 'EXPLAIN', 'SET', 'USE')
+
+    def __init__(self, capacidad : int = 1024, ttl : Opcional[float] = 60.0) -> None:
+        """
+        :arg capacidad int: cantidad máxima de consultas en caché.
+        :arg ttl Opcional[float]: segundos de validez por defecto de cada entrada; `None` no vence (sólo se invalida).
+        """
+        if capacidad < 1: raise ValueError(f"La capacidad del caché de resultados debe ser positiva: {capacidad}.")
+        self.__capacidad = capacidad
+        self.__ttl = ttl
+        self.__entradas : OrderedDict[tuple[str, Any], tuple[tuple[Resultado], frozenset[str], Opcional[float]]] = OrderedDict()
+        self.__por_tabla : dict[str, set[tuple[str, Any]]] = {}
+        self.__cerrojo = Lock()
+        self.__generacion = 0
+        self.__aciertos = 0
+        self.__fallos = 0
+        self.__desalojos = 0
+        self.__vencidas = 0
+        self.__invalidadas = 0
+
+    @classmethod
+    def analizar(cls, consulta : 'str | Consulta | tuple[str, tuple[Any]]', sql : str) -> tuple[bool, Opcional[frozenset[str]]]:
+        """
+        Clasifica una sentencia. Devuelve `(es_lectura, tablas)`:
+        - lectura: las tablas que lee (vacío si no se puede cachear, p. ej. `SELECT ... FOR UPDATE`).
+        - escritura: las tablas que escribe, o `None` si no se pueden determinar.
+        """
+        if isinstance(consulta, Consulta):
+            return consulta.instruccion == 'SELECT', frozenset(consulta.tablas())
+        if escritura := cls.__ESCRITURA.match(sql):
+            return False, frozenset((escritura.group(1),))
+        palabras : list[str] = sql.split(None, 1)
+        if not palabras or palabras[0].upper() not in cls.__SIN_EFECTO:
+            return False, None
+        if palabras[0].upper() != 'SELECT' or 'FOR UPDATE' in sql.upper() or 'LOCK IN SHARE MODE' in sql.upper():
+            return True, frozenset()
+        return True, frozenset(cls.__TABLAS_LEIDAS.findall(sql))
+
+    def generacion(self) -> int:
+        """Contador de invalidaciones: permite a `guardar` descartar resultados leídos antes de una escritura concurrente."""
+        return self.__generacion
+
+    def obtener(self, clave : tuple[str, Any]) -> Opcional[tuple[Resultado]]:
+        with self.__cerrojo:
+            entrada = self.__entradas.get(clave)
+            if entrada is None:
+                self.__fallos += 1
+                return None
+            filas, tablas, vence = entrada
+            if vence is not None and vence <= monotonic():
+                self.__quitar(clave)
+                self.__vencidas += 1
+                self.__fallos += 1
+                return None
+            self.__entradas.move_to_end(clave)
+            self.__aciertos += 1
+            return filas
+
+    def guardar(self, clave : tuple[str, Any], filas : list[Resultado], tablas : frozenset[str], ttl : Opcional[float] = None, generacion : Opcional[int] = None) -> None:
+        """
+        Guarda las filas de una consulta. `ttl` reemplaza al del caché para esta consulta.
+        Si se indica `generacion` y hubo invalidaciones desde entonces, no guarda nada.
+        """
+        ttl = self.__ttl if ttl is None else ttl
+        with self.__cerrojo:
+            if generacion is not None and generacion != self.__generacion: return
+            if clave in self.__entradas: self.__quitar(clave)
+            self.__entradas[clave] = (tuple(filas), tablas, None if ttl is None else monotonic() + ttl)
+            for tabla in tablas:
+                self.__por_tabla.setdefault(tabla, set()).add(clave)
+            while len(self.__entradas) > self.__capacidad:
+                self.__quitar(next(iter(self.__entradas)))
+                self.__desalojos += 1
+
+    def __quitar(self, clave : tuple[str, Any]) -> None:
+        _, tablas, _ = self.__entradas.pop(clave)
+        for tabla in tablas:
+            claves : Opcional[set] = self.__por_tabla.get(tabla)
+            if claves is None: continue
+            claves.discard(clave)
+            if not claves: del self.__por_tabla[tabla]
+
+    def invalidar(self, tablas : Opcional[Iterable[str]]) -> None:
+        """Descarta las entradas que leyeron alguna de las `tablas`; con `None`, vacía el caché."""
+        if tablas is None:
+            self.vaciar()
+            return
+        with self.__cerrojo:
+            self.__generacion += 1
+            for tabla in tablas:
+                for clave in list(self.__por_tabla.get(tabla, ())):
+                    self.__quitar(clave)
+                    self.__invalidadas += 1
+
+    def vaciar(self) -> None:
+        with self.__cerrojo:
+            self.__generacion += 1
+            self.__invalidadas += len(self.__entradas)
+            self.__entradas.clear()
+            self.__por_tabla.clear()
+
+    def estadisticas(self) -> dict[str, int]:
+        return \
+        {
+            "aciertos" : self.__aciertos,
+            "fallos" : self.__fallos,
+            "desalojos" : self.__desalojos,
+            "vencidas" : self.__vencidas,
+            "invalidadas" : self.__invalidadas,
+            "entradas" : len(self.__entradas),
+            "capacidad" : self.__capacidad,
+        }
+
+_INSERCION = compilarRegex(r'^\s*INSERT\s+(?:IGNORE\s+)?INTO\b', IGNORECASE)
+
+def _expirarRegistros(consulta : 'str | Consulta | tuple[str, tuple[Any]]', sql : str) -> None:
+    # Tras una escritura, quita del MapaIdentidad activo los registros que pudo modificar: los ids de la
+    # condición si la consulta la limita por id, si no toda la tabla (o todo el mapa si no se sabe cuál).
+    # Un INSERT sin ON DUPLICATE KEY UPDATE (ON CONFLICT en SQLite) sólo agrega filas y no desactualiza
+    # ninguna cargada.
+    mapa : Opcional[MapaIdentidad] = MapaIdentidad.actual()
+    if mapa is None: return
+    lectura, tablas = CacheResultados.analizar(consulta, sql)
+    if lectura: return
+    if _INSERCION.match(sql) and 'ON DUPLICATE KEY' not in (mayusculas := sql.upper()) and 'ON CONFLICT' not in mayusculas: return
+    if tablas is None:
+        mapa.vaciar()
+        return
+    ids : Opcional[tuple[Any, ...]] = consulta.ids() if isinstance(consulta, Consulta) else None
+    for tabla in tablas:
+        if ids is None: mapa.expirar(tabla)
+        else:
+            for id in ids: mapa.expirar(tabla, id)
+
+
+class ResultadoLote():
+    '''
+        Resultado de una de las sentencias de `BaseDeDatos_MySQL.lote` o de `ejecutarEnParalelo`, en el
+        lugar que ocupaba la sentencia.
+
+        ATRIBUTOS PUBLICOS
+        - filas: las filas devueltas (`None` si la sentencia no devuelve filas o no devolvió ninguna).
+        - filas_afectadas: filas afectadas por la sentencia (-1 si no se ejecutó).
+        - id_ultima_insercion: id autonumérico generado, si fue un INSERT.
+        - error: la excepción de la sentencia, si falló.
+        - ejecutada: si el servidor llegó a ejecutarla (MySQL detiene el lote en la primera que falla).
+
+        METODOS PUBLICOS
+        - devolverResultados() -> Opcional[list[Resultado]]
+
+        CASOS DE ERROR
+        - `devolverResultados` levanta el error de la sentencia, o ErrorBDD si no llegó a ejecutarse.
+    '''
+
+    __slots__ = ('filas', 'filas_afectadas', 'id_ultima_insercion', 'error', 'ejecutada')
+
+    def __init__(self) -> None:
+        self.filas : Opcional[list[Resultado]] = None
+        self.filas_afectadas : int = -1
+        self.id_ultima_insercion : Opcional[int] = None
+        self.error : Opcional[BaseException] = None
+        self.ejecutada : bool = False
+
+    def devolverResultados(self) -> Opcional[list[Resultado]]:
+        if self.error is not None: raise self.error
+        if not self.ejecutada: raise ErrorBDD("La sentencia no se ejecutó: falló una sentencia anterior del lote.")
+        return self.filas
+
+    def __repr__(self) -> str:
+        estado : str = f"error={self.error!r}" if self.error is not None else f"filas={len(self.filas or ())}, filas_afectadas={self.filas_afectadas}" if self.ejecutada else "sin ejecutar"
+        return f"ResultadoLote({estado})"
 
 
 class BaseDeDatos_MySQL():
@@ -281,11 +1054,47 @@ class BaseDeDatos_MySQL():
     (
         "__config",
         "__conexion",
-        "__cursor"
+        "__cursor",
+        "__pool",
+        "__profundidad",
+        "__preparadas",
+        "__cache_preparadas",
+        "__cursor_activo",
+        "__variables",
+        "__autoconfirmar",
+        "__transacciones",
+        "__cache",
+        "__filas_cache",
+        "__tablas_pendientes",
     )
-    def __init__(self, configuracion : ConfigBDDMysql = None) -> None:
+
+    __LLAMADA = compilarRegex(r'^\s*CALL\b', IGNORECASE)
+
+    def __init__(self, configuracion : ConfigBDDMysql = None, pool : Opcional[PoolConexiones] = None, preparadas : int = 0, autoconfirmar : bool = True, cache : Opcional[CacheResultados] = None) -> None:
+        """
+        :arg configuracion ConfigBDDMysql: parámetros de conexión.
+        :arg pool Opcional[PoolConexiones]: pool del que tomar prestadas las conexiones.
+        :arg preparadas int: capacidad del caché LRU de sentencias preparadas por conexión; 0 lo desactiva.
+        :arg autoconfirmar bool: si es `False`, `ejecutar` no confirma cada sentencia y hay que llamar a
+            `confirmar()` (p. ej. cada N filas en procesos masivos) antes de liberar la conexión; lo no
+            confirmado se revierte al devolverla al pool.
+        :arg cache Opcional[CacheResultados]: caché de resultados de SELECT; las escrituras hechas con esta
+            instancia invalidan las entradas de las tablas que tocan.
+        """
         self.__conexion = None
         self.__cursor = None
+        self.__cursor_activo = None
+        self.__pool = pool
+        self.__profundidad = 0
+        self.__preparadas = preparadas
+        self.__cache_preparadas = None
+        self.__variables = None
+        self.__autoconfirmar = autoconfirmar
+        self.__transacciones = 0
+        self.__cache = cache
+        self.__filas_cache = None
+        # Tablas escritas y aún no confirmadas (None: alguna que no se pudo determinar).
+        self.__tablas_pendientes : Opcional[set[str]] = set()
         self.configurar(configuracion)
     
     def configurar(self, configuracion : ConfigBDDMysql = None) -> None:
@@ -294,63 +1103,577 @@ class BaseDeDatos_MySQL():
             return self
         # Agregar comportamiento usando las variables de ambiente
 
+    @property
+    def pool(self) -> Opcional[PoolConexiones]:
+        return self.__pool
+
+    @property
+    def configuracion(self) -> ConfigBDDMysql:
+        return self.__config
+
     def conectar(self) -> Self:
         if self.__conexion: return self
-        self.__conexion = connect(**self.__config.PARAMETROS_CONEXION)
+        self.__conexion = self.__pool.obtener() if self.__pool else _conectar(**self.__config.PARAMETROS_CONEXION)
         self.__cursor = self.__conexion.cursor(buffered=True, **self.__config.OPCION_CURSOR)
+        self.__cursor_activo = self.__cursor
         return self
 
     def desconectar(self) -> None:
-        if self.__cursor: self.__cursor.close()
-        if self.__conexion: self.__conexion.close()
-        self.__cursor = None
-        self.__conexion = None
+        self.__liberar(descartar=False)
     
     def reconectar(self) -> Self:
-        self.desconectar()
+        self.__liberar(descartar=True)
         self.conectar()
         return self
-    
-    def __exit__(self, exc_type,excl_val,exc_tb) -> None:
-        # ###print(f"[DEBUG] Saliendo {self.__cursor=}{self.__conexion=}{self.__pool=}")
-        self.desconectar()
 
+    def __liberar(self, descartar : bool) -> None:
+        # Con pool, la conexión vuelve al pool (o se descarta si está rota) en lugar de cerrarse.
+        if (instrumentacion := Instrumentacion.actual()) is not None: instrumentacion.cerrar()
+        self.__drenarCursorActivo()
+        if self.__cursor:
+            try: self.__cursor.close()
+            except errorConector(): descartar = True
+        if self.__conexion:
+            if self.__cache_preparadas and not self.__pool: self.__cache_preparadas.vaciar()
+            if not self.__pool: self.__conexion.close()
+            elif descartar: self.__pool.descartar(self.__conexion)
+            else: self.__pool.devolver(self.__conexion)
+        self.__cursor = None
+        self.__cursor_activo = None
+        self.__cache_preparadas = None
+        self.__conexion = None
+        # Lo no confirmado se revirtió al cerrar o devolver la conexión.
+        self.__filas_cache = None
+        self.__tablas_pendientes = set()
+
+    def __cachePreparadas(self) -> CacheSentenciasPreparadas:
+        # Con pool, el caché vive en el contexto de la conexión y se reutiliza en cada préstamo.
+        if self.__cache_preparadas is None:
+            contexto : dict = self.__pool.contexto(self.__conexion) if self.__pool else {}
+            if 'preparadas' not in contexto:
+                contexto['preparadas'] = CacheSentenciasPreparadas(self.__conexion, self.__preparadas, self.__config.OPCION_CURSOR)
+            self.__cache_preparadas = contexto['preparadas']
+        return self.__cache_preparadas
+
+    def __drenarCursorActivo(self) -> None:
+        # Los cursores preparados no tienen buffer: las filas sin leer deben consumirse antes de usar la conexión de nuevo.
+        if self.__cursor_activo is None or self.__cursor_activo is self.__cursor: return
+        try:
+            if self.__cursor_activo.with_rows: self.__cursor_activo.fetchall()
+        except errorConector():
+            pass
+        self.__cursor_activo = self.__cursor
+
+    def __ejecutar(self, sql : str, parametros : Opcional[tuple[Any]]) -> None:
+        self.__drenarCursorActivo()
+        if self.__preparadas and parametros:
+            cursor = self.__cachePreparadas().obtener(sql)
+            cursor.execute(sql, parametros)
+            self.__cursor_activo = cursor
+            if cursor.with_rows: return
+        else:
+            self.__cursor.execute(sql, parametros)
+        if self.__autoconfirmar and not self.__transacciones: self.__conexion.commit()
+
+    def confirmar(self) -> Self:
+        """Confirma (COMMIT) lo ejecutado desde la última confirmación. No puede usarse dentro de `transaccion()`."""
+        if self.__transacciones: raise ErrorBDD("No se puede confirmar manualmente dentro de una transacción.")
+        if self.__conexion:
+            self.__drenarCursorActivo()
+            self.__conexion.commit()
+            self.__cerrarPendientes(confirmadas=True)
+        return self
+
+    def revertir(self) -> Self:
+        """Revierte (ROLLBACK) lo ejecutado desde la última confirmación. No puede usarse dentro de `transaccion()`."""
+        if self.__transacciones: raise ErrorBDD("No se puede revertir manualmente dentro de una transacción.")
+        if self.__conexion:
+            self.__drenarCursorActivo()
+            self.__conexion.rollback()
+            self.__cerrarPendientes(confirmadas=False)
+        return self
+
+    @property
+    def enTransaccion(self) -> bool:
+        return self.__transacciones > 0
+
+    @contextmanager
+    def transaccion(self) -> Iterador[Self]:
+        """
+        Agrupa varias sentencias en una única transacción: mientras dura el bloque `ejecutar` no
+        confirma cada sentencia, y al salir se confirma todo junto (o se revierte si hubo una excepción).
+        La conexión se mantiene tomada durante todo el bloque, así que `Registro.guardar()` sobre esta
+        misma `bdd` participa de la transacción.
+
+        Los bloques anidados usan SAVEPOINT: una excepción en un bloque interno revierte sólo ese bloque.
+
+        > with bdd.transaccion():
+        >     disco.guardar()
+        >     with bdd.transaccion():
+        >         autor.guardar()
+        """
+        with self:
+            self.__drenarCursorActivo()
+            nivel : int = self.__transacciones
+            punto : str = f"bdd_punto_{nivel}"
+            if nivel: self.__cursor.execute(f"SAVEPOINT {punto}")
+            self.__transacciones += 1
+            try:
+                yield self
+            except BaseException:
+                self.__transacciones -= 1
+                self.__drenarCursorActivo()
+                if nivel: self.__cursor.execute(f"ROLLBACK TO SAVEPOINT {punto}")
+                else:
+                    self.__conexion.rollback()
+                    self.__cerrarPendientes(confirmadas=False)
+                raise
+            self.__transacciones -= 1
+            self.__drenarCursorActivo()
+            if nivel: self.__cursor.execute(f"RELEASE SAVEPOINT {punto}")
+            else:
+                self.__conexion.commit()
+                self.__cerrarPendientes(confirmadas=True)
+
+    def estadisticasPreparadas(self) -> dict[str, int]:
+        """Aciertos, fallos y desalojos del caché de sentencias preparadas de la conexión actual."""
+        if not self.__preparadas or self.__conexion is None:
+            return {"aciertos" : 0, "fallos" : 0, "desalojos" : 0, "preparadas" : 0, "capacidad" : self.__preparadas}
+        return self.__cachePreparadas().estadisticas()
    
 
-    def ejecutar(self, consulta : str | Consulta) -> Opcional[list[Resultado]] :
-        if type(consulta) == Consulta:
-            consulta = str(consulta)
+    @staticmethod
+    def compilar(consulta : str | Consulta | tuple[str, tuple[Any]]) -> tuple[str, Opcional[tuple[Any]]]:
+        """
+        Normaliza lo que recibe `ejecutar` a un par `(sql, parametros)`.
+        Acepta un string SQL, una `Consulta` o un par ya compilado (p. ej. de `PlantillaConsulta.vincular`).
+        """
+        if isinstance(consulta, Consulta):
+            return consulta.compilar()
+        if isinstance(consulta, tuple):
+            sql, parametros = consulta
+            return sql, tuple(parametros) if parametros else None
+        return consulta, None
+
+    def ejecutar(self, consulta : str | Consulta | tuple[str, tuple[Any]], ttl_cache : Opcional[float] = None) -> Self:
+        """
+        Ejecuta una consulta; sus filas se leen luego con `devolverResultados` / `devolverUnResultado`.
+
+        Con un `CacheResultados`, los SELECT se responden desde el caché cuando es posible y las
+        escrituras invalidan las entradas de las tablas que tocan. Dentro de una transacción (o con
+        `autoconfirmar=False`) las lecturas de tablas con escrituras sin confirmar no usan el caché.
+        Del mismo modo, las escrituras expiran del `MapaIdentidad` activo los registros que pudieron cambiar.
+
+        :arg ttl_cache Opcional[float]: segundos de validez de este resultado en el caché (reemplaza
+            al `ttl` del caché); 0 no lo cachea.
+        """
+        sql, parametros = self.compilar(consulta)
+        instrumentacion : Opcional[Instrumentacion] = Instrumentacion.actual()
+        if instrumentacion is None:
+            self.__ejecutarConsulta(consulta, sql, parametros, ttl_cache)
+            _expirarRegistros(consulta, sql)
+            return self
+
+        instrumentacion.iniciar(sql, parametros)
+        inicio : float = perf_counter()
         try:
-            self.__cursor.execute(consulta)
-            self.__conexion.commit()
+            self.__ejecutarConsulta(consulta, sql, parametros, ttl_cache)
+        except BaseException as error:
+            instrumentacion.ejecutado(perf_counter() - inicio, error=error)
+            raise
+        instrumentacion.ejecutado(perf_counter() - inicio, -1 if self.__filas_cache is not None else self.__cursor_activo.rowcount)
+        _expirarRegistros(consulta, sql)
+        return self
+
+    def __ejecutarConsulta(self, consulta : str | Consulta | tuple[str, tuple[Any]], sql : str, parametros : Opcional[tuple[Any]], ttl_cache : Opcional[float]) -> Self:
+        self.__filas_cache = None
+        if self.__cache is None:
+            return self.__ejecutarConReintento(sql, parametros)
+
+        lectura, tablas = self.__cache.analizar(consulta, sql)
+        if not lectura:
+            self.__ejecutarConReintento(sql, parametros)
+            self.__registrarEscritura(tablas)
+            return self
+        if not tablas or ttl_cache == 0 or self.__tienePendientes(tablas):
+            return self.__ejecutarConReintento(sql, parametros)
+
+        clave : tuple[str, Any] = (sql, parametros)
+        filas : Opcional[tuple[Resultado]] = self.__cache.obtener(clave)
+        if filas is None:
+            generacion : int = self.__cache.generacion()
+            self.__ejecutarConReintento(sql, parametros)
+            filas = self.__cursor_activo.fetchall()
+            self.__cache.guardar(clave, filas, tablas, ttl_cache, generacion)
+        self.__filas_cache = deque(filas)
+        return self
+
+    def __registrarEscritura(self, tablas : Opcional[frozenset[str]]) -> None:
+        self.__cache.invalidar(tablas)
+        if self.__autoconfirmar and not self.__transacciones: return
+        # Sin confirmar, otras conexiones aún pueden leer (y cachear) los valores anteriores:
+        # se vuelve a invalidar al confirmar.
+        if tablas is None or self.__tablas_pendientes is None: self.__tablas_pendientes = None
+        else: self.__tablas_pendientes |= tablas
+
+    def __tienePendientes(self, tablas : frozenset[str]) -> bool:
+        return self.__tablas_pendientes is None or not self.__tablas_pendientes.isdisjoint(tablas)
+
+    def __cerrarPendientes(self, confirmadas : bool) -> None:
+        if confirmadas and self.__cache is not None and self.__tablas_pendientes != set():
+            self.__cache.invalidar(self.__tablas_pendientes)
+        self.__tablas_pendientes = set()
+
+    def lote(self, consultas : Iterable[str | Consulta | tuple[str, tuple[Any]]]) -> list[ResultadoLote]:
+        """
+        Envía varias sentencias juntas, en un único viaje al servidor (multi-statement), y devuelve un
+        `ResultadoLote` por sentencia, en el mismo orden. Cada consulta debe ser una sola sentencia.
+        Conviene para las consultas independientes de una misma petición, que con `ejecutar` pagan
+        un viaje cada una.
+
+        MySQL ejecuta las sentencias en orden y se detiene en la primera que falla: esa recibe el
+        error en su `ResultadoLote` y las siguientes quedan sin ejecutar; no se levanta ninguna
+        excepción. Las escrituras invalidan el caché de resultados y expiran los registros del `MapaIdentidad`
+        activo, pero las lecturas no usan el caché.
+        Fuera de un bloque `with`, toma una conexión sólo para el lote. No admite `CALL`.
+
+        > with bdd:
+        >     discos, artistas = bdd.lote([
+        >         Consulta().Select('Discos', Discos.columnasSeleccionadas()).Where(id=2),
+        >         Consulta().Select('Artistas', ['id', 'nombre']).Where(TipoCondicion.EN, id=[1, 2]),
+        >     ])
+        > disco = Discos(bdd, discos.devolverResultados()[0])
+        """
+        consultas = list(consultas)
+        resultados : list[ResultadoLote] = [ResultadoLote() for _ in consultas]
+        if not consultas: return resultados
+        if self.__conexion is None:
+            # Fuera de un bloque `with`, el lote abre (y libera) su propia conexión.
+            with self: return self.lote(consultas)
+
+        compiladas : list[tuple[str, Opcional[tuple[Any]]]] = [self.compilar(consulta) for consulta in consultas]
+        parametrizada : bool = any(parametros for _, parametros in compiladas)
+        partes : list[str] = []
+        valores : list[Any] = []
+        for sql, parametros in compiladas:
+            # Un procedimiento devuelve varios conjuntos de resultados y correría la sentencia que corresponde a cada uno.
+            if self.__LLAMADA.match(sql): raise ErrorMalaSolicitud(f"Un lote no admite llamadas a procedimientos: {sql.strip()}")
+            sql = sql.strip().rstrip(';').rstrip()
+            # Al unir las sentencias, los `%` literales de las que no llevan parámetros deben escaparse.
+            if parametros: valores.extend(parametros)
+            elif parametrizada: sql = sql.replace('%', '%%')
+            partes.append(sql)
+        sql : str = ';\n'.join(partes) + ';'
+        parametros : Opcional[tuple[Any]] = tuple(valores) if parametrizada else None
+
+        self.__drenarCursorActivo()
+        cursor = self.__conexion.cursor(buffered=True, **self.__config.OPCION_CURSOR)
+        instrumentacion : Opcional[Instrumentacion] = Instrumentacion.actual()
+        if instrumentacion is not None: instrumentacion.iniciar(sql, parametros)
+        inicio : float = perf_counter()
+        conjuntos : Iterador[Any] = self.__conjuntosResultados(cursor, sql, parametros)
+        try:
+            for indice, resultado in enumerate(resultados):
+                # Cada paso trae del servidor el conjunto de la sentencia `indice`: un error acá es de esa sentencia.
+                try:
+                    conjunto : Any = next(conjuntos, None)
+                except Exception as error:
+                    resultado.error = error
+                    break
+                if conjunto is None: break
+                resultado.ejecutada = True
+                try:
+                    resultado.filas = (conjunto.fetchall() or None) if conjunto.with_rows else None
+                    resultado.filas_afectadas = conjunto.rowcount
+                    resultado.id_ultima_insercion = conjunto.lastrowid
+                except Exception as error:
+                    resultado.error = error
+            # El conector no admite otra consulta mientras queden conjuntos sin recorrer.
+            for _ in conjuntos: pass
+        finally:
+            cursor.close()
+        if instrumentacion is not None:
+            instrumentacion.ejecutado(perf_counter() - inicio, sum(max(resultado.filas_afectadas, 0) for resultado in resultados))
+            instrumentacion.leido(0.0, sum(len(resultado.filas or ()) for resultado in resultados))
+
+        for consulta, (sql, _), resultado in zip(consultas, compiladas, resultados):
+            if not resultado.ejecutada: break
+            _expirarRegistros(consulta, sql)
+            if self.__cache is None: continue
+            lectura, tablas = self.__cache.analizar(consulta, sql)
+            if not lectura: self.__registrarEscritura(tablas)
+        if self.__autoconfirmar and not self.__transacciones: self.__conexion.commit()
+        return resultados
+
+    @staticmethod
+    def __conjuntosResultados(cursor, sql : str, parametros : Opcional[tuple[Any]]) -> Iterador[Any]:
+        # Un conjunto de resultados por sentencia. Los conectores recientes los recorren con nextset();
+        # los anteriores, con execute(multi=True), que devuelve un cursor por sentencia.
+        if not hasattr(cursor, 'nextset'):
+            yield from cursor.execute(sql, parametros, multi=True)
+            return
+        cursor.execute(sql, parametros)
+        yield cursor
+        while True:
+            try:
+                if not cursor.nextset(): return
+            except errorConector() as error:
+                # Algunas versiones informan así que la siguiente sentencia no devuelve filas (INSERT, UPDATE...).
+                if getattr(error, 'errno', None) != CR_NO_RESULT_SET: raise
+            yield cursor
+
+    def sesion(self) -> 'BaseDeDatos_MySQL':
+        """
+        Nueva instancia con la misma configuración, pool, caché y opciones, pero con su propia conexión
+        y su propio cursor. Una instancia no debe usarse desde varios hilos a la vez: cada hilo (o cada
+        préstamo) trabaja con su sesión.
+
+        > def tarea(bdd):
+        >     with bdd.sesion() as sesion:
+        >         return sesion.ejecutar(consulta).devolverResultados()
+        """
+        return BaseDeDatos_MySQL(self.__config, pool=self.__pool, preparadas=self.__preparadas, autoconfirmar=self.__autoconfirmar, cache=self.__cache)
+
+    def ejecutarEnParalelo(self, consultas : Iterable[str | Consulta | tuple[str, tuple[Any]]], max_hilos : Opcional[int] = None) -> list[ResultadoLote]:
+        """
+        Ejecuta consultas independientes a la vez, cada una en un hilo y con su propia `sesion()`, y
+        devuelve un `ResultadoLote` por consulta, en el mismo orden: la demora total es la de la consulta
+        más lenta y no la suma de todas. Un error queda en el `ResultadoLote` de su consulta y no
+        interrumpe a las demás.
+
+        Cada consulta toma su propia conexión (del pool, si hay uno), así que no ve lo que esta instancia
+        aún no confirmó; no debe usarse para sentencias que dependan entre sí.
+
+        :arg max_hilos Opcional[int]: hilos (y conexiones) simultáneos; por defecto, el máximo del pool
+            o 8 sin pool. Con más hilos que conexiones en el pool, los que sobran esperan una libre.
+        """
+        # concurrent.futures se importa recién aquí, como el conector.
+        from concurrent.futures import ThreadPoolExecutor
+
+        consultas = list(consultas)
+        if not consultas: return []
+        if max_hilos is None: max_hilos = self.__pool.maximo if self.__pool else 8
+        if max_hilos < 1: raise ValueError(f"La cantidad de hilos debe ser positiva: {max_hilos}.")
+
+        def ejecutar(consulta : str | Consulta | tuple[str, tuple[Any]]) -> ResultadoLote:
+            resultado : ResultadoLote = ResultadoLote()
+            try:
+                with self.sesion() as sesion:
+                    sesion.ejecutar(consulta)
+                    resultado.ejecutada = True
+                    resultado.filas_afectadas = sesion.devolverFilasAfectadas()
+                    resultado.id_ultima_insercion = sesion.devolverIdUltimaInsercion()
+                    resultado.filas = sesion.devolverResultados()
+            except Exception as error:
+                resultado.error = error
+            return resultado
+
+        if len(consultas) == 1: return [ejecutar(consultas[0])]
+        with ThreadPoolExecutor(max_workers=min(max_hilos, len(consultas)), thread_name_prefix='bdd') as ejecutor:
+            return list(ejecutor.map(ejecutar, consultas))
+
+    def estadisticasCache(self) -> dict[str, int]:
+        """Aciertos, fallos, desalojos, vencimientos e invalidaciones del caché de resultados."""
+        if self.__cache is None: return {}
+        return self.__cache.estadisticas()
+
+    def __ejecutarConReintento(self, sql : str, parametros : Opcional[tuple[Any]]) -> Self:
+        # Los reintentos usan esta misma instancia (y su pool); dentro de una transacción no se reintenta,
+        # porque una conexión nueva habría perdido lo ejecutado hasta ahí.
+        try:
+            self.__ejecutar(sql, parametros)
         except ErrorBDD as e:
             ###print(f"[ERROR] {e}")
+            if self.__transacciones: raise
             self.reconectar()
-            self.__cursor.execute(consulta)
-            self.__conexion.commit()
+            self.__ejecutar(sql, parametros)
         except AttributeError as e:
             ###print(f"[ERROR] {e}")
-            self = BaseDeDatos_MySQL()
+            # Sin conexión abierta: se toma una y se reintenta.
+            if self.__conexion is not None: raise
             self.conectar()
-            self.__cursor.execute(consulta)
-            self.__conexion.commit()
+            self.__ejecutar(sql, parametros)
         except Exception as f:
-            raise type(f)(f"No se pudo completar la consulta.\n Es probable que la consulta incluya carácteres prohibidos. \n {consulta.encode('utf-8').decode('unicode_escape')}\n") from f
+            raise type(f)(f"No se pudo completar la consulta.\n Es probable que la consulta incluya carácteres prohibidos. \n {sql}\n Parámetros: {parametros}\n") from f
         return self
    
     def devolverResultados(self, cantidad : Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
-        resultados = self.__cursor.fetchall()
+        if cantidad is not None and cantidad < 0: raise IndexError("Se solicitó una cantidad negativa de resultados, lo cual es un sinsentido.")
+        if cantidad == 0: return []
+        instrumentacion : Opcional[Instrumentacion] = Instrumentacion.actual()
+        if instrumentacion is None:
+            return self.__devolverResultados(cantidad)
+        inicio : float = perf_counter()
+        resultados : Opcional[list[Resultado]] = self.__devolverResultados(cantidad)
+        instrumentacion.leido(perf_counter() - inicio, len(resultados) if resultados else 0)
+        return resultados
+
+    def __devolverResultados(self, cantidad : Optional[int]) -> Optional[List[Dict[str, Any]]]:
+        if self.__filas_cache is not None:
+            # Copias: las filas en caché se comparten entre consultas.
+            filas : deque = self.__filas_cache
+            return [dict(filas.popleft()) for _ in range(len(filas) if cantidad is None else min(cantidad, len(filas)))] or None
+        resultados = self.__cursor_activo.fetchall() if cantidad is None else self.__cursor_activo.fetchmany(cantidad)
         
         if not resultados: return None
-        elif cantidad is None: return resultados
-        elif cantidad == 0: return []
-        elif cantidad > 0: return resultados[0:cantidad-1]
-        else: raise IndexError("Se solicitó una cantidad negativa de resultados, lo cual es un sinsentido.")
+        return resultados
+
+    def iterarResultados(self, consulta : str | Consulta | tuple[str, tuple[Any]], tamano_lote : int = 1000, cantidad : Opcional[int] = None) -> Iterador[Resultado]:
+        """
+        Ejecuta una consulta y devuelve sus filas de a una, trayéndolas del servidor de a `tamano_lote`
+        con un cursor sin buffer: el conjunto de resultados nunca se materializa completo en memoria.
+        Si se indica `cantidad`, la consulta se limita con un LIMIT (ver `limitarSQL`) en lugar de recortar en Python.
+
+        Debe consumirse dentro del bloque `with bdd:` que mantiene la conexión; mientras se itera no
+        pueden ejecutarse otras consultas en la misma conexión.
+
+        > with bdd:
+        >     for fila in bdd.iterarResultados(Consulta().Select('Discos', ['id', 'nombre']), tamano_lote=5000):
+        >         ...
+        """
+        if tamano_lote < 1: raise ValueError(f"El tamaño de lote debe ser positivo: {tamano_lote}.")
+        sql, parametros = self.compilar(consulta)
+        if cantidad is not None:
+            sql, parametros = limitarSQL(sql, parametros, cantidad)
+
+        self.__drenarCursorActivo()
+        cursor = self.__conexion.cursor(buffered=False, **self.__config.OPCION_CURSOR)
+        instrumentacion : Opcional[Instrumentacion] = Instrumentacion.actual()
+        try:
+            if instrumentacion is None:
+                cursor.execute(sql, parametros)
+                while filas := cursor.fetchmany(tamano_lote):
+                    yield from filas
+                return
+            instrumentacion.iniciar(sql, parametros)
+            inicio : float = perf_counter()
+            cursor.execute(sql, parametros)
+            instrumentacion.ejecutado(perf_counter() - inicio)
+            while True:
+                inicio = perf_counter()
+                filas = cursor.fetchmany(tamano_lote)
+                instrumentacion.leido(perf_counter() - inicio, len(filas))
+                if not filas: break
+                yield from filas
+        finally:
+            # Si se abandonó la iteración, las filas pendientes deben leerse (de a lotes) antes de cerrar el cursor.
+            try:
+                while cursor.fetchmany(tamano_lote): pass
+            except errorConector():
+                pass
+            cursor.close()
+    def devolverColumnas(self, consulta : str | Consulta | tuple[str, tuple[Any]], tamano_lote : int = 10000, codificar_cadenas : bool = False, tipos : Opcional[dict[str, str]] = None) -> dict[str, Any]:
+        """
+        Ejecuta una consulta y devuelve sus resultados por columna, como arreglos de NumPy (ver
+        `ConstructorColumnas`): las filas se traen de a `tamano_lote` con un cursor sin buffer y se
+        vuelcan en los arreglos sin pasar por un diccionario por fila. No usa el caché de resultados.
+
+        > with bdd:
+        >     columnas = bdd.devolverColumnas("SELECT fecha, monto, moneda FROM Ventas;", codificar_cadenas=True)
+        > columnas['monto'].sum()
+
+        :arg codificar_cadenas bool: devolver las columnas de texto como `ColumnaDiccionario`.
+        :arg tipos Opcional[dict[str, str]]: tipo SQL de algunas columnas, en lugar del que informa el
+            servidor (p. ej. `{'activo' : 'tinyint(1)'}` para leerla como bool).
+        """
+        if tamano_lote < 1: raise ValueError(f"El tamaño de lote debe ser positivo: {tamano_lote}.")
+        constructor : ConstructorColumnas = ConstructorColumnas(codificar_cadenas, tipos)
+        sql, parametros = self.compilar(consulta)
+
+        self.__drenarCursorActivo()
+        cursor = self.__conexion.cursor(buffered=False)
+        instrumentacion : Opcional[Instrumentacion] = Instrumentacion.actual()
+        try:
+            if instrumentacion is None:
+                cursor.execute(sql, parametros)
+                constructor.describir(cursor.description)
+                while filas := cursor.fetchmany(tamano_lote):
+                    constructor.agregar(filas)
+                return constructor.columnas()
+            instrumentacion.iniciar(sql, parametros)
+            inicio : float = perf_counter()
+            cursor.execute(sql, parametros)
+            instrumentacion.ejecutado(perf_counter() - inicio)
+            constructor.describir(cursor.description)
+            while True:
+                inicio = perf_counter()
+                filas = cursor.fetchmany(tamano_lote)
+                instrumentacion.leido(perf_counter() - inicio, len(filas))
+                if not filas: break
+                inicio = perf_counter()
+                constructor.agregar(filas)
+                instrumentacion.hidratado(perf_counter() - inicio)
+            inicio = perf_counter()
+            columnas : dict[str, Any] = constructor.columnas()
+            instrumentacion.hidratado(perf_counter() - inicio)
+            return columnas
+        finally:
+            # Ante un error a mitad de la lectura, las filas pendientes deben leerse antes de cerrar el cursor.
+            try:
+                while cursor.fetchmany(tamano_lote): pass
+            except errorConector():
+                pass
+            cursor.close()
+
+    def devolverIdUltimaInsercion(self) -> Opcional[int]:
+        """
+        Devuelve el id autonumérico generado por el último INSERT. En un INSERT de varias filas es el
+        id de la primera fila; el resto son consecutivos (de a `incrementoAutonumerico()`) sólo si
+        `idsConsecutivos()`.
+        """
+        return self.__cursor_activo.lastrowid
+
+    def devolverFilasAfectadas(self) -> int:
+        return self.__cursor_activo.rowcount
+
+    def maximoPaquete(self) -> int:
+        """Tamaño máximo en bytes de una sentencia (`max_allowed_packet`), consultado una vez por instancia."""
+        return self.__variablesServidor()["maximo_paquete"]
+
+    def incrementoAutonumerico(self) -> int:
+        """Paso entre ids autonuméricos consecutivos (`auto_increment_increment`)."""
+        return self.__variablesServidor()["incremento"]
+
+    def idsConsecutivos(self) -> bool:
+        """
+        Si las filas de un INSERT de varias filas reciben ids consecutivos. InnoDB no lo garantiza con
+        `innodb_autoinc_lock_mode = 2` (el modo por defecto desde MySQL 8.0) si hay inserciones concurrentes.
+        """
+        return bool(self.__variablesServidor()["ids_consecutivos"])
+
+    def maximoParametros(self) -> int:
+        """Cantidad máxima de marcadores en una sentencia preparada (fija en el protocolo de MySQL)."""
+        return 65535
+
+    def admiteAliasFila(self) -> bool:
+        """Si el servidor admite `INSERT ... VALUES (...) AS alias` (MySQL 8.0.19 o posterior)."""
+        return bool(self.__variablesServidor()["alias_fila"])
+
+    def __variablesServidor(self) -> dict[str, int]:
+        if self.__variables is None:
+            self.ejecutar("SELECT @@max_allowed_packet AS maximo_paquete, @@auto_increment_increment AS incremento, @@innodb_autoinc_lock_mode AS modo_autonumerico, @@version AS version;")
+            fila : Resultado = self.devolverUnResultado()
+            version : Any = fila["version"]
+            if isinstance(version, (bytes, bytearray)): version = version.decode()
+            self.__variables = {"maximo_paquete" : int(fila["maximo_paquete"]), "incremento" : int(fila["incremento"]), "ids_consecutivos" : int(int(fila["modo_autonumerico"]) != 2), "alias_fila" : int(_versionAdmiteAliasFila(version))}
+        return self.__variables
+
     def devolverUnResultado(self) -> Optional[Dict[str, Any]]:
         """
         Devuelve el primer resultado de la última consulta.
         """
-        return self.__cursor.fetchone()
+        instrumentacion : Opcional[Instrumentacion] = Instrumentacion.actual()
+        if instrumentacion is None:
+            return self.__devolverUnResultado()
+        inicio : float = perf_counter()
+        resultado : Opcional[Resultado] = self.__devolverUnResultado()
+        instrumentacion.leido(perf_counter() - inicio, 0 if resultado is None else 1)
+        return resultado
+
+    def __devolverUnResultado(self) -> Optional[Dict[str, Any]]:
+        if self.__filas_cache is not None:
+            return dict(self.__filas_cache.popleft()) if self.__filas_cache else None
+        return self.__cursor_activo.fetchone()
         
     # Estados
     def estaConectado (self):
@@ -359,13 +1682,16 @@ class BaseDeDatos_MySQL():
 
 
   # with BaseDeDatos() as bdd
+    # Los bloques pueden anidarse: la conexión se libera (o vuelve al pool) al salir del bloque más externo.
     def __enter__(self) -> 'BaseDeDatos_MySQL':
-        if self.__conexion is None:
-            return self.conectar()
+        # La profundidad sube recién con la conexión abierta: si `conectar` falla, no hay bloque que cerrar.
+        if self.__conexion is None: self.conectar()
+        self.__profundidad += 1
         # ###print(f"[DEBUG] Entrando {self.__cursor=}{self.__conexion=}{self.__pool=}")
         return self
 
     def __exit__(self, exc_type,excl_val,exc_tb) -> None:
         # ###print(f"[DEBUG] Saliendo {self.__cursor=}{self.__conexion=}{self.__pool=}")
-        self.desconectar()
+        self.__profundidad = max(self.__profundidad - 1, 0)
+        if not self.__profundidad: self.desconectar()
 
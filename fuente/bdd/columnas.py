@@ -0,0 +1,284 @@
+"""
+Lectura columnar de resultados (`devolverColumnas`): las filas se leen del cursor de a lotes y se vuelcan
+en un arreglo de NumPy por columna, sin armar un diccionario por fila. El tipo de cada arreglo sale del
+tipo SQL de la columna, con la misma tabla (`TIPOS_SQL`) que usa `Tabla` para anotar los modelos.
+
+NumPy es opcional: se importa recién al leer columnas.
+"""
+from bdd.tipos import *
+from bdd.utiles import tipoPythonSQL
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("La lectura columnar requiere el paquete 'numpy' (pip install bdd[columnas]).") from e
+    return numpy
+
+
+# Códigos de tipo de `cursor.description` en mysql.connector (`FieldType`) y el tipo SQL que les
+# corresponde; se listan acá para no importar el conector.
+TIPOS_CAMPO_MYSQL : dict[int, str] = \
+{
+    0 : 'decimal',
+    1 : 'tinyint',
+    2 : 'smallint',
+    3 : 'int',
+    4 : 'float',
+    5 : 'double',
+    7 : 'timestamp',
+    8 : 'bigint',
+    9 : 'mediumint',
+    10 : 'date',
+    11 : 'time',
+    12 : 'datetime',
+    13 : 'smallint',    # YEAR
+    14 : 'date',        # NEWDATE
+    15 : 'varchar',
+    16 : 'bigint',      # BIT
+    245 : 'json',
+    246 : 'decimal',    # NEWDECIMAL
+    247 : 'enum',
+    248 : 'varchar',    # SET
+    249 : 'tinytext',
+    250 : 'mediumtext',
+    251 : 'longtext',
+    252 : 'text',
+    253 : 'varchar',    # VAR_STRING
+    254 : 'char',       # STRING
+    255 : 'blob',       # GEOMETRY
+}
+
+# Banderas de `cursor.description` (`FieldFlag`): el servidor informa BLOB / VARBINARY con los mismos
+# códigos que TEXT / VARCHAR, y los ENUM como cadenas.
+_BANDERA_BINARIO : int = 128
+_BANDERA_ENUM : int = 256
+_BINARIOS : dict[str, str] = \
+{
+    'char' : 'binary',
+    'varchar' : 'varbinary',
+    'tinytext' : 'tinyblob',
+    'text' : 'blob',
+    'mediumtext' : 'mediumblob',
+    'longtext' : 'longblob',
+}
+
+# Tipo de NumPy de cada tipo de Python; los que no figuran (str, bytes, dict) van en arreglos de objetos.
+_DTYPES : dict[type, str] = \
+{
+    bool : 'bool',
+    int : 'int64',
+    float : 'float64',
+    Decimal : 'float64',
+    datetime : 'datetime64[us]',
+    date : 'datetime64[D]',
+    time : 'timedelta64[us]',
+}
+
+
+def tipoCampo(campo : tuple) -> Optional[str]:
+    """Tipo SQL de una columna de `cursor.description`; `None` si el cursor no lo informa (p. ej. sqlite3)."""
+    codigo : Any = campo[1] if len(campo) > 1 else None
+    tipo_sql : Optional[str] = TIPOS_CAMPO_MYSQL.get(codigo) if isinstance(codigo, int) else None
+    banderas : Any = campo[7] if len(campo) > 7 else 0
+    if tipo_sql is None or not isinstance(banderas, int):
+        return tipo_sql
+    if tipo_sql in _BINARIOS and banderas & _BANDERA_BINARIO:
+        return _BINARIOS[tipo_sql]
+    if tipo_sql in ('char', 'varchar') and banderas & _BANDERA_ENUM:
+        return 'enum'
+    return tipo_sql
+
+
+def _tipoValor(valor : Any) -> Optional[type]:
+    # Tipo deducido del primer valor no nulo, cuando el cursor no informa el tipo de la columna.
+    for tipo in (bool, int, float, Decimal, datetime, date, time, str):
+        if isinstance(valor, tipo):
+            return tipo
+    if isinstance(valor, timedelta):
+        return time
+    return None
+
+
+def _duracion(valor : Any) -> Any:
+    # mysql.connector devuelve TIME como timedelta; un `time` se lleva a la duración desde la medianoche.
+    if isinstance(valor, time):
+        return timedelta(hours=valor.hour, minutes=valor.minute, seconds=valor.second, microseconds=valor.microsecond)
+    return valor
+
+
+class ColumnaDiccionario():
+    '''
+        Columna de texto codificada como diccionario: `codigos` (int32) indexa `categorias`, un arreglo
+        de objetos con cada valor distinto en orden de aparición; los NULL tienen código -1. Ocupa un
+        entero por fila y permite agrupar y comparar sobre los códigos.
+
+        METODOS PUBLICOS
+        - mascara -> ndarray  (propiedad)
+        - valores() -> MaskedArray
+    '''
+
+    __slots__ = ('codigos', 'categorias')
+
+    def __init__(self, codigos : Any, categorias : Any) -> None:
+        self.codigos = codigos
+        self.categorias = categorias
+
+    def __len__(self) -> int:
+        return len(self.codigos)
+
+    @property
+    def mascara(self) -> Any:
+        return self.codigos < 0
+
+    def valores(self) -> Any:
+        """La columna decodificada, como arreglo de objetos con los NULL enmascarados."""
+        numpy = _numpy()
+        mascara = self.mascara
+        if len(self.categorias):
+            datos = self.categorias[numpy.where(mascara, 0, self.codigos)]
+        else:
+            datos = numpy.full(len(self.codigos), None, dtype=object)
+        return numpy.ma.MaskedArray(datos, mask=mascara)
+
+    def __repr__(self) -> str:
+        return f"ColumnaDiccionario({len(self.codigos)} filas, {len(self.categorias)} categorías)"
+
+
+class _Columna():
+    __slots__ = ('tipo', 'codificar', 'datos', 'mascaras', 'indice', 'pendientes')
+
+    def __init__(self, tipo : Optional[type], codificar : Optional[bool]) -> None:
+        self.tipo = tipo
+        self.codificar = codificar
+        self.datos : list[Any] = []
+        self.mascaras : list[Any] = []
+        self.indice : dict[Any, int] = {}
+        # Valores leídos mientras el tipo no se conoce (columna sin tipo y sólo con NULL hasta ahora).
+        self.pendientes : list[Any] = []
+
+    def agregar(self, numpy : Any, valores : tuple) -> None:
+        if self.tipo is None:
+            self.pendientes.extend(valores)
+            for valor in valores:
+                if valor is not None:
+                    self.tipo = _tipoValor(valor) or object
+                    break
+            else:
+                return
+            # `codificar` en None: codificar sólo si la columna resultó ser de texto.
+            if self.codificar is None: self.codificar = self.tipo is str
+            valores, self.pendientes = self.pendientes, []
+
+        cantidad : int = len(valores)
+        if self.codificar:
+            indice : dict[Any, int] = self.indice
+            self.datos.append(numpy.fromiter((-1 if valor is None else indice.setdefault(valor, len(indice)) for valor in valores), numpy.int32, count=cantidad))
+            return
+
+        self.mascaras.append(numpy.fromiter((valor is None for valor in valores), numpy.bool_, count=cantidad))
+        dtype : Optional[str] = _DTYPES.get(self.tipo)
+        if dtype is None:
+            self.datos.append(numpy.fromiter(valores, object, count=cantidad))
+        elif self.tipo is time:
+            self.datos.append(numpy.array([_duracion(valor) for valor in valores], dtype=dtype))
+        elif self.tipo in (datetime, date):
+            # None se convierte en NaT.
+            self.datos.append(numpy.array(valores, dtype=dtype))
+        else:
+            self.datos.append(numpy.fromiter((0 if valor is None else valor for valor in valores), dtype, count=cantidad))
+
+    def resultado(self, numpy : Any) -> Any:
+        if self.pendientes:
+            # Sólo hubo NULL: no hay de dónde deducir el tipo.
+            self.tipo = object
+            self.codificar = bool(self.codificar)
+            valores, self.pendientes = self.pendientes, []
+            self.agregar(numpy, valores)
+
+        if self.codificar:
+            codigos = numpy.concatenate(self.datos) if self.datos else numpy.empty(0, numpy.int32)
+            categorias = numpy.empty(len(self.indice), dtype=object)
+            categorias[:] = list(self.indice)
+            return ColumnaDiccionario(codigos, categorias)
+
+        dtype : Any = _DTYPES.get(self.tipo, object)
+        datos = numpy.concatenate(self.datos) if self.datos else numpy.empty(0, dtype)
+        mascara = numpy.concatenate(self.mascaras) if self.mascaras else numpy.empty(0, numpy.bool_)
+        return numpy.ma.MaskedArray(datos, mask=mascara)
+
+
+class ConstructorColumnas():
+    '''
+        Arma el resultado columnar de una consulta a partir de los lotes de filas (tuplas) de un cursor.
+        Cada columna es un `numpy.ma.MaskedArray` con los NULL enmascarados:
+        - enteros -> int64, DECIMAL / FLOAT / DOUBLE -> float64, BOOL / TINYINT(1) -> bool;
+        - DATETIME / TIMESTAMP -> datetime64[us], DATE -> datetime64[D], TIME -> timedelta64[us];
+        - textos, binarios y JSON -> arreglo de objetos.
+        Los ENUM (y los textos, con `codificar_cadenas`) se devuelven como `ColumnaDiccionario`.
+
+        El tipo de cada columna se toma de `tipos` (nombre -> tipo SQL), del tipo que informa el cursor o,
+        si no lo informa, del primer valor no nulo.
+
+        > constructor = ConstructorColumnas(codificar_cadenas=True)
+        > cursor.execute(sql)
+        > constructor.describir(cursor.description)
+        > while filas := cursor.fetchmany(10000):
+        >     constructor.agregar(filas)
+        > columnas = constructor.columnas()
+
+        METODOS PUBLICOS
+        - describir(descripcion) -> None
+        - agregar(filas) -> None
+        - columnas() -> dict[str, MaskedArray | ColumnaDiccionario]
+
+        CASOS DE ERROR
+        - ImportError: si NumPy no está instalado.
+    '''
+
+    __slots__ = \
+    (
+        '__numpy',
+        '__codificar_cadenas',
+        '__tipos',
+        '__nombres',
+        '__columnas',
+    )
+
+    def __init__(self, codificar_cadenas : bool = False, tipos : Optional[dict[str, str]] = None) -> None:
+        """
+        :arg codificar_cadenas bool: devolver las columnas de texto como `ColumnaDiccionario`.
+        :arg tipos Optional[dict[str, str]]: tipo SQL de algunas columnas (p. ej. `{'activo' : 'tinyint(1)'}`),
+            en lugar del que informa el cursor.
+        """
+        self.__numpy = _numpy()
+        self.__codificar_cadenas = codificar_cadenas
+        self.__tipos : dict[str, str] = tipos or {}
+        self.__nombres : list[str] = []
+        self.__columnas : list[_Columna] = []
+
+    def describir(self, descripcion : Iterable[tuple]) -> None:
+        """Prepara una columna por cada campo de `cursor.description`."""
+        self.__nombres = []
+        self.__columnas = []
+        for campo in descripcion:
+            nombre : str = campo[0]
+            tipo_sql : Optional[str] = self.__tipos.get(nombre) or tipoCampo(campo)
+            if tipo_sql is not None and tipo_sql.lower().startswith('enum'):
+                tipo, codificar = str, True
+            else:
+                tipo = tipoPythonSQL(tipo_sql) if tipo_sql is not None else None
+                if tipo is Any: tipo = None
+                if not self.__codificar_cadenas: codificar = False
+                else: codificar = True if tipo is str else None if tipo is None else False
+            self.__nombres.append(nombre)
+            self.__columnas.append(_Columna(tipo, codificar))
+
+    def agregar(self, filas : list[tuple]) -> None:
+        if not filas: return
+        for columna, valores in zip(self.__columnas, zip(*filas)):
+            columna.agregar(self.__numpy, valores)
+
+    def columnas(self) -> dict[str, Any]:
+        return {nombre : columna.resultado(self.__numpy) for nombre, columna in zip(self.__nombres, self.__columnas)}
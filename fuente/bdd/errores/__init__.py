@@ -4,6 +4,7 @@ class ErrorBDD(Exception):...
 class ErrorMalaSolicitud(ErrorBDD):
         """Excepción para errores relacionados con solicitudes"""
 class SinResultado(ErrorMalaSolicitud): ...
+class ErrorMalaSintaxisSQL(ErrorMalaSolicitud): ...
 class ErrorTablaNoExiste(ErrorBDD): ...
 class ErrorBaseDeDatosNoExiste(ErrorBDD): ...
 
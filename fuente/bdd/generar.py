@@ -0,0 +1,165 @@
+"""
+Generador de modelos estáticos: se conecta una vez, lee el esquema de las tablas con `DESCRIBE` y escribe
+un módulo de Python con un modelo `Tabla` por tabla, con `__slots__` fijos, sus anotaciones, enumeraciones y
+la descripción de la tabla (`descripcionTabla`). Al importar el módulo generado, `Tabla` arma el esquema y
+el decodificador de filas a partir de esa descripción, sin consultar la base: útil para procesos de vida corta.
+
+Los convertidores de cada columna no se escriben aparte: salen de las anotaciones generadas (Decimal, dict,
+bool y las enumeraciones), con las mismas reglas que `Tabla`, y una segunda copia podría desincronizarse.
+Los modelos generados guardan sus columnas en slots y no tienen `__dict__`: no admiten atributos de instancia
+fuera del esquema (p. ej. una `Relacion` agregada después).
+
+Uso (desde `fuente/`):
+    python -m bdd.generar --host localhost --usuario app --contrasena ... --base discografica --salida modelos.py
+    python -m bdd.generar --base discografica Discos Artistas          # sólo esas tablas, a la salida estándar
+    python -m bdd.generar --sqlite datos.db --salida modelos.py
+
+Sin tablas se generan todas las de la base. El módulo generado debe volver a generarse cuando cambie el
+esquema; las ediciones manuales se pierden.
+"""
+from argparse import ArgumentParser
+from keyword import iskeyword
+from sys import exit as salir, stdout
+
+from bdd.tipos import *
+from bdd.utiles import atributoPublico
+from bdd.bdd import ProtocoloBaseDeDatos, BaseDeDatos_MySQL, ConfigBDDMysql, PoolConexiones
+from bdd.tabla import Tabla, EsquemaTabla
+from bdd.sqlite import BaseDeDatos_SQLite
+
+
+# Claves de cada fila de `DESCRIBE` que se guardan en el modelo generado.
+CLAVES_DESCRIPCION : tuple[str] = ('Field', 'Type', 'Null', 'Key', 'Default', 'Extra')
+
+# Slots que cada modelo necesita además de sus columnas: la conexión (que `Tabla` guarda con el nombre
+# privado del modelo) y las referencias débiles del `MapaIdentidad`.
+SLOTS_REGISTRO : tuple[str] = ('__bdd', '__weakref__')
+
+ENCABEZADO : str = '''"""
+Modelos generados con `python -m bdd.generar` a partir del esquema de la base de datos.
+No editar: volver a generar el módulo cuando cambie el esquema.
+"""
+from bdd.tabla import Tabla
+from bdd.tipos import *
+'''
+
+
+def listarTablas(bdd : ProtocoloBaseDeDatos) -> list[str]:
+    with bdd as bdd:
+        if isinstance(bdd, BaseDeDatos_SQLite):
+            filas = bdd.ejecutar("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name;").devolverResultados()
+        else:
+            filas = bdd.ejecutar("SHOW TABLES;").devolverResultados()
+    return [next(iter(fila.values())) for fila in filas or ()]
+
+
+def describir(bdd : ProtocoloBaseDeDatos, tabla : str) -> tuple[Resultado]:
+    """Filas de `DESCRIBE tabla`, reducidas a `CLAVES_DESCRIPCION` y con los textos decodificados."""
+    with bdd as bdd:
+        filas : list[Resultado] = bdd.ejecutar(f"DESCRIBE {tabla};").devolverResultados() or []
+    return tuple(
+        {
+            clave : valor.decode() if isinstance(valor, (bytes, bytearray)) else valor
+            for clave in CLAVES_DESCRIPCION
+            if (valor := fila.get(clave)) is not None or clave in ('Field', 'Type')
+        }
+        for fila in filas
+    )
+
+
+def _nombreTipo(tipo : Any) -> str:
+    return tipo.__name__ if isinstance(tipo, type) else 'Any'
+
+
+def _generarEnum(enum : type) -> list[str]:
+    miembros : list[tuple[str, int]] = [(miembro.name, miembro.value) for miembro in enum]
+    if all(nombre.isidentifier() and not iskeyword(nombre) for nombre, _ in miembros):
+        return [f"    class {enum.__name__}(EnumSQL):"] + [f"        {nombre} = {valor}" for nombre, valor in miembros] + ['']
+    # Valores del ENUM que no son identificadores: se arma la clase como lo hace `Tabla`.
+    return [f"    {enum.__name__} = type({enum.__name__!r}, (EnumSQL, Enum), {dict(miembros)!r})", '']
+
+
+def generarModelo(tabla : str, descripcion : tuple[Resultado]) -> str:
+    """
+    Código del modelo de `tabla`. Los tipos y enumeraciones se deducen con las mismas reglas que `Tabla`
+    usa en tiempo de ejecución, de modo que el modelo generado se comporta igual que uno dinámico.
+    El esquema se resuelve sin crear el modelo, para no registrarlo en `Tabla.modelo()`.
+    """
+    esquema : EsquemaTabla = Tabla.esquemaDesdeDescripcion(descripcion)
+    lineas : list[str] = [f"class {tabla}(metaclass=Tabla):"]
+
+    enums : list[str] = []
+    anotaciones : list[str] = []
+    for atributo, tipo in esquema.anotaciones.items():
+        if isinstance(tipo, type) and issubclass(tipo, EnumSQL):
+            enums.extend(_generarEnum(tipo))
+        if '__' in atributo:
+            anotaciones.append(f"    # {atributoPublico(atributo)} : {_nombreTipo(tipo)}  (clave o autogenerada, de sólo lectura)")
+        else:
+            anotaciones.append(f"    {atributo} : {_nombreTipo(tipo)}")
+
+    lineas.extend(enums)
+    lineas.append(f"    __slots__ = {esquema.slots + SLOTS_REGISTRO!r}")
+    lineas.append('')
+    lineas.extend(anotaciones)
+    lineas.append('')
+    lineas.append("    descripcionTabla = \\")
+    lineas.append("    (")
+    lineas.extend(f"        {fila!r}," for fila in descripcion)
+    lineas.append("    )")
+    return '\n'.join(lineas) + '\n'
+
+
+def generarModulo(bdd : ProtocoloBaseDeDatos, tablas : Optional[Iterable[str]] = None) -> str:
+    """Código de un módulo con los modelos de `tablas` (por defecto, todas las de la base)."""
+    tablas = list(tablas) if tablas else listarTablas(bdd)
+    modelos : list[str] = [generarModelo(tabla, describir(bdd, tabla)) for tabla in tablas]
+    return ENCABEZADO + ''.join(f"\n\n{modelo}" for modelo in modelos)
+
+
+def main(argumentos : Optional[list[str]] = None) -> int:
+    analizador = ArgumentParser(prog='python -m bdd.generar', description="Genera modelos estáticos a partir del esquema de la base de datos.")
+    analizador.add_argument('tablas', nargs='*', help="tablas a generar (por defecto, todas)")
+    analizador.add_argument('--salida', help="archivo del módulo generado (por defecto, la salida estándar)")
+    analizador.add_argument('--host', default='localhost')
+    analizador.add_argument('--puerto', type=int, default=3306)
+    analizador.add_argument('--usuario', default='root')
+    analizador.add_argument('--contrasena', default='')
+    analizador.add_argument('--base', help="nombre de la base de datos MySQL")
+    analizador.add_argument('--sqlite', help="ruta de una base SQLite (en lugar de MySQL)")
+    opciones = analizador.parse_args(argumentos)
+
+    pool : Optional[PoolConexiones] = None
+    if opciones.sqlite:
+        bdd : ProtocoloBaseDeDatos = BaseDeDatos_SQLite(opciones.sqlite)
+    else:
+        if not opciones.base: analizador.error("indique --base o --sqlite")
+        pool = PoolConexiones(
+            {
+                "host" : opciones.host,
+                "port" : opciones.puerto,
+                "user" : opciones.usuario,
+                "password" : opciones.contrasena,
+                "database" : opciones.base,
+                "use_pure" : False,
+            },
+            minimo=0,
+            maximo=1,
+        )
+        bdd = BaseDeDatos_MySQL(ConfigBDDMysql(), pool=pool)
+
+    try:
+        codigo : str = generarModulo(bdd, opciones.tablas)
+    finally:
+        if pool is not None: pool.cerrar()
+
+    if opciones.salida:
+        with open(opciones.salida, 'w', encoding='utf-8') as archivo:
+            archivo.write(codigo)
+    else:
+        stdout.write(codigo)
+    return 0
+
+
+if __name__ == '__main__':
+    salir(main())
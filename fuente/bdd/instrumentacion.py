@@ -0,0 +1,286 @@
+from bisect import bisect_left
+from json import dump
+from logging import getLogger, Logger
+from re import compile as compilarRegex
+from threading import Lock, local
+from time import perf_counter
+
+from bdd.tipos import *
+
+
+class Histograma():
+    '''
+        Histograma de latencias en memoria con cubetas exponenciales (de 10 µs a ~100 s, cada una un
+        25 % más ancha que la anterior). Los percentiles se estiman con el límite superior de la cubeta,
+        con un error relativo de a lo sumo 25 %, a cambio de memoria y costo de registro constantes.
+    '''
+
+    LIMITES : tuple[float] = tuple(1e-5 * 1.25 ** i for i in range(73))
+
+    __slots__ = \
+    (
+        '__cubetas',
+        '__cantidad',
+        '__total',
+        '__minimo',
+        '__maximo',
+    )
+
+    def __init__(self) -> None:
+        self.__cubetas : list[int] = [0] * (len(self.LIMITES) + 1)
+        self.__cantidad = 0
+        self.__total = 0.0
+        self.__minimo = float('inf')
+        self.__maximo = 0.0
+
+    def registrar(self, segundos : float) -> None:
+        self.__cubetas[bisect_left(self.LIMITES, segundos)] += 1
+        self.__cantidad += 1
+        self.__total += segundos
+        if segundos < self.__minimo: self.__minimo = segundos
+        if segundos > self.__maximo: self.__maximo = segundos
+
+    def percentil(self, p : float) -> float:
+        """Latencia (en segundos) por debajo de la cual cae el `p` por ciento de las mediciones."""
+        if not self.__cantidad: return 0.0
+        objetivo : float = self.__cantidad * p / 100
+        acumulado : int = 0
+        for i, cantidad in enumerate(self.__cubetas):
+            acumulado += cantidad
+            if acumulado >= objetivo:
+                return min(self.LIMITES[i] if i < len(self.LIMITES) else self.__maximo, self.__maximo)
+        return self.__maximo
+
+    def resumen(self) -> dict[str, float]:
+        return \
+        {
+            "cantidad" : self.__cantidad,
+            "total" : self.__total,
+            "minimo" : self.__minimo if self.__cantidad else 0.0,
+            "maximo" : self.__maximo,
+            "p50" : self.percentil(50),
+            "p95" : self.percentil(95),
+            "p99" : self.percentil(99),
+        }
+
+
+class MedicionConsulta():
+    '''
+        Medición de una sentencia: la reciben los ganchos `antes` (recién iniciada) y `despues`
+        (completa). Los tiempos están en segundos.
+    '''
+
+    __slots__ = ('forma', 'sql', 'parametros', 'ejecucion', 'lectura', 'hidratacion', 'filas', 'filas_afectadas', 'error')
+
+    def __init__(self, forma : str, sql : str, parametros : Optional[tuple[Any]]) -> None:
+        self.forma = forma
+        self.sql = sql
+        self.parametros = parametros
+        self.ejecucion = 0.0
+        self.lectura = 0.0
+        self.hidratacion = 0.0
+        self.filas = 0
+        self.filas_afectadas = -1
+        self.error : Optional[str] = None
+
+    @property
+    def total(self) -> float:
+        return self.ejecucion + self.lectura + self.hidratacion
+
+
+class _EstadisticasForma():
+    __slots__ = ('total', 'ejecucion', 'lectura', 'hidratacion', 'filas', 'errores')
+
+    def __init__(self) -> None:
+        self.total = Histograma()
+        self.ejecucion = 0.0
+        self.lectura = 0.0
+        self.hidratacion = 0.0
+        self.filas = 0
+        self.errores = 0
+
+
+class Instrumentacion():
+    '''
+        Instrumentación de las consultas de `BaseDeDatos_MySQL`. Mientras está activa, cada sentencia
+        se mide desde `ejecutar` hasta que empieza la siguiente en el mismo hilo (o se libera la conexión):
+        - tiempo de ejecución, de lectura (`devolverResultados`, `devolverUnResultado`, `iterarResultados`)
+          y de hidratación de registros (`Tabla`), filas leídas y filas afectadas;
+        - forma de la sentencia: el SQL con los literales y marcadores reemplazados por `?` y las listas
+          `IN (...)` / `VALUES (...), (...)` colapsadas en `(?+)`, para agrupar sentencias equivalentes;
+        - un histograma de latencia total por forma (p50 / p95 / p99);
+        - un registro de consultas lentas (logger `bdd.lentas`, nivel WARNING) a partir de `umbral_lento`;
+        - ganchos `antes(medicion)` y `despues(medicion)`.
+
+        Desactivada, el costo es una consulta de atributo por llamada.
+
+        > instrumentacion = Instrumentacion(umbral_lento=0.5).activar()
+        > ...
+        > instrumentacion.exportar('metricas.json')
+        > instrumentacion.desactivar()
+
+        METODOS PUBLICOS
+        - actual() -> Optional[Instrumentacion]  (método de clase)
+        - activar() -> Instrumentacion
+        - desactivar() -> None
+        - agregarGancho(antes = None, despues = None) -> None
+        - normalizar(sql) -> str
+        - instantanea() -> dict
+        - exportar(ruta) -> None
+        - reiniciar() -> None
+    '''
+
+    __actual : Optional['Instrumentacion'] = None
+
+    __LITERALES = compilarRegex(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"|(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])|%s")
+    __LISTAS = compilarRegex(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+    __FILAS = compilarRegex(r"(?<=\(\?\+\))(?:\s*,\s*\(\?\+\))+")
+    __ESPACIOS = compilarRegex(r"\s+")
+    __OTRAS : str = '<otras>'
+
+    __slots__ = \
+    (
+        '__umbral_lento',
+        '__maximo_formas',
+        '__registrar_parametros',
+        '__registro',
+        '__formas',
+        '__normalizadas',
+        '__antes',
+        '__despues',
+        '__cerrojo',
+        '__hilo',
+    )
+
+    def __init__(self, umbral_lento : Optional[float] = 1.0, maximo_formas : int = 1000, registrar_parametros : bool = False, registro : Optional[Logger] = None) -> None:
+        """
+        :arg umbral_lento Optional[float]: segundos a partir de los cuales una sentencia se registra como lenta; `None` no registra.
+        :arg maximo_formas int: cantidad máxima de formas distintas; las demás se agrupan en '<otras>'.
+        :arg registrar_parametros bool: incluir los parámetros en el registro de consultas lentas.
+        :arg registro Optional[Logger]: logger del registro de consultas lentas (por defecto `bdd.lentas`).
+        """
+        self.__umbral_lento = umbral_lento
+        self.__maximo_formas = maximo_formas
+        self.__registrar_parametros = registrar_parametros
+        self.__registro : Logger = registro or getLogger('bdd.lentas')
+        self.__formas : dict[str, _EstadisticasForma] = {}
+        self.__normalizadas : dict[str, str] = {}
+        self.__antes : list[Callable[[MedicionConsulta], None]] = []
+        self.__despues : list[Callable[[MedicionConsulta], None]] = []
+        self.__cerrojo = Lock()
+        self.__hilo = local()
+
+    @classmethod
+    def actual(cls) -> Optional['Instrumentacion']:
+        return cls.__actual
+
+    def activar(self) -> 'Instrumentacion':
+        Instrumentacion.__actual = self
+        return self
+
+    def desactivar(self) -> None:
+        self.cerrar()
+        if Instrumentacion.__actual is self: Instrumentacion.__actual = None
+
+    def agregarGancho(self, antes : Optional[Callable[[MedicionConsulta], None]] = None, despues : Optional[Callable[[MedicionConsulta], None]] = None) -> None:
+        if antes is not None: self.__antes.append(antes)
+        if despues is not None: self.__despues.append(despues)
+
+    def normalizar(self, sql : str) -> str:
+        """Forma de la sentencia: literales y marcadores como `?`, listas colapsadas y espacios simples."""
+        forma : Optional[str] = self.__normalizadas.get(sql)
+        if forma is None:
+            forma = self.__LITERALES.sub('?', sql)
+            forma = self.__LISTAS.sub('(?+)', forma)
+            forma = self.__FILAS.sub('', forma)
+            forma = self.__ESPACIOS.sub(' ', forma).strip()
+            if len(self.__normalizadas) >= 10 * self.__maximo_formas: self.__normalizadas.clear()
+            self.__normalizadas[sql] = forma
+        return forma
+
+    # Ciclo de una medición. Los llama BaseDeDatos_MySQL y Tabla; cada hilo tiene a lo sumo una abierta.
+    def iniciar(self, sql : str, parametros : Optional[tuple[Any]]) -> MedicionConsulta:
+        self.cerrar()
+        medicion : MedicionConsulta = MedicionConsulta(self.normalizar(sql), sql, parametros)
+        self.__hilo.medicion = medicion
+        for gancho in self.__antes: gancho(medicion)
+        return medicion
+
+    def ejecutado(self, segundos : float, filas_afectadas : int = -1, error : Optional[BaseException] = None) -> None:
+        medicion : Optional[MedicionConsulta] = getattr(self.__hilo, 'medicion', None)
+        if medicion is None: return
+        medicion.ejecucion += segundos
+        medicion.filas_afectadas = filas_afectadas
+        if error is not None:
+            medicion.error = f"{type(error).__name__}: {error}"
+            self.cerrar()
+
+    def leido(self, segundos : float, filas : int) -> None:
+        medicion : Optional[MedicionConsulta] = getattr(self.__hilo, 'medicion', None)
+        if medicion is None: return
+        medicion.lectura += segundos
+        medicion.filas += filas
+
+    def hidratado(self, segundos : float) -> None:
+        medicion : Optional[MedicionConsulta] = getattr(self.__hilo, 'medicion', None)
+        if medicion is not None: medicion.hidratacion += segundos
+
+    def cerrar(self) -> None:
+        """Completa la medición abierta en este hilo: histogramas, registro de lentas y ganchos `despues`."""
+        medicion : Optional[MedicionConsulta] = getattr(self.__hilo, 'medicion', None)
+        if medicion is None: return
+        self.__hilo.medicion = None
+        total : float = medicion.total
+        with self.__cerrojo:
+            forma : str = medicion.forma if medicion.forma in self.__formas or len(self.__formas) < self.__maximo_formas else self.__OTRAS
+            estadisticas : _EstadisticasForma = self.__formas.get(forma) or self.__formas.setdefault(forma, _EstadisticasForma())
+            estadisticas.total.registrar(total)
+            estadisticas.ejecucion += medicion.ejecucion
+            estadisticas.lectura += medicion.lectura
+            estadisticas.hidratacion += medicion.hidratacion
+            estadisticas.filas += medicion.filas
+            if medicion.error is not None: estadisticas.errores += 1
+        if self.__umbral_lento is not None and total >= self.__umbral_lento:
+            self.__registro.warning(
+                "Consulta lenta (%.3f s: ejecución %.3f, lectura %.3f, hidratación %.3f; %d filas): %s%s",
+                total, medicion.ejecucion, medicion.lectura, medicion.hidratacion, medicion.filas, medicion.forma,
+                f" | parámetros: {medicion.parametros}" if self.__registrar_parametros else '',
+            )
+        for gancho in self.__despues: gancho(medicion)
+
+    def instantanea(self) -> dict[str, Any]:
+        """Métricas acumuladas por forma de sentencia, ordenadas por tiempo total descendente."""
+        self.cerrar()
+        with self.__cerrojo:
+            formas : dict[str, dict[str, Any]] = {
+                forma : {
+                    **estadisticas.total.resumen(),
+                    "ejecucion" : estadisticas.ejecucion,
+                    "lectura" : estadisticas.lectura,
+                    "hidratacion" : estadisticas.hidratacion,
+                    "filas" : estadisticas.filas,
+                    "errores" : estadisticas.errores,
+                }
+                for forma, estadisticas in self.__formas.items()
+            }
+        return \
+        {
+            "sentencias" : sum(forma["cantidad"] for forma in formas.values()),
+            "tiempo_total" : sum(forma["total"] for forma in formas.values()),
+            "formas" : dict(sorted(formas.items(), key=lambda par : par[1]["total"], reverse=True)),
+        }
+
+    def exportar(self, ruta : str) -> None:
+        """Escribe la `instantanea()` como JSON."""
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            dump(self.instantanea(), archivo, indent=2, ensure_ascii=False)
+
+    def reiniciar(self) -> None:
+        with self.__cerrojo:
+            self.__formas.clear()
+
+    def __enter__(self) -> 'Instrumentacion':
+        return self.activar()
+
+    def __exit__(self, exc_type, excl_val, exc_tb) -> None:
+        self.desactivar()
@@ -1,6 +1,11 @@
+from copy import deepcopy
+from inspect import iscoroutinefunction
+
 from bdd.tipos import *
 from bdd.utiles import *
-from bdd.bdd import ProtocoloBaseDeDatos
+from bdd.errores import *
+from bdd.bdd import ProtocoloBaseDeDatos, Consulta
+from bdd.sesion import MapaIdentidad
 
 
 
@@ -8,15 +13,176 @@ class Registro: ...
 class Registro:
     __slots__ = (
         '__bdd',
+        '__tabla',
         '__id',
+        '__originales',
+        '__escritas',
+        '__pendientes',
     )
+    # Slots de uso interno, que no corresponden a columnas de la tabla.
+    __internos : tuple[str] = ('__bdd', '__tabla', '__originales', '__escritas', '__pendientes')
+
+    # Columnas pesadas (p. ej. JSON o TEXT) que no se traen al cargar registros: se leen al acceder
+    # al atributo por primera vez, con `cargarColumnas()` o en lote con `Modelo.cargarDiferidas()`.
+    # Cada modelo puede redefinirla en su cuerpo.
+    columnasDiferidas : tuple[str] = ()
+
+    # Esquema declarado de antemano (las filas de `DESCRIBE`), como en los modelos que escribe
+    # `python -m bdd.generar`: con él, `Tabla` resuelve el esquema al crear la clase, sin consultar la base.
+    descripcionTabla : Optional[tuple[Resultado]] = None
 
     __bdd : ProtocoloBaseDeDatos
     __id : int
 
+    # Decodificador de filas de la clase, generado por `Tabla` al resolver el esquema:
+    # tuplas (columna, atributo destino, convertidor o None).
+    __decodificador : Optional[tuple[tuple[str, str, Optional[Callable[[Any], Any]]], ...]] = None
+    __atributos_editables : Optional[tuple[str]] = None
+    __conjunto_editables : Optional[frozenset[str]] = None
+
+    @classmethod
+    def configurarDecodificador(cls, decodificador : Optional[tuple[tuple[str, str, Optional[Callable[[Any], Any]]], ...]]) -> None:
+        """Fija el decodificador de filas de la clase; con `None` se vuelve a la hidratación genérica."""
+        cls.__decodificador = decodificador
+        cls.__atributos_editables = None if decodificador is None else tuple(atributo for atributo in cls.columnas() if '__' not in atributo)
+        cls.__conjunto_editables = None if decodificador is None else frozenset(cls.__atributos_editables)
+
     @property
     def id(self):
-        return self.__id
+        return getattr(self, atributoPrivado(self, '__id'), None)
+
+    # `Tabla` y la hidratación guardan la conexión y el id con el nombre privado de la clase del modelo.
+    def __baseDeDatos(self) -> ProtocoloBaseDeDatos:
+        return getattr(self, atributoPrivado(self, '__bdd'))
+
+    def __asignarId(self, id : int) -> None:
+        setattr(self, atributoPrivado(self, '__id'), id)
+
+    @classmethod
+    def columnas(cls) -> tuple[str]:
+        """Atributos del modelo que corresponden a columnas (las claves y autonuméricas con prefijo `__`)."""
+        return tuple(atributo for atributo in cls.__slots__ if atributo not in Registro.__internos)
+
+    @classmethod
+    def columnasSeleccionadas(cls, columnas : Optional[Iterable[str]] = None) -> list[str]:
+        """
+        Columnas a traer al cargar registros del modelo: las pedidas en `columnas` o, sin proyección,
+        todas menos las `columnasDiferidas`. Las claves y autonuméricas se traen siempre.
+
+        Levanta:
+        :arg ErrorMalaSolicitud: si alguna de las columnas pedidas no existe en el modelo.
+        """
+        if columnas is None:
+            diferidas : frozenset[str] = frozenset(cls.columnasDiferidas)
+            return [atributoPublico(atributo) for atributo in cls.columnas() if atributo not in diferidas]
+        solicitadas : frozenset[str] = frozenset(columnas)
+        desconocidas : frozenset[str] = solicitadas.difference(atributoPublico(atributo) for atributo in cls.columnas())
+        if desconocidas:
+            raise ErrorMalaSolicitud(f"{cls.__name__} no tiene las columnas: {', '.join(sorted(desconocidas))}.")
+        return [atributoPublico(atributo) for atributo in cls.columnas() if '__' in atributo or atributo in solicitadas]
+
+    def __editables(self) -> tuple[str]:
+        return type(self).__atributos_editables or tuple(atributo for atributo in self.columnas() if '__' not in atributo)
+
+    def __pendientesDe(self) -> frozenset[str]:
+        return getattr(self, '_Registro__pendientes', frozenset())
+
+    def __cargadas(self) -> tuple[str]:
+        # Editables ya leídas de la base; las diferidas pendientes no se comparan ni se escriben.
+        pendientes : frozenset[str] = self.__pendientesDe()
+        if not pendientes: return self.__editables()
+        return tuple(atributo for atributo in self.__editables() if atributo not in pendientes)
+
+    @property
+    def columnasPendientes(self) -> frozenset[str]:
+        """Columnas que no se trajeron al cargar el registro (diferidas o fuera de la proyección)."""
+        return self.__pendientesDe()
+
+    @property
+    def columnasCargadas(self) -> tuple[str]:
+        """Columnas editables con valor leído o asignado: las que un guardado puede escribir."""
+        return self.__cargadas()
+
+    def __getattr__(self, nombre : str) -> Any:
+        # Sólo se llama cuando el atributo no existe: carga perezosa de una columna pendiente.
+        if nombre[0] != '_' and nombre in self.__pendientesDe():
+            self.cargarColumnas(nombre)
+            # Como en una carga completa, una columna NULL queda sin asignar.
+            return object.__getattribute__(self, nombre)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{nombre}'")
+
+    def cargarColumnas(self, *columnas : str) -> None:
+        """
+        Trae de la base, en una sola consulta, las columnas pendientes indicadas (todas si no se indica
+        ninguna). Las que ya están cargadas se ignoran.
+
+        Levanta:
+        :arg SinResultado: si el registro ya no existe en la base.
+        :arg ErrorMalaSolicitud: si la base de datos es asincrónica (use `cargarColumnasAsincrono`).
+        """
+        solicitadas : list[str] = self.__solicitadas(columnas)
+        if not solicitadas: return
+        bdd : ProtocoloBaseDeDatos = self.__baseDeDatos()
+        if iscoroutinefunction(bdd.ejecutar):
+            raise ErrorMalaSolicitud(f"Las columnas {', '.join(solicitadas)} de {self.tabla} no están cargadas: use `await cargarColumnasAsincrono()`.")
+        with bdd as bdd:
+            fila : Optional[Resultado] = bdd.ejecutar(Consulta().Select(self.tabla, ['id', *solicitadas]).Where(id=self.id)).devolverUnResultado()
+        if fila is None: raise SinResultado(f"No existe el registro de {self.tabla} con id: {self.id}.")
+        self.completarColumnas(fila)
+
+    async def cargarColumnasAsincrono(self, *columnas : str) -> None:
+        """Como `cargarColumnas`, sobre una base de datos asincrónica."""
+        solicitadas : list[str] = self.__solicitadas(columnas)
+        if not solicitadas: return
+        bdd : ProtocoloBaseDeDatos = self.__baseDeDatos()
+        async with bdd:
+            await bdd.ejecutar(Consulta().Select(self.tabla, ['id', *solicitadas]).Where(id=self.id))
+            fila : Optional[Resultado] = await bdd.devolverUnResultado()
+        if fila is None: raise SinResultado(f"No existe el registro de {self.tabla} con id: {self.id}.")
+        self.completarColumnas(fila)
+
+    def __solicitadas(self, columnas : tuple[str]) -> list[str]:
+        pendientes : frozenset[str] = self.__pendientesDe()
+        if not pendientes or self.id is None: return []
+        return [atributo for atributo in (columnas or self.__editables()) if atributo in pendientes]
+
+    def completarColumnas(self, fila : Resultado) -> None:
+        """
+        Asigna las columnas pendientes presentes en `fila` (p. ej. leída por `Modelo.cargarDiferidas`)
+        y las da por cargadas. Las demás claves de `fila` se ignoran, para no pisar ediciones sin guardar.
+        """
+        pendientes : frozenset[str] = self.__pendientesDe()
+        cargadas : frozenset[str] = pendientes.intersection(fila)
+        if not cargadas: return
+        self.__hidratar({columna : fila[columna] for columna in cargadas})
+        self.__pendientes = pendientes.difference(cargadas)
+        self.__tomarOriginales(cargadas)
+
+    def __tomarOriginales(self, atributos : Iterable[str]) -> None:
+        # Copia de los valores tal como están en la base, para detectar qué columnas cambiaron.
+        originales : dict[str, Any] = getattr(self, '_Registro__originales', {})
+        for atributo in atributos:
+            valor : Any = getattr(self, atributo, None)
+            originales[atributo] = deepcopy(valor) if isinstance(valor, (dict, list)) else valor
+        self.__originales = originales
+
+    def cambios(self) -> dict[str, Any]:
+        """Devuelve las columnas modificadas desde que el registro se cargó o se guardó por última vez, con su valor actual."""
+        originales : dict[str, Any] = getattr(self, '_Registro__originales', {})
+        return {
+            atributo : valor
+            for atributo in self.__cargadas()
+            if (valor := getattr(self, atributo, None)) != originales.get(atributo)
+        }
+
+    def marcarComoGuardado(self) -> None:
+        """Toma los valores actuales como los guardados en la base (p. ej. tras una escritura en lote)."""
+        self.__tomarOriginales(self.__cargadas())
+
+    @property
+    def columnasEscritas(self) -> tuple[str]:
+        """Columnas que escribió el último `guardar()` (vacío si no hubo nada que escribir)."""
+        return getattr(self, '_Registro__escritas', ())
     
     def __new__(cls, *posicionales,**nominales):
         obj = super(Registro, cls).__new__(cls)
@@ -25,6 +191,38 @@ class Registro:
 
     @sobrecargar
     def __init__(self, bdd : ProtocoloBaseDeDatos, valores : dict):
+        self.__cargarFila(valores)
+
+    @classmethod
+    def desdeFila(cls, bdd : ProtocoloBaseDeDatos, valores : dict) -> Self:
+        """
+        Construye un registro a partir de una fila, como `Modelo(bdd, fila)` pero sin el despacho de la
+        sobrecarga de `__init__`, que domina el costo por fila. `Tabla` lo usa al hidratar resultados.
+        """
+        registro : Self = cls.__new__(cls)
+        registro.__cargarFila(valores)
+        setattr(registro, atributoPrivado(registro, '__bdd'), bdd)
+        return registro
+
+    def __cargarFila(self, valores : dict) -> None:
+        self.__hidratar(valores)
+        # Una fila leída de la base (con id) sin alguna columna deja esa columna pendiente de carga.
+        if valores.get('id') is None:
+            self.__pendientes = frozenset()
+        else:
+            self.__pendientes = (type(self).__conjunto_editables or frozenset(self.__editables())).difference(valores)
+        self.__tomarOriginales(self.__cargadas())
+
+    def __hidratar(self, valores : dict) -> None:
+        decodificador = type(self).__decodificador
+        if decodificador is not None:
+            obtener = valores.get
+            for columna, destino, convertir in decodificador:
+                valor_SQL : Any = obtener(columna)
+                if valor_SQL is not None:
+                    setattr(self, destino, valor_SQL if convertir is None else convertir(valor_SQL))
+            return
+
         for atributo in self.__slots__:
             nombre = atributoPublico(atributo)
             valor_SQL : Any = valores.get(nombre,None)
@@ -44,28 +242,26 @@ class Registro:
                 setattr(self, atributoPrivado(self,atributo) if '__' in atributo else atributo, valor)
 
     @sobrecargar
-    def __init__(self, bdd : ProtocoloBaseDeDatos, id : int):
+    def __init__(self, bdd : ProtocoloBaseDeDatos, id : int, columnas : Optional[list | tuple] = None):
         resultado : Resultado
-        atributos : tuple[str] = (atributoPublico(atr) for atr in self.__slots__ if atr not in ('__bdd','__tabla'))
+        atributos : list[str] = self.columnasSeleccionadas(columnas)
         
         with bdd as bdd:
-            resultado = bdd\
-                        .SELECT(*atributos)\
-                        .FROM(self.tabla)\
-                        .WHERE(id=id)\
-                        .Ejecutar()\
-                        .DevolverUnResultado()
+            resultado = bdd.ejecutar(Consulta().Select(self.tabla, atributos).Where(id=id)).devolverUnResultado()
 
         self.__init__(
             bdd,
             resultado
         )
-        self.__id = id
+        self.__asignarId(id)
 
     def guardar(self) -> int:
         """Guarda el registro en la tabla correspondiente.
         Si tiene id, se edita un registro existente, 
         de lo contrario se agrega uno nuevo.   
+        Al editar sólo se escriben las columnas modificadas (ver `cambios()`); si no hay ninguna,
+        no se consulta la base. `columnasEscritas` informa qué columnas se escribieron.
+        Dentro de `bdd.transaccion()` la escritura no se confirma hasta que termina la transacción.
 
         Devuelve:
         :arg Id int:
@@ -75,50 +271,76 @@ class Registro:
         :arg Exception: Propaga errores de la conexión con la BDD  
         :arg Exception: Levanta error si al editar la base con coinciden los id
         """
-        match self.__id:
+        match self.id:
             case None:
-                self.__id : int = self.__crear()
+                self.__crear()
             case _: 
                 self.__editar()
 
-        return self.__id
+        return self.id
+
+    async def guardarAsincrono(self) -> int:
+        """Como `guardar`, sobre una base de datos asincrónica (p. ej. `BaseDeDatos_MySQLAsincrono`)."""
+        bdd : ProtocoloBaseDeDatos = self.__baseDeDatos()
+        match self.id:
+            case None:
+                ediciones : dict[str,Any] = self.__edicionesCreacion()
+                async with bdd:
+                    await bdd.ejecutar(Consulta().Insert(self.tabla, **ediciones))
+                    self.__trasCrear(bdd.devolverIdUltimaInsercion(), ediciones)
+            case _:
+                ediciones : dict[str,Any] = self.cambios()
+                self.__escritas = tuple(ediciones.keys())
+                if ediciones:
+                    async with bdd:
+                        await bdd.ejecutar(Consulta().Update(self.tabla, **ediciones).Where(id=self.id))
+                    self.__trasEditar(ediciones)
+
+        return self.id
     
 
+    def __edicionesCreacion(self) -> dict[str,Any]:
+        return {
+            atributo : getattr(self,atributo,None)
+            for atributo in self.__editables()
+        }
+
+    def __trasCrear(self, id : int, ediciones : dict[str,Any]) -> None:
+        self.__asignarId(id)
+        self.__tomarOriginales(ediciones.keys())
+        self.__escritas = tuple(ediciones.keys())
+        mapa : Optional[MapaIdentidad] = MapaIdentidad.actual()
+        if mapa is not None: mapa.registrar(self)
+
+    def __trasEditar(self, ediciones : dict[str,Any]) -> None:
+        self.__tomarOriginales(ediciones.keys())
+        # El UPDATE expiró el id del mapa de identidad; este registro es el que quedó al día.
+        mapa : Optional[MapaIdentidad] = MapaIdentidad.actual()
+        if mapa is not None: mapa.registrar(self)
+
     def __crear(self) -> int: 
         """Crea un nuevo registro en la tabla correspondiente""" 
 
-        atributos : tuple[str] = (atr for atr in self.__slots__ if '__' not in atr)
-        ediciones : dict[str,Any] = {
-            atributo : getattr(self,atributo)
-            for atributo in atributos
-        }
+        ediciones : dict[str,Any] = self.__edicionesCreacion()
     
-        with self.__bdd as bdd:
+        with self.__baseDeDatos() as bdd:
             id : int = bdd\
-                        .UPDATE(self.tabla)\
-                        .SET(**ediciones)\
-                        .WHERE(id=self.__id)\
-                        .Ejecutar()\
-                        .DevolverIdUltimaInsercion()
-            self.__id = id
+                        .ejecutar(Consulta().Insert(self.tabla, **ediciones))\
+                        .devolverIdUltimaInsercion()
+        self.__trasCrear(id, ediciones)
         
-        return self.__id
+        return id
     
     def __editar(self) -> None: 
         """
         Edita un registro ya existente, dado por el ID, en la tabla correspondiente.
+        Sólo escribe las columnas modificadas.
         """
 
+        ediciones : dict[str,Any] = self.cambios()
+        self.__escritas = tuple(ediciones.keys())
+        if not ediciones: return
 
-        atributos : tuple[str] = (atr for atr in self.__slots__ if '__' not in atr)
-        ediciones : dict[str,Any] = {
-            atributo : getattr(self,atributo)
-            for atributo in atributos
-        }
-
-        with self.__bdd as bdd:
-            bdd\
-                .UPDATE(self.tabla)\
-                .SET(**ediciones)\
-                .WHERE(id=self.__id)\
-                .Ejecutar()
+        with self.__baseDeDatos() as bdd:
+            bdd.ejecutar(Consulta().Update(self.tabla, **ediciones).Where(id=self.id))
+        self.__trasEditar(ediciones)
@@ -0,0 +1,438 @@
+from contextlib import contextmanager
+from re import compile as compilarRegex, IGNORECASE
+from threading import Event, Lock, Thread
+from time import monotonic
+
+from bdd.tipos import *
+from bdd.errores import *
+from bdd.bdd import Consulta, ConfigBDDMysql, PoolConexiones, BaseDeDatos_MySQL, ResultadoLote
+
+
+class _Replica():
+    __slots__ = ('nombre', 'pool', 'caida_hasta', 'lecturas', 'fallos', 'retraso', 'error')
+
+    def __init__(self, nombre : str, pool : PoolConexiones) -> None:
+        self.nombre = nombre
+        self.pool = pool
+        self.caida_hasta = 0.0
+        self.lecturas = 0
+        self.fallos = 0
+        self.retraso : Optional[float] = None
+        self.error : Optional[str] = None
+
+
+class ConjuntoReplicas():
+    '''
+        Conjunto de réplicas de lectura, cada una con su `PoolConexiones`. Es seguro entre hilos y puede
+        compartirse entre todas las `BaseDeDatos_Replicada` del proceso.
+
+        - Selección: `'turnos'` (round-robin) o `'menos_cargada'` (la de menos conexiones prestadas).
+        - Salud: una réplica que no entrega una conexión se marca caída durante `espera_reintento`
+          segundos y no se elige; pasado ese plazo vuelve a probarse. `verificar()` chequea todas
+          (conexión, ping y, si `retraso_maximo`, el retraso de replicación); con `intervalo_verificacion`
+          lo hace un hilo en segundo plano hasta `cerrar()`.
+
+        > replicas = ConjuntoReplicas([parametros_replica_1, parametros_replica_2], seleccion='menos_cargada')
+
+        METODOS PUBLICOS
+        - elegir() -> list[_Replica]
+        - marcarCaida(replica, error = None) -> None
+        - marcarSana(replica) -> None
+        - verificar() -> dict[str, bool]
+        - estado() -> list[dict]
+        - cerrar() -> None
+
+        CASOS DE ERROR
+        - ValueError: política de selección desconocida.
+    '''
+
+    SELECCIONES : tuple[str] = ('turnos', 'menos_cargada')
+
+    __slots__ = \
+    (
+        '__replicas',
+        '__seleccion',
+        '__espera_reintento',
+        '__retraso_maximo',
+        '__siguiente',
+        '__cerrojo',
+        '__detener',
+        '__hilo',
+    )
+
+    def __init__(
+        self,
+        replicas : Iterable[dict | PoolConexiones],
+        seleccion : str = 'turnos',
+        espera_reintento : float = 5.0,
+        retraso_maximo : Optional[float] = None,
+        intervalo_verificacion : Optional[float] = None,
+        opciones_pool : Optional[dict] = None,
+    ) -> None:
+        """
+        :arg replicas Iterable[dict | PoolConexiones]: parámetros de conexión de cada réplica (mismo formato
+            que `ConfigBDDMysql.PARAMETROS_CONEXION`) o pools ya creados.
+        :arg seleccion str: `'turnos'` o `'menos_cargada'`.
+        :arg espera_reintento float: segundos que una réplica caída queda fuera de la selección.
+        :arg retraso_maximo Optional[float]: segundos de retraso de replicación a partir de los cuales
+            `verificar()` da a una réplica por caída.
+        :arg intervalo_verificacion Optional[float]: si se indica, `verificar()` corre cada tantos segundos en un hilo.
+        :arg opciones_pool Optional[dict]: argumentos de `PoolConexiones` para las réplicas dadas como parámetros.
+        """
+        if seleccion not in self.SELECCIONES:
+            raise ValueError(f"Selección de réplica desconocida: {seleccion}. Opciones: {', '.join(self.SELECCIONES)}.")
+        self.__replicas : list[_Replica] = []
+        for i, replica in enumerate(replicas):
+            if isinstance(replica, PoolConexiones):
+                self.__replicas.append(_Replica(str(replica.parametros.get('host', i)), replica))
+            else:
+                nombre : str = f"{replica.get('host', 'localhost')}:{replica.get('port', 3306)}"
+                self.__replicas.append(_Replica(nombre, PoolConexiones(replica, **(opciones_pool or {}))))
+        self.__seleccion = seleccion
+        self.__espera_reintento = espera_reintento
+        self.__retraso_maximo = retraso_maximo
+        self.__siguiente = 0
+        self.__cerrojo = Lock()
+        self.__detener = Event()
+        self.__hilo : Optional[Thread] = None
+        if intervalo_verificacion is not None:
+            self.__hilo = Thread(target=self.__verificarCada, args=(intervalo_verificacion,), name='bdd-verificar-replicas', daemon=True)
+            self.__hilo.start()
+
+    def elegir(self) -> list[_Replica]:
+        """Réplicas disponibles, en el orden en que conviene probarlas según la política de selección."""
+        ahora : float = monotonic()
+        with self.__cerrojo:
+            disponibles : list[_Replica] = [replica for replica in self.__replicas if replica.caida_hasta <= ahora]
+            if not disponibles: return []
+            if self.__seleccion == 'menos_cargada':
+                return sorted(disponibles, key=lambda replica : replica.pool.estadisticas()["en_uso"])
+            inicio : int = self.__siguiente % len(disponibles)
+            self.__siguiente += 1
+            return disponibles[inicio:] + disponibles[:inicio]
+
+    def registrarLectura(self, replica : _Replica) -> None:
+        with self.__cerrojo:
+            replica.lecturas += 1
+
+    def marcarCaida(self, replica : _Replica, error : Optional[BaseException] = None) -> None:
+        with self.__cerrojo:
+            replica.caida_hasta = monotonic() + self.__espera_reintento
+            replica.fallos += 1
+            replica.error = None if error is None else f"{type(error).__name__}: {error}"
+
+    def marcarSana(self, replica : _Replica) -> None:
+        with self.__cerrojo:
+            replica.caida_hasta = 0.0
+            replica.error = None
+
+    def verificar(self) -> dict[str, bool]:
+        """
+        Chequea cada réplica: toma una conexión de su pool (que le hace ping), ejecuta `SELECT 1` y, si se
+        indicó `retraso_maximo`, lee el retraso de replicación. Marca cada réplica sana o caída.
+
+        Devuelve:
+        :arg Estado dict[str, bool]: por nombre de réplica, si quedó disponible.
+        """
+        estado : dict[str, bool] = {}
+        for replica in list(self.__replicas):
+            try:
+                conexion = replica.pool.obtener()
+            except ErrorPoolLlena:
+                # Ocupada no es caída.
+                estado[replica.nombre] = replica.caida_hasta <= monotonic()
+                continue
+            except Exception as error:
+                self.marcarCaida(replica, error)
+                estado[replica.nombre] = False
+                continue
+            try:
+                retraso : Optional[float] = self.__retraso(conexion)
+            except Exception as error:
+                replica.pool.descartar(conexion)
+                self.marcarCaida(replica, error)
+                estado[replica.nombre] = False
+                continue
+            replica.pool.devolver(conexion)
+            replica.retraso = retraso
+            if self.__retraso_maximo is not None and (retraso is None or retraso > self.__retraso_maximo):
+                self.marcarCaida(replica, ErrorBDD(f"Retraso de replicación: {retraso} s."))
+                estado[replica.nombre] = False
+            else:
+                self.marcarSana(replica)
+                estado[replica.nombre] = True
+        return estado
+
+    def __retraso(self, conexion) -> Optional[float]:
+        cursor = conexion.cursor(buffered=True, dictionary=True)
+        try:
+            cursor.execute("SELECT 1;")
+            cursor.fetchall()
+            if self.__retraso_maximo is None: return None
+            cursor.execute("SHOW REPLICA STATUS;")
+            fila : Optional[Resultado] = cursor.fetchone()
+            # Sin estado de replicación (p. ej. un servidor independiente) no hay retraso que medir.
+            if fila is None: return 0.0
+            retraso : Any = fila.get('Seconds_Behind_Source', fila.get('Seconds_Behind_Master'))
+            return None if retraso is None else float(retraso)
+        finally:
+            cursor.close()
+
+    def __verificarCada(self, intervalo : float) -> None:
+        while not self.__detener.wait(intervalo):
+            self.verificar()
+
+    def estado(self) -> list[dict[str, Any]]:
+        """Por réplica: nombre, si está disponible, lecturas y fallos acumulados, último retraso y último error."""
+        ahora : float = monotonic()
+        with self.__cerrojo:
+            return [
+                {
+                    "nombre" : replica.nombre,
+                    "disponible" : replica.caida_hasta <= ahora,
+                    "lecturas" : replica.lecturas,
+                    "fallos" : replica.fallos,
+                    "retraso" : replica.retraso,
+                    "error" : replica.error,
+                    "pool" : replica.pool.estadisticas(),
+                }
+                for replica in self.__replicas
+            ]
+
+    def cerrar(self) -> None:
+        """Detiene la verificación en segundo plano y cierra los pools de las réplicas."""
+        self.__detener.set()
+        if self.__hilo is not None: self.__hilo.join()
+        for replica in self.__replicas: replica.pool.cerrar()
+
+
+class BaseDeDatos_Replicada():
+    '''
+        Enrutador de lecturas y escrituras: implementa `ProtocoloBaseDeDatos` sobre una primaria
+        (`BaseDeDatos_MySQL`) y un `ConjuntoReplicas`.
+
+        - Las lecturas (`Consulta` con instrucción SELECT, o SQL que empieza con SELECT, SHOW, DESCRIBE o
+          EXPLAIN, salvo `FOR UPDATE` / `LOCK IN SHARE MODE`) van a una réplica; todo lo demás, a la primaria.
+          Dentro de un bloque `with` se usa siempre la misma réplica.
+        - Si ninguna réplica entrega una conexión, las lecturas van a la primaria.
+        - Lectura tras escritura: dentro de `transaccion()`, y en el resto del bloque `with` después de la
+          primera escritura, todas las lecturas van a la primaria. Con `adherencia`, también durante esos
+          segundos después de la última escritura (para cubrir el retraso de replicación).
+
+        Como `BaseDeDatos_MySQL`, una instancia es una unidad de trabajo de un hilo; el `ConjuntoReplicas`
+        (y los pools) se comparten.
+
+        > replicas = ConjuntoReplicas([{"host" : "replica1", ...}, {"host" : "replica2", ...}])
+        > bdd = BaseDeDatos_Replicada(BaseDeDatos_MySQL(configuracion, pool=pool_primaria), replicas)
+        > with bdd:
+        >     discos = bdd.ejecutar(Consulta().Select('Discos', ['id'])).devolverResultados()   # réplica
+        >     with bdd.transaccion():
+        >         bdd.ejecutar(Consulta().Update('Discos', nombre='Otro').Where(id=2))          # primaria
+        >         bdd.ejecutar(Consulta().Select('Discos', ['nombre']).Where(id=2))             # primaria
+
+        METODOS PUBLICOS
+        - ejecutar(consulta, ttl_cache = None) -> Self
+        - devolverResultados(cantidad = None) -> Optional[list[Resultado]]
+        - devolverUnResultado() -> Optional[Resultado]
+        - iterarResultados(consulta, tamano_lote = 1000, cantidad = None) -> Iterator[Resultado]
+        - devolverColumnas(consulta, tamano_lote = 10000, codificar_cadenas = False, tipos = None) -> dict
+        - lote(consultas) -> list[ResultadoLote]  (a la primaria si alguna sentencia escribe)
+        - devolverIdUltimaInsercion() -> Optional[int]
+        - transaccion() -> Iterator[Self]
+        - confirmar() -> Self
+        - revertir() -> Self
+        - estadisticas() -> dict
+    '''
+
+    __LECTURA = compilarRegex(r"^\s*(?:\(\s*)*(?:SELECT|SHOW|DESCRIBE|DESC|EXPLAIN)\b", IGNORECASE)
+    __BLOQUEO = compilarRegex(r"\bFOR\s+(?:UPDATE|SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b", IGNORECASE)
+
+    __slots__ = \
+    (
+        '__primaria',
+        '__replicas',
+        '__configuracion',
+        '__adherencia',
+        '__lectoras',
+        '__lectora',
+        '__actual',
+        '__abiertas',
+        '__profundidad',
+        '__escribio',
+        '__ultima_escritura',
+        '__contadores',
+    )
+
+    def __init__(self, primaria : BaseDeDatos_MySQL, replicas : ConjuntoReplicas | Iterable[dict], configuracion : Optional[ConfigBDDMysql] = None, adherencia : float = 0.0) -> None:
+        """
+        :arg primaria BaseDeDatos_MySQL: conexión a la primaria (con su pool y caché, si los tiene).
+        :arg replicas ConjuntoReplicas | Iterable[dict]: las réplicas, o sus parámetros de conexión.
+        :arg configuracion Optional[ConfigBDDMysql]: configuración (opciones de cursor) de las conexiones a réplicas;
+            por omisión, la de la primaria.
+        :arg adherencia float: segundos tras una escritura en los que las lecturas siguen yendo a la primaria.
+        """
+        self.__primaria = primaria
+        self.__replicas : ConjuntoReplicas = replicas if isinstance(replicas, ConjuntoReplicas) else ConjuntoReplicas(replicas)
+        self.__configuracion : ConfigBDDMysql = configuracion if configuracion is not None else primaria.configuracion
+        self.__adherencia = adherencia
+        self.__lectoras : dict[int, BaseDeDatos_MySQL] = {}
+        self.__lectora : Optional[tuple[_Replica, BaseDeDatos_MySQL]] = None
+        self.__actual : Any = primaria
+        self.__abiertas : list[Any] = []
+        self.__profundidad = 0
+        self.__escribio = False
+        self.__ultima_escritura = float('-inf')
+        self.__contadores : dict[str, int] = {"lecturas_replicas" : 0, "lecturas_primaria" : 0, "escrituras" : 0, "conmutaciones" : 0}
+
+    @property
+    def primaria(self) -> BaseDeDatos_MySQL:
+        return self.__primaria
+
+    @property
+    def replicas(self) -> ConjuntoReplicas:
+        return self.__replicas
+
+    @property
+    def enTransaccion(self) -> bool:
+        return self.__primaria.enTransaccion
+
+    def esLectura(self, consulta : 'str | Consulta | tuple[str, tuple[Any]]') -> bool:
+        """Si la sentencia puede ir a una réplica: un SELECT (u otra lectura) que no toma bloqueos."""
+        if isinstance(consulta, Consulta): return consulta.instruccion == 'SELECT'
+        sql, _ = BaseDeDatos_MySQL.compilar(consulta)
+        return bool(self.__LECTURA.match(sql)) and not self.__BLOQUEO.search(sql)
+
+    def __adherida(self) -> bool:
+        return self.__primaria.enTransaccion or self.__escribio or monotonic() - self.__ultima_escritura < self.__adherencia
+
+    def __abrir(self, bdd : Any) -> Any:
+        # Dentro de un bloque `with`, cada destino se abre la primera vez que se usa y se cierra con el bloque.
+        if self.__profundidad and not any(abierta is bdd for abierta in self.__abiertas):
+            bdd.__enter__()
+            self.__abiertas.append(bdd)
+        return bdd
+
+    def __destino(self, consulta : 'str | Consulta | tuple[str, tuple[Any]]') -> Any:
+        if not self.esLectura(consulta):
+            self.__contadores["escrituras"] += 1
+            self.__escribio = True
+            self.__ultima_escritura = monotonic()
+            return self.__abrir(self.__primaria)
+        if not self.__adherida():
+            lectora : Optional[BaseDeDatos_MySQL] = self.__lectoraDisponible()
+            if lectora is not None:
+                self.__contadores["lecturas_replicas"] += 1
+                return lectora
+        self.__contadores["lecturas_primaria"] += 1
+        return self.__abrir(self.__primaria)
+
+    def __lectoraDisponible(self) -> Optional[BaseDeDatos_MySQL]:
+        if self.__lectora is not None:
+            replica, lectora = self.__lectora
+            self.__replicas.registrarLectura(replica)
+            return lectora
+        for replica in self.__replicas.elegir():
+            lectora = self.__lectoras.get(id(replica))
+            if lectora is None:
+                lectora = self.__lectoras[id(replica)] = BaseDeDatos_MySQL(self.__configuracion, pool=replica.pool)
+            try:
+                self.__abrir(lectora)
+            except ErrorPoolLlena:
+                continue
+            except Exception as error:
+                self.__replicas.marcarCaida(replica, error)
+                self.__contadores["conmutaciones"] += 1
+                continue
+            if self.__profundidad: self.__lectora = (replica, lectora)
+            self.__replicas.registrarLectura(replica)
+            return lectora
+        return None
+
+    def ejecutar(self, consulta : 'str | Consulta | tuple[str, tuple[Any]]', ttl_cache : Optional[float] = None) -> Self:
+        """Ejecuta la consulta en la réplica o en la primaria, según su tipo (ver la descripción de la clase)."""
+        destino : Any = self.__destino(consulta)
+        self.__actual = destino
+        try:
+            destino.ejecutar(consulta, ttl_cache)
+        except BaseException as error:
+            if destino is not self.__primaria and self.__lectora is not None and not destino.estaConectado():
+                # La réplica se cayó durante el bloque: se la excluye y las próximas lecturas eligen otra.
+                self.__replicas.marcarCaida(self.__lectora[0], error)
+                self.__lectora = None
+            raise
+        return self
+
+    def devolverResultados(self, cantidad : Optional[int] = None) -> Optional[list[Resultado]]:
+        return self.__actual.devolverResultados(cantidad)
+
+    def devolverUnResultado(self) -> Optional[Resultado]:
+        return self.__actual.devolverUnResultado()
+
+    def iterarResultados(self, consulta : 'str | Consulta | tuple[str, tuple[Any]]', tamano_lote : int = 1000, cantidad : Optional[int] = None) -> Iterator[Resultado]:
+        return self.__destino(consulta).iterarResultados(consulta, tamano_lote, cantidad)
+
+    def devolverColumnas(self, consulta : 'str | Consulta | tuple[str, tuple[Any]]', tamano_lote : int = 10000, codificar_cadenas : bool = False, tipos : Optional[dict[str, str]] = None) -> dict[str, Any]:
+        return self.__destino(consulta).devolverColumnas(consulta, tamano_lote, codificar_cadenas, tipos)
+
+    def lote(self, consultas : Iterable['str | Consulta | tuple[str, tuple[Any]]']) -> list[ResultadoLote]:
+        consultas = list(consultas)
+        if not consultas: return []
+        escritura : Any = next((consulta for consulta in consultas if not self.esLectura(consulta)), None)
+        return self.__destino(consultas[0] if escritura is None else escritura).lote(consultas)
+
+    def devolverIdUltimaInsercion(self) -> Optional[int]:
+        return self.__primaria.devolverIdUltimaInsercion()
+
+    def devolverFilasAfectadas(self) -> int:
+        return self.__actual.devolverFilasAfectadas()
+
+    def maximoPaquete(self) -> int:
+        return self.__abrir(self.__primaria).maximoPaquete()
+
+    def incrementoAutonumerico(self) -> int:
+        return self.__abrir(self.__primaria).incrementoAutonumerico()
+
+    def idsConsecutivos(self) -> bool:
+        return self.__abrir(self.__primaria).idsConsecutivos()
+
+    def maximoParametros(self) -> int:
+        return self.__primaria.maximoParametros()
+
+    def admiteAliasFila(self) -> bool:
+        return self.__abrir(self.__primaria).admiteAliasFila()
+
+    @contextmanager
+    def transaccion(self) -> Iterator[Self]:
+        """Transacción en la primaria (ver `BaseDeDatos_MySQL.transaccion`); sus lecturas también van a la primaria."""
+        with self:
+            self.__abrir(self.__primaria)
+            with self.__primaria.transaccion():
+                yield self
+
+    def confirmar(self) -> Self:
+        self.__primaria.confirmar()
+        return self
+
+    def revertir(self) -> Self:
+        self.__primaria.revertir()
+        return self
+
+    def estadisticas(self) -> dict[str, Any]:
+        """Sentencias enviadas a réplicas y a la primaria, conmutaciones por réplicas caídas y estado de las réplicas."""
+        return {**self.__contadores, "replicas" : self.__replicas.estado()}
+
+    # Los bloques pueden anidarse: las conexiones (de la primaria y de la réplica) se liberan al salir del más externo.
+    def __enter__(self) -> 'BaseDeDatos_Replicada':
+        self.__profundidad += 1
+        return self
+
+    def __exit__(self, exc_type, excl_val, exc_tb) -> None:
+        self.__profundidad = max(self.__profundidad - 1, 0)
+        if self.__profundidad: return
+        abiertas : list[Any] = self.__abiertas
+        self.__abiertas = []
+        self.__lectora = None
+        self.__escribio = False
+        self.__actual = self.__primaria
+        for bdd in reversed(abiertas):
+            bdd.__exit__(exc_type, excl_val, exc_tb)
@@ -0,0 +1,92 @@
+from contextvars import ContextVar, Token
+from weakref import WeakValueDictionary
+
+from bdd.tipos import *
+
+
+class MapaIdentidad():
+    '''
+        Mapa de identidad de registros, indexado por (tabla, id) y activo dentro de un bloque `with`.
+
+        Mientras el mapa está activo, cargar un registro que ya fue cargado devuelve la misma instancia
+        sin consultar la base de datos, y los registros hidratados o guardados se agregan al mapa.
+        Las escrituras hechas con `ejecutar` (o `lote`) expiran los registros que pudieron cambiar: los
+        ids de la condición si la consulta la limita por id (`Where(id=...)`), si no toda la tabla.
+        Las instancias se guardan con referencias débiles: cuando nadie más las usa, el mapa las suelta.
+        El mapa activo se guarda en una variable de contexto, de modo que cada hilo o tarea de asyncio
+        tiene el suyo; los bloques pueden anidarse.
+
+        > with MapaIdentidad() as mapa:
+        >     a = Discos(bdd, id=2)
+        >     b = Discos(bdd, id=2)     # no consulta la base: a is b
+        >     bdd.ejecutar(Consulta().Update('Discos', nombre='Otro').Where(id=2))
+        >     c = Discos(bdd, id=2)     # el UPDATE expiró el id 2: vuelve a consultar
+
+        METODOS PUBLICOS
+        - actual() -> Optional[MapaIdentidad]  (método de clase)
+        - obtener(tabla, id) -> Optional[Registro]
+        - registrar(registro) -> None
+        - expirar(tabla, id = None) -> None
+        - vaciar() -> None
+        - estadisticas() -> dict[str, int]
+    '''
+
+    __actual : ContextVar[Optional['MapaIdentidad']] = ContextVar('mapa_identidad', default=None)
+
+    __slots__ = \
+    (
+        '__registros',
+        '__fichas',
+        '__aciertos',
+        '__fallos',
+    )
+
+    def __init__(self) -> None:
+        self.__registros : WeakValueDictionary[tuple[str, Any], Any] = WeakValueDictionary()
+        self.__fichas : list[Token] = []
+        self.__aciertos = 0
+        self.__fallos = 0
+
+    @classmethod
+    def actual(cls) -> Optional['MapaIdentidad']:
+        return cls.__actual.get()
+
+    def obtener(self, tabla : str, id : Any) -> Optional[Any]:
+        registro = self.__registros.get((tabla, id))
+        if registro is None: self.__fallos += 1
+        else: self.__aciertos += 1
+        return registro
+
+    def registrar(self, registro : Any) -> None:
+        if registro.id is None: return
+        try:
+            self.__registros[(registro.tabla, registro.id)] = registro
+        except TypeError:
+            # La clase del registro no admite referencias débiles (p. ej. __slots__ sin __weakref__).
+            pass
+
+    def expirar(self, tabla : str, id : Any = None) -> None:
+        """Quita del mapa un registro, o todos los de la tabla si no se indica `id`. Útil tras escrituras hechas por fuera de la biblioteca."""
+        if id is not None:
+            self.__registros.pop((tabla, id), None)
+            return
+        for clave in [clave for clave in self.__registros.keys() if clave[0] == tabla]:
+            self.__registros.pop(clave, None)
+
+    def vaciar(self) -> None:
+        self.__registros.clear()
+
+    def estadisticas(self) -> dict[str, int]:
+        return \
+        {
+            "aciertos" : self.__aciertos,
+            "fallos" : self.__fallos,
+            "registros" : len(self.__registros),
+        }
+
+    def __enter__(self) -> 'MapaIdentidad':
+        self.__fichas.append(MapaIdentidad.__actual.set(self))
+        return self
+
+    def __exit__(self, exc_type, excl_val, exc_tb) -> None:
+        MapaIdentidad.__actual.reset(self.__fichas.pop())
@@ -0,0 +1,405 @@
+from contextlib import contextmanager
+from enum import Enum
+from re import compile as compilarRegex, escape, IGNORECASE
+import sqlite3
+
+from bdd.tipos import *
+from bdd.errores import *
+from bdd.utiles import *
+from bdd.bdd import Consulta, BaseDeDatos_MySQL, ResultadoLote, _expirarRegistros
+from bdd.columnas import ConstructorColumnas
+
+
+# SQLite devuelve texto para las columnas de fecha y texto o números para las DECIMAL: se convierten según
+# el tipo declarado de la columna (la primera palabra, como `PARSE_DECLTYPES`). La conversión la hace cada
+# conexión al leer las filas; no se usa `sqlite3.register_converter`, cuyo registro comparte todo el proceso.
+_CONVERTIDORES : dict[str, Callable[[Any], Any]] = \
+{
+    'datetime' : lambda valor: datetime.fromisoformat(valor) if isinstance(valor, str) else valor,
+    'timestamp' : lambda valor: datetime.fromisoformat(valor) if isinstance(valor, str) else valor,
+    'date' : lambda valor: date.fromisoformat(valor) if isinstance(valor, str) else valor,
+    'time' : lambda valor: time.fromisoformat(valor) if isinstance(valor, str) else valor,
+    'decimal' : lambda valor: Decimal(str(valor)) if isinstance(valor, (str, int, float)) else valor,
+}
+
+
+class _CursorDescripcion():
+    # Cursor en memoria con las filas de un DESCRIBE emulado; imita la parte de sqlite3.Cursor que se usa.
+    __slots__ = ('description', 'lastrowid', 'rowcount', '__filas')
+
+    COLUMNAS : tuple[str] = ('Field', 'Type', 'Null', 'Key', 'Default', 'Extra')
+
+    def __init__(self, filas : list[tuple]) -> None:
+        self.description = tuple((nombre, None, None, None, None, None, None) for nombre in self.COLUMNAS)
+        self.lastrowid = None
+        self.rowcount = -1
+        self.__filas = list(filas)
+
+    def fetchone(self) -> Optional[tuple]:
+        return self.__filas.pop(0) if self.__filas else None
+
+    def fetchmany(self, cantidad : int) -> list[tuple]:
+        filas, self.__filas = self.__filas[:cantidad], self.__filas[cantidad:]
+        return filas
+
+    def fetchall(self) -> list[tuple]:
+        filas, self.__filas = self.__filas, []
+        return filas
+
+    def close(self) -> None: ...
+
+
+class BaseDeDatos_SQLite():
+    '''
+        Implementación de `ProtocoloBaseDeDatos` sobre una base SQLite del mismo proceso (sin red).
+        Los modelos `Tabla` funcionan sin cambios: `DESCRIBE` se emula con `PRAGMA table_info`
+        y las consultas de `Consulta` se traducen al dialecto de SQLite.
+
+        > bdd = BaseDeDatos_SQLite('discos.db')
+        > with bdd:
+        >     disco = Discos(bdd, id=2)
+        >     bdd.ejecutar(Consulta().Select('Discos', ['id', 'nombre']).Where(id=2)).devolverUnResultado()
+
+        Traducción de tipos en el DESCRIBE emulado:
+        - INTEGER, REAL y NUMERIC se informan como int, double y decimal.
+        - Una clave primaria INTEGER (alias de rowid) se informa como auto_increment.
+        - SQLite no tiene ENUM: una columna con `CHECK (columna IN ('A', 'B'))` se informa como enum('A','B').
+        Los valores Decimal y de fecha se guardan como texto y se leen según el tipo declarado de la columna
+        en las tablas de la consulta (las de `Consulta.tablas()`, o las de FROM / JOIN en SQL crudo).
+
+        `ON DUPLICATE KEY UPDATE columna = VALUES(columna)` (o `AS alias ... columna = alias.columna`) se
+        traduce a `ON CONFLICT DO UPDATE SET columna = excluded.columna`. SQLite cuenta 1 fila afectada tanto por fila insertada como por
+        fila actualizada (MySQL cuenta 2 por las actualizadas).
+
+        A diferencia de `BaseDeDatos_MySQL`, la conexión se abre al primer uso y queda abierta entre
+        bloques `with` (una base `:memory:` se pierde al cerrarla); `desconectar()` la cierra.
+
+        METODOS PUBLICOS
+        - conectar() -> Self
+        - desconectar() -> None
+        - ejecutar(consulta) -> Self
+        - devolverResultados(cantidad = None) -> Optional[list[Resultado]]
+        - devolverUnResultado() -> Optional[Resultado]
+        - iterarResultados(consulta, tamano_lote = 1000, cantidad = None) -> Iterator[Resultado]
+        - devolverColumnas(consulta, tamano_lote = 10000, codificar_cadenas = False, tipos = None) -> dict
+        - lote(consultas) -> list[ResultadoLote]
+        - devolverIdUltimaInsercion() -> Optional[int]
+        - devolverFilasAfectadas() -> int
+        - confirmar() -> Self
+        - revertir() -> Self
+        - transaccion() -> ContextManager[Self]
+
+        CASOS DE ERROR
+        - ErrorBDD: se ejecuta una consulta sobre una conexión cerrada con `desconectar()` en medio de un bloque `with`.
+        - sqlite3.Error: errores de la consulta, con el SQL y los parámetros en el mensaje.
+    '''
+
+    __slots__ = \
+    (
+        "__ruta",
+        "__opciones",
+        "__conexion",
+        "__cursor_activo",
+        "__profundidad",
+        "__autoconfirmar",
+        "__transacciones",
+        "__ultima_insercion",
+        "__declarados",
+        "__conversiones",
+    )
+
+    __DESCRIBE = compilarRegex(r'^\s*DESCRIBE\s+[`"]?(\w+)[`"]?\s*;?\s*$', IGNORECASE)
+    __DUPLICADOS = compilarRegex(r'(?:\bAS\s+(\w+)\s+)?\bON\s+DUPLICATE\s+KEY\s+UPDATE\b', IGNORECASE)
+    __VALORES_PROPUESTOS = compilarRegex(r'\bVALUES\s*\(\s*[`"]?(\w+)[`"]?\s*\)', IGNORECASE)
+    __TIPOS_AFINIDAD : dict[str, str] = {'integer' : 'int', 'real' : 'double', 'numeric' : 'decimal'}
+    __LITERAL = compilarRegex(r"'((?:[^']|'')*)'")
+    __TABLAS_LEIDAS = compilarRegex(r'\b(?:FROM|JOIN)\s+[`"\[]?(\w+)', IGNORECASE)
+    __DEFINICION = compilarRegex(r'^\s*(?:CREATE|ALTER|DROP)\b', IGNORECASE)
+
+    def __init__(self, ruta : str = ':memory:', autoconfirmar : bool = True, **opciones : Any) -> None:
+        """
+        :arg ruta str: archivo de la base de datos (o `:memory:`).
+        :arg autoconfirmar bool: como en `BaseDeDatos_MySQL`: si es `False`, las escrituras quedan en una
+            transacción hasta `confirmar()`; lo no confirmado se revierte al salir del bloque `with` más externo.
+        :arg opciones: se pasan a `sqlite3.connect` (p. ej. `check_same_thread=False`).
+        """
+        self.__ruta = ruta
+        self.__opciones = opciones
+        self.__conexion = None
+        self.__cursor_activo = None
+        self.__profundidad = 0
+        self.__autoconfirmar = autoconfirmar
+        self.__transacciones = 0
+        self.__ultima_insercion = None
+        # Tabla -> columna -> tipo declarado (primera palabra, en minúsculas), leído con PRAGMA table_info.
+        self.__declarados : dict[str, dict[str, str]] = {}
+        self.__conversiones : tuple[Optional[Callable[[Any], Any]], ...] = ()
+
+    def conectar(self) -> Self:
+        if self.__conexion is None:
+            # isolation_level=None: el módulo no abre transacciones implícitas; las maneja esta clase.
+            self.__conexion = sqlite3.connect(self.__ruta, isolation_level=None, **self.__opciones)
+            self.__declarados = {}
+        return self
+
+    def desconectar(self) -> None:
+        if self.__conexion is not None:
+            if self.__conexion.in_transaction: self.__conexion.rollback()
+            self.__conexion.close()
+        self.__conexion = None
+        self.__cursor_activo = None
+        self.__transacciones = 0
+        self.__conversiones = ()
+
+    @staticmethod
+    def __parametro(valor : Any) -> Any:
+        # MySQL acepta el índice de un ENUM; la restricción CHECK de SQLite necesita el nombre.
+        if isinstance(valor, Enum): return valor.name
+        valor = formatearParametroSQL(valor)
+        if isinstance(valor, Decimal): return str(valor)
+        if isinstance(valor, datetime): return valor.isoformat(sep=' ')
+        if isinstance(valor, (date, time)): return valor.isoformat()
+        return valor
+
+    @classmethod
+    def traducir(cls, consulta : str | Consulta | tuple[str, tuple[Any]]) -> tuple[str, tuple[Any]]:
+        """
+        Compila la consulta como `BaseDeDatos_MySQL.compilar` y la adapta a SQLite:
+        marcadores `?` en lugar de `%s` y parámetros en tipos que sqlite3 acepta.
+        """
+        if isinstance(consulta, Consulta):
+            sql, parametros = consulta.compilar(cls.__parametro)
+        else:
+            sql, parametros = BaseDeDatos_MySQL.compilar(consulta)
+            if parametros is None: return cls.__traducirDuplicados(sql), ()
+            parametros = tuple(cls.__parametro(valor) for valor in parametros)
+        return cls.__traducirDuplicados(sql).replace('%s', '?').replace('%%', '%'), parametros
+
+    @classmethod
+    def __traducirDuplicados(cls, sql : str) -> str:
+        # INSERT ... ON DUPLICATE KEY UPDATE c = VALUES(c)  ->  INSERT ... ON CONFLICT DO UPDATE SET c = excluded.c
+        # INSERT ... AS nueva ON DUPLICATE KEY UPDATE c = nueva.c  ->  ídem
+        duplicados = cls.__DUPLICADOS.search(sql)
+        if duplicados is None: return sql
+        actualizaciones : str = cls.__VALORES_PROPUESTOS.sub(r'excluded.\1', sql[duplicados.end():])
+        if alias := duplicados.group(1):
+            actualizaciones = compilarRegex(rf'\b{escape(alias)}\.').sub('excluded.', actualizaciones)
+        return sql[:duplicados.start()] + 'ON CONFLICT DO UPDATE SET' + actualizaciones
+
+    def __describir(self, tabla : str) -> _CursorDescripcion:
+        conexion = self.__conexion
+        columnas : list[tuple] = conexion.execute(f'PRAGMA table_info("{tabla}")').fetchall()
+        definicion : Optional[tuple] = conexion.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (tabla,)).fetchone()
+        definicion_sql : str = definicion[0] if definicion and definicion[0] else ''
+        primarias : int = sum(1 for columna in columnas if columna[5])
+
+        filas : list[tuple] = []
+        for _, nombre, tipo_declarado, no_nulo, por_defecto, primaria in columnas:
+            tipo : str = tipo_declarado.lower().strip()
+            base, _, resto = tipo.partition('(')
+            tipo = self.__TIPOS_AFINIDAD.get(base.strip(), base.strip()) + (f'({resto}' if resto else '')
+            restriccion = compilarRegex(rf"CHECK\s*\(\s*[`\"\[]?{escape(nombre)}[`\"\]]?\s+IN\s*\(((?:\s*'(?:[^']|'')*'\s*,?)*)\)", IGNORECASE).search(definicion_sql)
+            if restriccion:
+                # Sólo se descarta el espacio entre los literales: el de adentro es parte del valor.
+                tipo = 'enum(' + ','.join(f"'{literal}'" for literal in self.__LITERAL.findall(restriccion.group(1))) + ')'
+            # Una única clave primaria declarada INTEGER es alias de rowid: SQLite la numera sola.
+            autonumerica : bool = bool(primaria) and primarias == 1 and tipo_declarado.strip().upper() == 'INTEGER'
+            filas.append((nombre, tipo, 'NO' if no_nulo or primaria else 'YES', 'PRI' if primaria else '', por_defecto, 'auto_increment' if autonumerica else ''))
+        return _CursorDescripcion(filas)
+
+    def ejecutar(self, consulta : str | Consulta | tuple[str, tuple[Any]]) -> Self:
+        sql, parametros = self.traducir(consulta)
+        if self.__conexion is None:
+            if self.__profundidad: raise ErrorBDD("La conexión se cerró dentro de un bloque 'with'.")
+            self.conectar()
+        self.__conversiones = ()
+        if descripcion := self.__DESCRIBE.match(sql):
+            self.__cursor_activo = self.__describir(descripcion.group(1))
+            return self
+        try:
+            if not self.__autoconfirmar and not self.__conexion.in_transaction:
+                self.__conexion.execute('BEGIN')
+            self.__cursor_activo = self.__conexion.execute(sql, parametros)
+        except sqlite3.Error as f:
+            raise type(f)(f"No se pudo completar la consulta.\n {sql}\n Parámetros: {parametros}\n") from f
+        # En un INSERT de varias filas lastrowid es el id de la última; el protocolo pide el de la primera.
+        cursor = self.__cursor_activo
+        self.__ultima_insercion = cursor.lastrowid - max(cursor.rowcount - 1, 0) if cursor.lastrowid and sql.lstrip().upper().startswith('INSERT') else cursor.lastrowid
+        if cursor.description is not None: self.__conversiones = self.__conversionesColumnas(consulta, sql, cursor.description)
+        elif self.__DEFINICION.match(sql): self.__declarados = {}
+        _expirarRegistros(consulta, sql)
+        return self
+
+    def __tiposDeclarados(self, tabla : str) -> dict[str, str]:
+        if tabla not in self.__declarados:
+            columnas : list[tuple] = self.__conexion.execute(f'PRAGMA table_info("{tabla}")').fetchall()
+            self.__declarados[tabla] = {columna[1] : columna[2].lower().replace('(', ' ').split(' ', 1)[0] for columna in columnas if columna[2]}
+        return self.__declarados[tabla]
+
+    def __conversionesColumnas(self, consulta : str | Consulta | tuple[str, tuple[Any]], sql : str, descripcion : tuple) -> tuple[Optional[Callable[[Any], Any]], ...]:
+        # La conversión de cada columna del resultado, según su tipo declarado en la primera de las tablas
+        # de la consulta que la tenga; () si ninguna necesita conversión.
+        tablas : tuple[str, ...] = consulta.tablas() if isinstance(consulta, Consulta) else tuple(self.__TABLAS_LEIDAS.findall(sql))
+        declarados : list[dict[str, str]] = [self.__tiposDeclarados(tabla) for tabla in dict.fromkeys(tablas)]
+        conversiones : list[Optional[Callable[[Any], Any]]] = []
+        for campo in descripcion:
+            tipo : Optional[str] = next((tipos[campo[0]] for tipos in declarados if campo[0] in tipos), None)
+            conversiones.append(_CONVERTIDORES.get(tipo))
+        return tuple(conversiones) if any(conversiones) else ()
+
+    @staticmethod
+    def __convertir(filas : list[tuple], conversiones : tuple[Optional[Callable[[Any], Any]], ...]) -> list[tuple]:
+        if not conversiones: return filas
+        return [tuple(valor if conversion is None or valor is None else conversion(valor) for conversion, valor in zip(conversiones, fila)) for fila in filas]
+
+    def __filas(self, filas : list[tuple]) -> list[Resultado]:
+        nombres : list[str] = [columna[0] for columna in self.__cursor_activo.description]
+        return [dict(zip(nombres, fila)) for fila in self.__convertir(filas, self.__conversiones)]
+
+    def devolverResultados(self, cantidad : Optional[int] = None) -> Optional[list[Resultado]]:
+        if cantidad is not None and cantidad < 0: raise IndexError("Se solicitó una cantidad negativa de resultados, lo cual es un sinsentido.")
+        if cantidad == 0: return []
+        if self.__cursor_activo is None or self.__cursor_activo.description is None: return None
+        filas : list[tuple] = self.__cursor_activo.fetchall() if cantidad is None else self.__cursor_activo.fetchmany(cantidad)
+        return self.__filas(filas) or None
+
+    def devolverUnResultado(self) -> Optional[Resultado]:
+        if self.__cursor_activo is None or self.__cursor_activo.description is None: return None
+        fila : Optional[tuple] = self.__cursor_activo.fetchone()
+        return None if fila is None else self.__filas([fila])[0]
+
+    def iterarResultados(self, consulta : str | Consulta | tuple[str, tuple[Any]], tamano_lote : int = 1000, cantidad : Optional[int] = None) -> Iterator[Resultado]:
+        """Como `BaseDeDatos_MySQL.iterarResultados`: sqlite3 ya lee las filas a demanda, de a `tamano_lote`."""
+        if tamano_lote < 1: raise ValueError(f"El tamaño de lote debe ser positivo: {tamano_lote}.")
+        if cantidad is not None:
+            consulta = limitarSQL(*BaseDeDatos_MySQL.compilar(consulta), cantidad)
+        sql, parametros = self.traducir(consulta)
+
+        self.conectar()
+        cursor = self.__conexion.execute(sql, parametros)
+        try:
+            nombres : list[str] = [columna[0] for columna in cursor.description]
+            conversiones : tuple[Optional[Callable[[Any], Any]], ...] = self.__conversionesColumnas(consulta, sql, cursor.description)
+            while filas := cursor.fetchmany(tamano_lote):
+                for fila in self.__convertir(filas, conversiones):
+                    yield dict(zip(nombres, fila))
+        finally:
+            cursor.close()
+
+    def devolverColumnas(self, consulta : str | Consulta | tuple[str, tuple[Any]], tamano_lote : int = 10000, codificar_cadenas : bool = False, tipos : Optional[dict[str, str]] = None) -> dict[str, Any]:
+        """Como `BaseDeDatos_MySQL.devolverColumnas`; sqlite3 no informa tipos, que se deducen de los valores (o de `tipos`)."""
+        if tamano_lote < 1: raise ValueError(f"El tamaño de lote debe ser positivo: {tamano_lote}.")
+        constructor : ConstructorColumnas = ConstructorColumnas(codificar_cadenas, tipos)
+        sql, parametros = self.traducir(consulta)
+
+        self.conectar()
+        cursor = self.__conexion.execute(sql, parametros)
+        try:
+            constructor.describir(cursor.description)
+            conversiones : tuple[Optional[Callable[[Any], Any]], ...] = self.__conversionesColumnas(consulta, sql, cursor.description)
+            while filas := cursor.fetchmany(tamano_lote):
+                constructor.agregar(self.__convertir(filas, conversiones))
+            return constructor.columnas()
+        finally:
+            cursor.close()
+
+    def lote(self, consultas : Iterable[str | Consulta | tuple[str, tuple[Any]]]) -> list[ResultadoLote]:
+        """Como `BaseDeDatos_MySQL.lote`; sin red de por medio, las sentencias se ejecutan una tras otra."""
+        resultados : list[ResultadoLote] = []
+        fallida : bool = False
+        for consulta in consultas:
+            resultado : ResultadoLote = ResultadoLote()
+            resultados.append(resultado)
+            if fallida: continue
+            try:
+                self.ejecutar(consulta)
+            except sqlite3.Error as error:
+                resultado.error, fallida = error, True
+                continue
+            cursor = self.__cursor_activo
+            resultado.ejecutada = True
+            resultado.filas = (self.__filas(cursor.fetchall()) or None) if cursor.description else None
+            resultado.filas_afectadas = cursor.rowcount
+            resultado.id_ultima_insercion = self.__ultima_insercion
+        return resultados
+
+    def devolverIdUltimaInsercion(self) -> Optional[int]:
+        """Id del último INSERT; en uno de varias filas, el de la primera (el resto son consecutivos)."""
+        return self.__ultima_insercion
+
+    def devolverFilasAfectadas(self) -> int:
+        return self.__cursor_activo.rowcount
+
+    def maximoPaquete(self) -> int:
+        """Largo máximo de una sentencia (`SQLITE_MAX_SQL_LENGTH`, 1.000.000.000 bytes por defecto)."""
+        return 1_000_000_000
+
+    def incrementoAutonumerico(self) -> int:
+        return 1
+
+    def idsConsecutivos(self) -> bool:
+        # Un único escritor a la vez: las filas de un INSERT reciben rowids consecutivos.
+        return True
+
+    def maximoParametros(self) -> int:
+        """Cantidad máxima de marcadores por sentencia (`SQLITE_MAX_VARIABLE_NUMBER`)."""
+        self.conectar()
+        if hasattr(self.__conexion, 'getlimit'):
+            return self.__conexion.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+        return 999
+
+    def admiteAliasFila(self) -> bool:
+        """`traducir` entiende las dos formas de ON DUPLICATE KEY UPDATE; se usa `VALUES(columna)`."""
+        return False
+
+    def confirmar(self) -> Self:
+        """Confirma lo ejecutado desde la última confirmación (útil con `autoconfirmar=False`)."""
+        if self.__transacciones: raise ErrorBDD("No se puede confirmar manualmente dentro de transaccion(); se confirma al salir del bloque.")
+        if self.__conexion is not None: self.__conexion.commit()
+        return self
+
+    def revertir(self) -> Self:
+        """Revierte lo ejecutado desde la última confirmación."""
+        if self.__transacciones: raise ErrorBDD("No se puede revertir manualmente dentro de transaccion(); levante una excepción para revertir el bloque.")
+        if self.__conexion is not None: self.__conexion.rollback()
+        return self
+
+    @property
+    def enTransaccion(self) -> bool:
+        return self.__transacciones > 0
+
+    @contextmanager
+    def transaccion(self) -> Iterator[Self]:
+        """Como `BaseDeDatos_MySQL.transaccion`: confirma al salir, revierte ante excepciones y anida con SAVEPOINT."""
+        with self:
+            self.conectar()
+            nivel : int = self.__transacciones
+            punto : str = f"bdd_punto_{nivel}"
+            if nivel: self.__conexion.execute(f"SAVEPOINT {punto}")
+            elif not self.__conexion.in_transaction: self.__conexion.execute('BEGIN')
+            self.__transacciones += 1
+            try:
+                yield self
+            except BaseException:
+                self.__transacciones -= 1
+                if nivel: self.__conexion.execute(f"ROLLBACK TO SAVEPOINT {punto}")
+                else: self.__conexion.rollback()
+                raise
+            self.__transacciones -= 1
+            if nivel: self.__conexion.execute(f"RELEASE SAVEPOINT {punto}")
+            else: self.__conexion.commit()
+
+    def estaConectado(self) -> bool:
+        return self.__conexion is not None
+
+    # with bdd: los bloques pueden anidarse. Al salir del más externo se revierte lo no confirmado,
+    # como cuando BaseDeDatos_MySQL libera la conexión; la conexión en sí queda abierta.
+    def __enter__(self) -> 'BaseDeDatos_SQLite':
+        self.conectar()
+        self.__profundidad += 1
+        return self
+
+    def __exit__(self, exc_type, excl_val, exc_tb) -> None:
+        self.__profundidad = max(self.__profundidad - 1, 0)
+        if not self.__profundidad and self.__conexion is not None and self.__conexion.in_transaction:
+            self.__conexion.rollback()
@@ -1,9 +1,207 @@
+from inspect import iscoroutinefunction
+from threading import Lock
+from time import monotonic, perf_counter
+
 from bdd.tipos import *
 from bdd.utiles import *
-from bdd.bdd import ProtocoloBaseDeDatos
+from bdd.errores import *
+from bdd.bdd import ProtocoloBaseDeDatos, Consulta
 from bdd.registro import Registro
+from bdd.sesion import MapaIdentidad
+from bdd.instrumentacion import Instrumentacion
+
+class EsquemaTabla():
+    '''
+        Esquema resuelto de una tabla: lo que `Tabla` deduce a partir de `DESCRIBE`.
+        Se calcula una vez por clase y se guarda en el caché de esquemas de `Tabla`.
+    '''
+    __slots__ = \
+    (
+        'slots',
+        'anotaciones',
+        'claves',
+        'enums',
+        'momento',
+    )
+
+    def __init__(self, slots : tuple[str], anotaciones : dict[str,type], claves : tuple[str], enums : dict[str,type]) -> None:
+        self.slots = slots
+        self.anotaciones = anotaciones
+        self.claves = claves
+        self.enums = enums
+        self.momento = monotonic()
+
+    def vencido(self, ttl : Optional[float]) -> bool:
+        return ttl is not None and monotonic() - self.momento >= ttl
+
+
+class ResultadoInsertarOActualizar(NamedTuple):
+    '''
+        Filas insertadas y actualizadas por `Modelo.insertarOActualizarTodos`. Se deducen, por lote, de
+        las filas afectadas: MySQL cuenta 1 por fila insertada y 2 por fila actualizada, así que con `n`
+        filas y `a` afectadas hay `a - n` actualizadas y el resto insertadas.
+
+        Una fila existente que quedó igual no se distingue: MySQL le cuenta 0, de modo que cada una se
+        descuenta de `actualizados` y se suma a `insertados` (la suma de ambos siempre es el total de
+        filas escritas). Con SQLite, que cuenta 1 tanto por fila insertada como por actualizada, todas
+        se informan como insertadas.
+    '''
+    insertados : int
+    actualizados : int
+
+
+class Relacion():
+    '''
+        Relación entre modelos, declarada como atributo en el cuerpo del modelo:
+        - `Relacion('Artistas', 'idAutor')`: cada registro apunta, por su columna `idAutor`, a un
+          registro de `Artistas` (muchos a uno).
+        - `Relacion('Discos', 'idAutor', muchos=True)`: cada registro tiene la lista de `Discos` cuyo
+          `idAutor` es su id (uno a muchos).
+
+        Acceder al atributo carga lo relacionado la primera vez (una consulta por registro). Para un
+        conjunto de registros, `Modelo.precargar(bdd, registros, 'autor')` o el parámetro `precargar` de
+        `obtenerMuchos` / `iterar` lo cargan con una consulta `IN (...)` por lote y por relación, y lo
+        asignan a cada registro. Las rutas con punto (`'autor.sello'`) precargan relaciones anidadas.
+
+        Con una base de datos asincrónica (p. ej. `BaseDeDatos_MySQLAsincrono`) no hay carga diferida:
+        las relaciones deben precargarse con `await Modelo.precargarAsincrono(bdd, registros, 'autor')`
+        antes de accederlas.
+
+        > class Discos(metaclass=Tabla):
+        >     autor = Relacion('Artistas', 'idAutor')
+        >
+        > for disco in Discos.obtenerMuchos(bdd, ids, precargar=['autor']):
+        >     print(disco.autor.nombre)     # sin consultas adicionales
+
+        METODOS PUBLICOS
+        - modelo() -> Tabla
+        - precargar(bdd, registros, tamano_lote = 1000) -> list[Registro]
+        - precargarAsincrono(bdd, registros, tamano_lote = 1000) -> list[Registro]
+
+        CASOS DE ERROR
+        - ErrorTablaNoExiste: si el modelo relacionado no está declarado.
+        - ErrorMalaSolicitud: al asignar una relación de uno a muchos, o al acceder a una relación no
+          precargada de un registro de una base de datos asincrónica.
+    '''
+
+    __slots__ = \
+    (
+        '__modelo',
+        'columna',
+        'muchos',
+        'nombre',
+    )
+
+    def __init__(self, modelo : str | type, columna : str, muchos : bool = False) -> None:
+        """
+        :arg modelo str | Tabla: el modelo relacionado o su nombre (para declarar relaciones en cualquier orden).
+        :arg columna str: la clave foránea; en este modelo, o en el relacionado si `muchos`.
+        :arg muchos bool: relación de uno a muchos.
+        """
+        self.__modelo = modelo
+        self.columna = columna
+        self.muchos = muchos
+        self.nombre : Optional[str] = None
+
+    def __set_name__(self, propietario : type, nombre : str) -> None:
+        self.nombre = nombre
+
+    def modelo(self) -> 'Tabla':
+        return Tabla.modelo(self.__modelo) if isinstance(self.__modelo, str) else self.__modelo
+
+    # Lo cargado se guarda en el registro junto con la clave con que se cargó, para
+    # volver a cargarlo si la clave foránea cambia.
+    def __atributo(self) -> str:
+        return f"_Relacion__{self.nombre}"
+
+    def __clave(self, registro : Registro) -> Any:
+        return registro.id if self.muchos else getattr(registro, self.columna, None)
+
+    def __asignar(self, registro : Registro, valor : Any) -> None:
+        setattr(registro, self.__atributo(), (self.__clave(registro), valor))
+
+    def __get__(self, registro : Optional[Registro], propietario : Optional[type] = None) -> Any:
+        if registro is None: return self
+        cargado : Optional[tuple[Any, Any]] = getattr(registro, self.__atributo(), None)
+        if cargado is None or cargado[0] != self.__clave(registro):
+            bdd : ProtocoloBaseDeDatos = getattr(registro, atributoPrivado(registro, '__bdd'))
+            if iscoroutinefunction(bdd.ejecutar):
+                raise ErrorMalaSolicitud(f"La relación {self.nombre} de {registro.tabla} no está cargada: use `await {type(registro).__name__}.precargarAsincrono(bdd, registros, '{self.nombre}')`.")
+            self.precargar(bdd, [registro])
+            cargado = getattr(registro, self.__atributo())
+        return cargado[1]
+
+    def __set__(self, registro : Registro, valor : Optional[Registro]) -> None:
+        if self.muchos:
+            raise ErrorMalaSolicitud(f"La relación {self.nombre} es de uno a muchos: asigne `{self.columna}` en cada registro relacionado.")
+        setattr(registro, self.columna, None if valor is None else valor.id)
+        self.__asignar(registro, valor)
+
+    def precargar(self, bdd : ProtocoloBaseDeDatos, registros : Iterable[Registro], tamano_lote : int = 1000) -> list[Registro]:
+        """
+        Carga lo relacionado de todos los `registros` con una consulta `IN (...)` por lote y lo asigna
+        a cada uno.
+
+        Devuelve:
+        :arg Relacionados list[Registro]: los registros relacionados cargados, sin repetir.
+        """
+        registros = [registro for registro in registros if registro is not None]
+        modelo : Tabla = self.modelo()
+        claves : list[Any] = self.__claves(registros)
+        if self.muchos:
+            return self.__repartir(registros, claves, modelo.obtenerPorColumna(bdd, self.columna, claves, tamano_lote))
+        return self.__repartir(registros, claves, modelo.obtenerMuchos(bdd, claves, tamano_lote))
+
+    async def precargarAsincrono(self, bdd : ProtocoloBaseDeDatos, registros : Iterable[Registro], tamano_lote : int = 1000) -> list[Registro]:
+        """Como `precargar`, para bases de datos asincrónicas."""
+        registros = [registro for registro in registros if registro is not None]
+        modelo : Tabla = self.modelo()
+        claves : list[Any] = self.__claves(registros)
+        if self.muchos:
+            return self.__repartir(registros, claves, await modelo.obtenerPorColumnaAsincrono(bdd, self.columna, claves, tamano_lote))
+        return self.__repartir(registros, claves, await modelo.obtenerMuchosAsincrono(bdd, claves, tamano_lote))
+
+    def __claves(self, registros : list[Registro]) -> list[Any]:
+        return list(dict.fromkeys(clave for registro in registros if (clave := self.__clave(registro)) is not None))
+
+    # `cargados` son los registros de `obtenerPorColumna` (uno a muchos) o de `obtenerMuchos`, en el
+    # orden de `claves` (muchos a uno).
+    def __repartir(self, registros : list[Registro], claves : list[Any], cargados : list[Optional[Registro]]) -> list[Registro]:
+        if self.muchos:
+            grupos : dict[Any, list[Registro]] = {clave : [] for clave in claves}
+            for relacionado in cargados:
+                grupo : Optional[list[Registro]] = grupos.get(getattr(relacionado, self.columna, None))
+                if grupo is not None: grupo.append(relacionado)
+            for registro in registros:
+                self.__asignar(registro, grupos.get(self.__clave(registro), []))
+            return [relacionado for grupo in grupos.values() for relacionado in grupo]
+
+        encontrados : dict[Any, Optional[Registro]] = dict(zip(claves, cargados))
+        for registro in registros:
+            self.__asignar(registro, encontrados.get(self.__clave(registro)))
+        return [relacionado for relacionado in encontrados.values() if relacionado is not None]
+
 
 class Tabla(type):
+    '''
+        Metaclase de los modelos. El esquema de cada modelo (slots, anotaciones, propiedad de clave
+        primaria y enumeraciones) se resuelve con `DESCRIBE` la primera vez que se instancia y queda
+        en caché para el resto del proceso.
+
+        - `ttl_esquema`: segundos de validez del esquema en caché (`None`: sin vencimiento). Puede
+          redefinirse como atributo de clase en cada modelo.
+        - `Modelo.refrescarEsquema()` invalida el esquema de un modelo; `Tabla.refrescarEsquema()`
+          invalida el de todos.
+        - `Tabla.modelo(nombre)` devuelve un modelo declarado por su nombre (lo usa `Relacion`).
+        - Si el modelo declara `descripcionTabla` (ver `python -m bdd.generar`), el esquema se resuelve
+          a partir de ella al crear la clase y nunca se ejecuta `DESCRIBE`.
+    '''
+    ttl_esquema : Optional[float] = None
+
+    __esquemas : dict[type, EsquemaTabla] = {}
+    __modelos : dict[str, type] = {}
+    __cerrojo : Lock = Lock()
+
     def __new__(mcs, nombre, bases, atributos):
         if Registro not in bases and nombre != 'Registro':
             bases = (Registro,) + bases
@@ -12,10 +210,22 @@ class Tabla(type):
         
         cls.__tabla = nombre
         setattr(cls, "tabla", property(lambda cls : cls.__tabla))
+        Tabla.__modelos[nombre] = cls
 
         
         if not hasattr(cls, '__annotations__'):
             cls.__annotations__ = {}
+        # `__weakref__` y `__dict__` no son columnas (los declaran los modelos generados con `bdd.generar`).
+        cls.__slots_declarados = tuple(slot for slot in cls.__slots__ if slot not in ('__weakref__', '__dict__'))
+        cls.__anotaciones_declaradas = dict(cls.__annotations__)
+        # Sin un `__init__` propio (ni heredado de otro modelo), las filas se hidratan con `desdeFila`.
+        cls.__hidratacion_directa = '__init__' not in atributos and all(getattr(base, '_Tabla__hidratacion_directa', True) for base in bases)
+
+        if atributos.get('descripcionTabla') is not None:
+            esquema : EsquemaTabla = cls.__esquemaDesdeDescripcion(list(cls.descripcionTabla))
+            with Tabla.__cerrojo:
+                cls.__aplicarEsquema(esquema)
+                Tabla.__esquemas[cls] = esquema
         
         return cls
 
@@ -23,50 +233,532 @@ class Tabla(type):
         #print(cls.__slots__)
 
     def __call__(cls, bdd: ProtocoloBaseDeDatos, *posicionales, **nominales):
+        mapa : Optional[MapaIdentidad] = MapaIdentidad.actual()
+        if mapa is not None:
+            id : Any = cls.__idSolicitado(posicionales, nominales)
+            existente : Optional[Registro] = mapa.obtener(cls.__tabla, id) if id is not None else None
+            if existente is not None: return existente
+
+        cls.esquema(bdd)
+        fila : bool = bool(posicionales) and isinstance(posicionales[0], dict)
+        instrumentacion : Optional[Instrumentacion] = Instrumentacion.actual()
+        inicio : float = perf_counter() if instrumentacion is not None and fila else 0.0
+        if fila and len(posicionales) == 1 and not nominales and cls.__hidratacion_directa:
+            instancia = cls.desdeFila(bdd, posicionales[0])
+        else:
+            instancia = super().__call__(bdd, *posicionales, **nominales)
+        # Sólo se mide la hidratación desde una fila; cargar por id ejecuta (y mide) su propia consulta.
+        if instrumentacion is not None and fila: instrumentacion.hidratado(perf_counter() - inicio)
+        setattr(instancia, atributoPrivado(instancia,"__bdd"),bdd)
+        if mapa is not None: mapa.registrar(instancia)
+        return instancia
+
+    @staticmethod
+    def modelo(nombre : str) -> 'Tabla':
+        """
+        Devuelve el modelo declarado con ese nombre.
+
+        Levanta:
+        :arg ErrorTablaNoExiste: si no hay un modelo con ese nombre.
+        """
+        modelo : Optional[Tabla] = Tabla.__modelos.get(nombre)
+        if modelo is None: raise ErrorTablaNoExiste(f"No hay un modelo declarado con el nombre {nombre}.")
+        return modelo
+
+    @staticmethod
+    def __idSolicitado(posicionales : tuple, nominales : dict) -> Any:
+        # Id del registro que se va a construir: el id pedido o el de la fila a hidratar.
+        solicitud : Any = posicionales[0] if posicionales else nominales.get('id', nominales.get('valores'))
+        if isinstance(solicitud, dict): return solicitud.get('id')
+        if isinstance(solicitud, int) and not isinstance(solicitud, bool): return solicitud
+        return None
+
+    def esquema(cls, bdd : ProtocoloBaseDeDatos) -> EsquemaTabla:
+        """
+        Devuelve el esquema del modelo. Sólo consulta la base de datos si el esquema no está en caché
+        o si venció su `ttl_esquema`.
+        """
+        esquema : Optional[EsquemaTabla] = cls.__esquemaVigente()
+        if esquema is not None:
+            return esquema
+        with Tabla.__cerrojo:
+            esquema = cls.__esquemaVigente()
+            if esquema is None:
+                esquema = cls.__esquemaDesdeDescripcion(cls.__describir(bdd))
+                cls.__aplicarEsquema(esquema)
+                Tabla.__esquemas[cls] = esquema
+        return esquema
+
+    async def esquemaAsincrono(cls, bdd : ProtocoloBaseDeDatos) -> EsquemaTabla:
+        """Como `esquema`, para bases de datos asincrónicas (p. ej. `BaseDeDatos_MySQLAsincrono`)."""
+        esquema : Optional[EsquemaTabla] = cls.__esquemaVigente()
+        if esquema is not None:
+            return esquema
+        if cls.descripcionTabla is not None:
+            resultados : list[Resultado] = list(cls.descripcionTabla)
+        else:
+            async with bdd:
+                await bdd.ejecutar(f"DESCRIBE {cls.__tabla};")
+                resultados : list[Resultado] = await bdd.devolverResultados()
+        esquema = cls.__esquemaDesdeDescripcion(resultados)
+        with Tabla.__cerrojo:
+            cls.__aplicarEsquema(esquema)
+            Tabla.__esquemas[cls] = esquema
+        return esquema
+
+    def __esquemaVigente(cls) -> Optional[EsquemaTabla]:
+        esquema : Optional[EsquemaTabla] = Tabla.__esquemas.get(cls)
+        return None if esquema is None or esquema.vencido(cls.ttl_esquema) else esquema
+
+    def refrescarEsquema(cls = None) -> None:
+        """
+        Invalida el esquema en caché: el del modelo si se llama como `Modelo.refrescarEsquema()`,
+        o el de todos los modelos si se llama como `Tabla.refrescarEsquema()`.
+        El esquema se vuelve a resolver en la próxima instanciación.
+        """
+        with Tabla.__cerrojo:
+            if cls is None: Tabla.__esquemas.clear()
+            else: Tabla.__esquemas.pop(cls, None)
+
+    def obtenerMuchos(cls, bdd : ProtocoloBaseDeDatos, ids : Iterable[int], tamano_lote : int = 1000, estricto : bool = False, columnas : Optional[Iterable[str]] = None, precargar : Iterable[str] = ()) -> list[Optional[Registro]]:
+        """
+        Carga muchos registros del modelo por id con una consulta `WHERE id IN (...)` por cada lote de
+        `tamano_lote` ids (en lugar de una consulta por registro). Con un `MapaIdentidad` activo, los
+        registros que ya están en el mapa no se vuelven a consultar.
+        `columnas` limita las columnas traídas (ver `columnasSeleccionadas`); el resto queda pendiente.
+        `precargar` nombra las relaciones a cargar para todos los registros (ver `precargar`).
+
+        Devuelve:
+        :arg Registros list[Optional[Registro]]: en el mismo orden que `ids`; `None` en la posición de
+            los ids que no existen.
+
+        Levanta:
+        :arg SinResultado: si `estricto` y alguno de los ids no existe.
+        """
+        ids = list(ids)
+        unicos : list[int] = list(dict.fromkeys(ids))
+        esquema : EsquemaTabla = cls.esquema(bdd)
+        clave : str = esquema.claves[0] if esquema.claves else 'id'
+        columnas : list[str] = cls.columnasSeleccionadas(columnas)
+
+        encontrados : dict[int, Registro] = {}
+        mapa : Optional[MapaIdentidad] = MapaIdentidad.actual()
+        if mapa is not None:
+            for id in unicos:
+                registro : Optional[Registro] = mapa.obtener(cls.__tabla, id)
+                if registro is not None: encontrados[id] = registro
+        pendientes : list[int] = [id for id in unicos if id not in encontrados]
+
+        with bdd as bdd:
+            for inicio in range(0, len(pendientes), tamano_lote):
+                lote : list[int] = pendientes[inicio:inicio + tamano_lote]
+                bdd.ejecutar(Consulta().Select(cls.__tabla, columnas).Where(TipoCondicion.EN, **{clave : lote}))
+                for fila in bdd.devolverResultados() or ():
+                    encontrados[fila[clave]] = cls(bdd, fila)
+
+        if estricto:
+            faltantes : list[int] = [id for id in unicos if id not in encontrados]
+            if faltantes: raise SinResultado(f"No existen registros de {cls.__tabla} con id: {', '.join(map(str, faltantes))}.")
+        if precargar: cls.precargar(bdd, encontrados.values(), *precargar, tamano_lote=tamano_lote)
+        return [encontrados.get(id) for id in ids]
+
+    def obtenerPorColumna(cls, bdd : ProtocoloBaseDeDatos, columna : str, valores : Iterable[Any], tamano_lote : int = 1000, columnas : Optional[Iterable[str]] = None) -> list[Registro]:
+        """
+        Carga los registros del modelo cuya `columna` toma alguno de los `valores`, con una consulta
+        `WHERE columna IN (...)` por cada lote de `tamano_lote` valores, en orden de clave primaria.
+        """
+        valores = list(dict.fromkeys(valores))
+        esquema : EsquemaTabla = cls.esquema(bdd)
+        clave : str = esquema.claves[0] if esquema.claves else 'id'
+        seleccion : list[str] = cls.columnasSeleccionadas(columnas)
+
+        filas : list[Resultado] = []
+        with bdd as bdd:
+            for inicio in range(0, len(valores), tamano_lote):
+                lote : list[Any] = valores[inicio:inicio + tamano_lote]
+                consulta : Consulta = Consulta().Select(cls.__tabla, seleccion).Where(TipoCondicion.EN, **{columna : lote}).OrderBy(clave)
+                filas.extend(bdd.ejecutar(consulta).devolverResultados() or ())
+            return [cls(bdd, fila) for fila in filas]
+
+    async def obtenerPorColumnaAsincrono(cls, bdd : ProtocoloBaseDeDatos, columna : str, valores : Iterable[Any], tamano_lote : int = 1000, columnas : Optional[Iterable[str]] = None) -> list[Registro]:
+        """Como `obtenerPorColumna`, para bases de datos asincrónicas."""
+        valores = list(dict.fromkeys(valores))
+        esquema : EsquemaTabla = await cls.esquemaAsincrono(bdd)
+        clave : str = esquema.claves[0] if esquema.claves else 'id'
+        seleccion : list[str] = cls.columnasSeleccionadas(columnas)
+
+        filas : list[Resultado] = []
+        async with bdd:
+            for inicio in range(0, len(valores), tamano_lote):
+                lote : list[Any] = valores[inicio:inicio + tamano_lote]
+                await bdd.ejecutar(Consulta().Select(cls.__tabla, seleccion).Where(TipoCondicion.EN, **{columna : lote}).OrderBy(clave))
+                filas.extend(await bdd.devolverResultados() or ())
+        return [cls(bdd, fila) for fila in filas]
+
+    def precargar(cls, bdd : ProtocoloBaseDeDatos, registros : Iterable[Registro], *relaciones : str, tamano_lote : int = 1000) -> None:
+        """
+        Carga las `relaciones` (atributos `Relacion` del modelo) de todos los `registros` con una consulta
+        `IN (...)` por lote y por relación, en lugar de una consulta por registro, y asigna lo cargado a
+        cada registro. Las rutas con punto precargan relaciones de los registros relacionados.
+
+        > discos = Discos.obtenerMuchos(bdd, ids)
+        > Discos.precargar(bdd, discos, 'autor', 'autor.sello')
+
+        Levanta:
+        :arg ErrorMalaSolicitud: si alguna de las relaciones no está declarada en el modelo.
+        """
+        registros = [registro for registro in registros if registro is not None]
+        for nombre, resto in cls.__rutasRelaciones(relaciones).items():
+            relacion : Relacion = cls.__relacion(nombre)
+            relacionados : list[Registro] = relacion.precargar(bdd, registros, tamano_lote)
+            if resto: relacion.modelo().precargar(bdd, relacionados, *resto, tamano_lote=tamano_lote)
+
+    async def precargarAsincrono(cls, bdd : ProtocoloBaseDeDatos, registros : Iterable[Registro], *relaciones : str, tamano_lote : int = 1000) -> None:
+        """
+        Como `precargar`, para bases de datos asincrónicas, donde las relaciones no se cargan al
+        accederlas y deben precargarse.
+
+        > discos = await Discos.obtenerMuchosAsincrono(bdd, ids)
+        > await Discos.precargarAsincrono(bdd, discos, 'autor', 'autor.sello')
+        """
+        registros = [registro for registro in registros if registro is not None]
+        for nombre, resto in cls.__rutasRelaciones(relaciones).items():
+            relacion : Relacion = cls.__relacion(nombre)
+            relacionados : list[Registro] = await relacion.precargarAsincrono(bdd, registros, tamano_lote)
+            if resto: await relacion.modelo().precargarAsincrono(bdd, relacionados, *resto, tamano_lote=tamano_lote)
+
+    @staticmethod
+    def __rutasRelaciones(relaciones : Iterable[str]) -> dict[str, list[str]]:
+        anidadas : dict[str, list[str]] = {}
+        for ruta in relaciones:
+            nombre, _, resto = ruta.partition('.')
+            anidadas.setdefault(nombre, [])
+            if resto: anidadas[nombre].append(resto)
+        return anidadas
+
+    def __relacion(cls, nombre : str) -> Relacion:
+        relacion : Any = getattr(cls, nombre, None)
+        if not isinstance(relacion, Relacion):
+            raise ErrorMalaSolicitud(f"{cls.__tabla} no tiene una relación {nombre}.")
+        return relacion
+
+    def iterar(cls, bdd : ProtocoloBaseDeDatos, tamano_lote : int = 5000, desde : Optional[Any] = None, columnas : Optional[Iterable[str]] = None, precargar : Iterable[str] = (), **filtros : Any) -> Iterator[Registro]:
+        """
+        Recorre todos los registros del modelo que cumplen `filtros` (igualdades por columna), en orden
+        de clave primaria, trayéndolos de a `tamano_lote` con paginación por clave (keyset):
+        cada página es `WHERE id > ultimo_id ORDER BY id LIMIT tamano_lote`, de modo que su costo no
+        crece con la profundidad (a diferencia de `Limit(desplazamiento, ...)`).
+
+        La conexión se toma sólo mientras se lee cada página. Para retomar un recorrido interrumpido,
+        pase en `desde` la última clave procesada. `columnas` limita las columnas traídas y `precargar`
+        carga relaciones por página, como en `obtenerMuchos`.
+
+        > for disco in Discos.iterar(bdd, tamano_lote=5000, publicado=True):
+        >     exportar(disco)
+        """
+        if tamano_lote < 1: raise ValueError(f"El tamaño de lote debe ser positivo: {tamano_lote}.")
+        esquema : EsquemaTabla = cls.esquema(bdd)
+        clave : str = esquema.claves[0] if esquema.claves else 'id'
+        columnas : list[str] = cls.columnasSeleccionadas(columnas)
+
+        ultimo : Optional[Any] = desde
+        while True:
+            consulta : Consulta = Consulta().Select(cls.__tabla, columnas)
+            if filtros: consulta.Where(**filtros)
+            if ultimo is not None: consulta.Where(TipoCondicion.MAYOR, **{clave : ultimo})
+            consulta.OrderBy(clave).Limit(0, tamano_lote)
+            with bdd as bdd:
+                filas : list[Resultado] = bdd.ejecutar(consulta).devolverResultados() or []
+                registros : list[Registro] = [cls(bdd, fila) for fila in filas]
+            if precargar: cls.precargar(bdd, registros, *precargar, tamano_lote=tamano_lote)
+            yield from registros
+            if len(filas) < tamano_lote: return
+            ultimo = filas[-1][clave]
+
+    async def obtenerAsincrono(cls, bdd : ProtocoloBaseDeDatos, id : int, estricto : bool = False) -> Optional[Registro]:
+        """
+        Carga un registro por id desde una base de datos asincrónica. Devuelve `None` si no existe
+        (o levanta `SinResultado` si `estricto`).
+        """
+        registros : list[Optional[Registro]] = await cls.obtenerMuchosAsincrono(bdd, [id], estricto=estricto)
+        return registros[0]
+
+    async def obtenerMuchosAsincrono(cls, bdd : ProtocoloBaseDeDatos, ids : Iterable[int], tamano_lote : int = 1000, estricto : bool = False, columnas : Optional[Iterable[str]] = None) -> list[Optional[Registro]]:
+        """Como `obtenerMuchos`, para bases de datos asincrónicas."""
+        ids = list(ids)
+        unicos : list[int] = list(dict.fromkeys(ids))
+        esquema : EsquemaTabla = await cls.esquemaAsincrono(bdd)
+        clave : str = esquema.claves[0] if esquema.claves else 'id'
+        columnas : list[str] = cls.columnasSeleccionadas(columnas)
+
+        encontrados : dict[int, Registro] = {}
+        mapa : Optional[MapaIdentidad] = MapaIdentidad.actual()
+        if mapa is not None:
+            for id in unicos:
+                registro : Optional[Registro] = mapa.obtener(cls.__tabla, id)
+                if registro is not None: encontrados[id] = registro
+        pendientes : list[int] = [id for id in unicos if id not in encontrados]
+
+        async with bdd:
+            for inicio in range(0, len(pendientes), tamano_lote):
+                lote : list[int] = pendientes[inicio:inicio + tamano_lote]
+                await bdd.ejecutar(Consulta().Select(cls.__tabla, columnas).Where(TipoCondicion.EN, **{clave : lote}))
+                for fila in await bdd.devolverResultados() or ():
+                    encontrados[fila[clave]] = cls(bdd, fila)
+
+        if estricto:
+            faltantes : list[int] = [id for id in unicos if id not in encontrados]
+            if faltantes: raise SinResultado(f"No existen registros de {cls.__tabla} con id: {', '.join(map(str, faltantes))}.")
+        return [encontrados.get(id) for id in ids]
+
+    def cargarDiferidas(cls, bdd : ProtocoloBaseDeDatos, registros : Iterable[Registro], columnas : Optional[Iterable[str]] = None, tamano_lote : int = 1000) -> None:
+        """
+        Trae las columnas pendientes (diferidas o fuera de la proyección) de muchos registros con una
+        consulta `WHERE id IN (...)` por lote, en lugar de una consulta por registro al acceder a cada
+        atributo. `columnas` limita cuáles se cargan; por defecto, todas las pendientes.
+
+        > discos = Discos.obtenerMuchos(bdd, ids)
+        > Discos.cargarDiferidas(bdd, discos, ['detalles'])
+        """
+        filtro : Optional[frozenset[str]] = None if columnas is None else frozenset(columnas)
+        incompletos : list[Registro] = [
+            registro for registro in registros
+            if registro is not None and registro.id is not None and registro.columnasPendientes
+        ]
+        if not incompletos: return
+        pendientes : frozenset[str] = frozenset().union(*(registro.columnasPendientes for registro in incompletos))
+        if filtro is not None: pendientes = pendientes.intersection(filtro)
+        if not pendientes: return
+
+        esquema : EsquemaTabla = cls.esquema(bdd)
+        clave : str = esquema.claves[0] if esquema.claves else 'id'
+        seleccion : list[str] = [clave, *(atributo for atributo in cls.columnas() if atributo in pendientes)]
+        por_id : dict[Any, list[Registro]] = {}
+        for registro in incompletos:
+            if filtro is None or not filtro.isdisjoint(registro.columnasPendientes):
+                por_id.setdefault(registro.id, []).append(registro)
+        ids : list[Any] = list(por_id)
+
+        with bdd as bdd:
+            for inicio in range(0, len(ids), tamano_lote):
+                lote : list[Any] = ids[inicio:inicio + tamano_lote]
+                bdd.ejecutar(Consulta().Select(cls.__tabla, seleccion).Where(TipoCondicion.EN, **{clave : lote}))
+                for fila in bdd.devolverResultados() or ():
+                    for registro in por_id.get(fila[clave], ()):
+                        registro.completarColumnas(fila)
+
+    def guardarTodos(cls, bdd : ProtocoloBaseDeDatos, registros : Iterable[Registro]) -> list[int]:
+        """
+        Guarda muchos registros del modelo de una vez, en una única transacción (`bdd.transaccion()`):
+        si algo falla no queda escrito ninguno. Los registros nuevos (sin id) se insertan con INSERT de
+        varias filas, divididos en lotes que no superan `max_allowed_packet`, y reciben el id generado;
+        los que ya tienen id se actualizan con las columnas modificadas (ver `Registro.cambios()`).
+        Los ids y el estado de guardado de los registros se actualizan recién al confirmar.
+
+        Los ids de un INSERT de varias filas se deducen del primero, así que requieren ids consecutivos
+        (`bdd.idsConsecutivos()`). Con `innodb_autoinc_lock_mode = 2` InnoDB no los garantiza y los
+        registros nuevos se insertan de a uno, leyendo el id de cada INSERT.
+
+        Devuelve:
+        :arg Ids list[int]: los ids de los registros, en el mismo orden.
+        """
+        registros = list(registros)
+        existentes : list[tuple[Registro, dict[str, Any]]] = [(registro, registro.cambios()) for registro in registros if registro.id is not None]
+        nuevos : list[Registro] = [registro for registro in registros if registro.id is None]
+        if not nuevos and not any(ediciones for _, ediciones in existentes): return [registro.id for registro in registros]
+
+        esquema : EsquemaTabla = cls.esquema(bdd)
+        clave : str = esquema.claves[0] if esquema.claves else 'id'
+        columnas : list[str] = [atributo for atributo in cls.columnas() if '__' not in atributo]
+        filas : list[tuple] = [tuple(getattr(registro, columna, None) for columna in columnas) for registro in nuevos]
+        ids_nuevos : list[int] = []
+
+        with bdd.transaccion() as bdd:
+            for registro, ediciones in existentes:
+                if ediciones: bdd.ejecutar(Consulta().Update(cls.__tabla, **ediciones).Where(id=registro.id))
+            if nuevos and bdd.idsConsecutivos():
+                incremento : int = bdd.incrementoAutonumerico()
+                for consulta, cantidad in Consulta.lotesInsertMultiple(cls.__tabla, columnas, filas, bdd.maximoPaquete(), bdd.maximoParametros()):
+                    primer_id : int = bdd.ejecutar(consulta).devolverIdUltimaInsercion()
+                    ids_nuevos.extend(primer_id + i * incremento for i in range(cantidad))
+            elif nuevos:
+                for fila in filas:
+                    ids_nuevos.append(bdd.ejecutar(Consulta().InsertMultiple(cls.__tabla, columnas, [fila])).devolverIdUltimaInsercion())
+
+        for registro, _ in existentes:
+            registro.marcarComoGuardado()
+        for registro, id in zip(nuevos, ids_nuevos):
+            setattr(registro, atributoPrivado(registro, f"__{clave}"), id)
+            registro.marcarComoGuardado()
+
+        mapa : Optional[MapaIdentidad] = MapaIdentidad.actual()
+        if mapa is not None:
+            # Los UPDATE expiraron del mapa los registros existentes; éstos son los que quedaron al día.
+            for registro in registros: mapa.registrar(registro)
+
+        return [registro.id for registro in registros]
 
+    def insertarOActualizarTodos(cls, bdd : ProtocoloBaseDeDatos, filas : Iterable[Registro | Resultado], actualizar : Optional[Iterable[str]] = None) -> ResultadoInsertarOActualizar:
+        """
+        Escribe muchas filas del modelo con `INSERT ... ON DUPLICATE KEY UPDATE`, en lotes que no superan
+        `max_allowed_packet`: las que chocan con la clave primaria o con un índice único se actualizan y
+        las demás se insertan, en una sentencia por lote y sin leerlas antes.
+
+        Cada fila es un registro del modelo (se escriben su clave, si la tiene, y sus `columnasCargadas`)
+        o un diccionario columna -> valor. Las filas con distintas columnas se escriben en sentencias
+        separadas. Los registros escritos con id quedan marcados como guardados. Los que no tenían id
+        siguen sin guardar: MySQL no informa qué filas se insertaron ni con qué id (para eso, `guardarTodos`).
+        Con MySQL 8.0.19 o posterior se usa la forma `VALUES (...) AS nueva ... columna = nueva.columna`.
+
+        :arg actualizar Optional[Iterable[str]]: columnas a actualizar cuando la fila ya existe; por
+            defecto, todas las escritas salvo la clave.
+
+        > insertados, actualizados = Discos.insertarOActualizarTodos(bdd, filas, actualizar=['precio'])
+
+        Devuelve:
+        :arg Resultado ResultadoInsertarOActualizar: filas insertadas y actualizadas, sumadas sobre los
+            lotes (ver `ResultadoInsertarOActualizar` para las filas existentes que quedaron iguales).
+
+        Levanta:
+        :arg ErrorMalaSolicitud: si una columna no existe en el modelo o no queda ninguna para actualizar.
+        """
+        esquema : EsquemaTabla = cls.esquema(bdd)
+        clave : str = esquema.claves[0] if esquema.claves else 'id'
+        existentes : frozenset[str] = frozenset(atributoPublico(atributo) for atributo in cls.columnas())
+        if actualizar is not None:
+            actualizar = list(actualizar)
+            desconocidas : set[str] = set(actualizar).difference(existentes)
+            if desconocidas: raise ErrorMalaSolicitud(f"{cls.__name__} no tiene las columnas: {', '.join(sorted(desconocidas))}.")
+
+        # Filas agrupadas por columnas escritas; los registros se recuerdan para marcarlos como guardados.
+        grupos : dict[tuple[str], tuple[list[tuple], list[Registro]]] = {}
+        for fila in filas:
+            registro : Optional[Registro] = fila if isinstance(fila, Registro) else None
+            if registro is not None:
+                id : Any = getattr(registro, atributoPrivado(registro, f"__{clave}"), None)
+                valores : dict[str, Any] = {clave : id} if id is not None else {}
+                valores.update((columna, getattr(registro, columna, None)) for columna in registro.columnasCargadas)
+            else:
+                valores = fila
+                desconocidas = set(valores).difference(existentes)
+                if desconocidas: raise ErrorMalaSolicitud(f"{cls.__name__} no tiene las columnas: {', '.join(sorted(desconocidas))}.")
+            filas_grupo, registros_grupo = grupos.setdefault(tuple(valores), ([], []))
+            filas_grupo.append(tuple(valores.values()))
+            if registro is not None: registros_grupo.append(registro)
+
+        # Columnas a actualizar de cada grupo, resueltas antes de escribir nada.
+        actualizables : dict[tuple[str], list[str]] = {}
+        for columnas in grupos:
+            actualizables[columnas] = [columna for columna in (actualizar if actualizar is not None else columnas) if columna in columnas and columna != clave]
+            if not actualizables[columnas]:
+                raise ErrorMalaSolicitud(f"No hay columnas para actualizar en las filas con columnas {', '.join(columnas)}.")
+
+        insertados : int = 0
+        actualizados : int = 0
+        if not grupos: return ResultadoInsertarOActualizar(insertados, actualizados)
+
+        with bdd as bdd:
+            alias_fila : Optional[str] = 'nueva' if bdd.admiteAliasFila() else None
+            for columnas, (filas_grupo, registros_grupo) in grupos.items():
+                for consulta, cantidad in Consulta.lotesInsertMultiple(cls.__tabla, list(columnas), filas_grupo, bdd.maximoPaquete(), bdd.maximoParametros(), actualizables[columnas], alias_fila):
+                    afectadas : int = bdd.ejecutar(consulta).devolverFilasAfectadas()
+                    # 1 por insertada y 2 por actualizada: lo que excede a `cantidad` son las actualizadas.
+                    actualizadas_lote : int = min(max(afectadas - cantidad, 0), cantidad)
+                    actualizados += actualizadas_lote
+                    insertados += cantidad - actualizadas_lote
+                for registro in registros_grupo:
+                    if registro.id is not None: registro.marcarComoGuardado()
+
+        return ResultadoInsertarOActualizar(insertados, actualizados)
+
+    def __describir(cls, bdd : ProtocoloBaseDeDatos) -> list[Resultado]:
+        if cls.descripcionTabla is not None: return list(cls.descripcionTabla)
+        with bdd as bdd:
+            return bdd.ejecutar(f"DESCRIBE {cls.__tabla};").devolverResultados()
+
+    def __esquemaDesdeDescripcion(cls, resultados : list[Resultado]) -> EsquemaTabla:
+        return Tabla.esquemaDesdeDescripcion(resultados, cls.__slots_declarados, cls.__dict__)
+
+    @staticmethod
+    def esquemaDesdeDescripcion(resultados : Iterable[Resultado], declarados : tuple[str] = (), existentes : Optional[dict[str, Any]] = None) -> EsquemaTabla:
+        """
+        Resuelve el esquema (slots, anotaciones, claves y enumeraciones) a partir de las filas de `DESCRIBE`,
+        sin crear ni registrar un modelo. Lo usa `python -m bdd.generar`.
 
+        Parámetros:
+            :arg resultados Iterable[Resultado]: filas de `DESCRIBE` (o `descripcionTabla`)
+            :arg declarados tuple[str]: slots ya declarados por el modelo, que no se repiten
+            :arg existentes Optional[dict[str, Any]]: atributos del modelo, para conservar sus enumeraciones
+        """
         slots :list[str] = []        
         anotaciones : dict[str,type] = {}
-        with bdd as bdd:
-            resultados = bdd.DESCRIBE(cls.__tabla).Ejecutar().DevolverResultados()
+        claves : list[str] = []
+        enums : dict[str,type] = {}
             
-            for columna in resultados:
-                nombre_campo = columna.get('Field')
-                es_clave = columna.get('Key') == "PRI"
-                #print(columna.get('Extra'))
-                es_auto = "auto_increment" in columna.get("Extra", "").lower() or "default_generated" in columna.get("Extra", "").lower() or "auto_generated" in columna.get("Extra", "").lower()
-                
-                nombre_attr = f"__{nombre_campo}" if es_clave or es_auto else nombre_campo
-                
-                tipo = cls.__resolverTipo(columna.get('Type'), nombre_campo)
-                
-                if nombre_attr not in cls.__slots__:
-                    slots.append(nombre_attr)
-                anotaciones.update({
-                    nombre_attr : tipo
-                })
-                
-                
-                if es_clave:
-                    setattr(cls, nombre_campo, property(lambda self, name=nombre_campo: getattr(self, atributoPrivado(self,name))))
-        
-        
-        cls.__slots__ = cls.__slots__ + tuple(slots)
-        cls.__annotations__.update(anotaciones)
-        print(cls.__slots__)
-        instancia = super().__call__(bdd, *posicionales, **nominales)
-        setattr(instancia, atributoPrivado(instancia,"__bdd"),bdd)
-        return instancia
+        for columna in resultados:
+            nombre_campo = columna.get('Field')
+            es_clave = columna.get('Key') == "PRI"
+            #print(columna.get('Extra'))
+            es_auto = "auto_increment" in columna.get("Extra", "").lower() or "default_generated" in columna.get("Extra", "").lower() or "auto_generated" in columna.get("Extra", "").lower()
+            
+            nombre_attr = f"__{nombre_campo}" if es_clave or es_auto else nombre_campo
+            
+            tipo = Tabla.__resolverTipo(columna.get('Type'), nombre_campo, existentes or {})
+            if isinstance(tipo, type) and issubclass(tipo, EnumSQL):
+                enums[tipo.__name__] = tipo
+            
+            if nombre_attr not in declarados:
+                slots.append(nombre_attr)
+            anotaciones.update({
+                nombre_attr : tipo
+            })
+            
+            if es_clave:
+                claves.append(nombre_campo)
+
+        return EsquemaTabla(tuple(slots), anotaciones, tuple(claves), enums)
+
+    def __aplicarEsquema(cls, esquema : EsquemaTabla) -> None:
+        cls.__slots__ = cls.__slots_declarados + esquema.slots
+        cls.__annotations__ = {**cls.__anotaciones_declaradas, **esquema.anotaciones}
+        for nombre_enum, clase_enum in esquema.enums.items():
+            setattr(cls, nombre_enum, clase_enum)
+        for nombre_campo in esquema.claves:
+            setattr(cls, nombre_campo, property(lambda self, name=nombre_campo: getattr(self, atributoPrivado(self,name), None)))
+        cls.configurarDecodificador(cls.__generarDecodificador())
+
+    def __generarDecodificador(cls) -> tuple[tuple[str, str, Optional[Callable[[Any], Any]]], ...]:
+        """
+        Precalcula, para cada columna, el atributo donde se guarda y la conversión que necesita, de modo
+        que hidratar una fila sea un único recorrido sin `issubclass` ni armado de nombres.
+        """
+        decodificador : list[tuple[str, str, Optional[Callable[[Any], Any]]]] = []
+        for atributo in cls.columnas():
+            columna : str = atributoPublico(atributo)
+            destino : str = f"_{cls.__name__}__{columna}" if '__' in atributo else atributo
+            decodificador.append((columna, destino, cls.__convertidor(cls.__annotations__.get(atributo, Any))))
+        return tuple(decodificador)
+
+    @staticmethod
+    def __convertidor(tipo : Any) -> Optional[Callable[[Any], Any]]:
+        # Mismas conversiones que la hidratación genérica de Registro; None si el valor se usa tal cual.
+        if not isinstance(tipo, type): return None
+        if issubclass(tipo, Decimal): return Decimal
+        if issubclass(tipo, dict): return loads
+        if issubclass(tipo, bool): return bool
+        if issubclass(tipo, EnumSQL): return tipo.desdeCadena
+        return None
     
-    @classmethod
-    def __resolverTipo(cls, tipo_sql: str, nombre_columna: Optional[str]) -> type:
+    @staticmethod
+    def __resolverTipo(tipo_sql: str, nombre_columna: Optional[str], existentes : dict[str, Any]) -> type:
         """
         Deduce y devuelve un tipo de Python en base al tipo declarado en MySQL para la columna.
-        Si encuentra un ENUM, crea un enum de Python y lo guarda como una constante de la clase.
+        Si encuentra un ENUM, crea un enum de Python; el esquema lo guarda como una constante de la clase.
         
         Parámetros:
             :arg tipo_sql str: El tipo definido en MySQL
             :arg nombre_columna Optional[str]: El nombre de la columna (útil para enums)
+            :arg existentes dict[str, Any]: atributos del modelo (se reutiliza su enum si no cambió)
         
         Devuelve:
             :arg tipo `type`: el tipo python correspondiente (o `Any`)
@@ -76,57 +768,24 @@ class Tabla(type):
             return Any
 
         tipo_base: str = tipo_declarado.group(1)
-        parametros: str = tipo_declarado.group(2) if tipo_declarado.group(2) else ""
-        tipo_completo: str = tipo_base + parametros
-
-        tipos: dict[str, type] = {
-            'tinyint': int,
-            'smallint': int,
-            'mediumint': int,
-            'int': int,
-            'bigint': int,
-            'float': float,
-            'double': float,
-            'decimal': Decimal,
-            'datetime': datetime,
-            'timestamp': datetime,
-            'date': date,
-            'time': time,
-            'char': str,
-            'varchar': str,
-            'text': str,
-            'mediumtext': str,
-            'longtext': str,
-            'tinytext': str,
-            'boolean': bool,
-            'bool': bool,
-            'tinyint(1)': bool,
-            'blob': bytes,
-            'mediumblob': bytes,
-            'longblob': bytes,
-            'tinyblob': bytes,
-            'binary': bytes,
-            'varbinary': bytes,
-            'json': dict,
-        }
-        
         if tipo_base == 'enum':
-            valores_enum: list[Any] = findall(r"'([^']*)'", tipo_sql)
+            # Las comillas dentro de un valor llegan duplicadas ('O''Brien').
+            valores_enum: list[Any] = [valor.replace("''", "'") for valor in findall(r"'((?:[^']|'')*)'", tipo_sql)]
             dicc_enum: dict[str, int] = {'_invalido': 0}
             for i, val in enumerate(valores_enum, 1):   
                 dicc_enum[val] = i
             
             nombre_enum: str = f"Tipo{nombre_columna.capitalize()}" if nombre_columna else f"__ENUM_{token_urlsafe(4)}"
+            existente: Any = existentes.get(nombre_enum)
+            if isinstance(existente, type) and issubclass(existente, EnumSQL) and {m.name: m.value for m in existente} == dicc_enum:
+                # Al refrescar el esquema se conserva la misma clase si la columna no cambió.
+                return existente
             clase_enum: type = type(
                 nombre_enum,
                 (EnumSQL, Enum),
                 dicc_enum
             )
             
-            setattr(cls,nombre_enum,clase_enum)
             return clase_enum
 
-        
-        if tipo_completo in tipos:
-            return tipos[tipo_completo]
-        return tipos.get(tipo_base, Any)
\ No newline at end of file
+        return tipoPythonSQL(tipo_sql)
\ No newline at end of file
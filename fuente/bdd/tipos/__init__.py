@@ -1,4 +1,4 @@
-from typing import Protocol, runtime_checkable, Self, TypeAlias, Optional, Any, AnyStr, Unpack
+from typing import Protocol, runtime_checkable, Self, TypeAlias, Optional, Any, AnyStr, Unpack, Iterable, Iterator, Callable, NamedTuple
 from decimal import Decimal
 from datetime import datetime,date,time,timedelta,timezone
 from re import Match
@@ -17,6 +17,7 @@ class TipoCondicion:
     MAYOR_O_IGUAL = '>='
     MENOR_O_IGUAL = '<='
     NO_ES = 'IS NOT'
+    EN = 'IN'
 
 class TipoUnion:
     INNER = 'INNER'
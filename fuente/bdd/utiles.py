@@ -30,6 +30,75 @@ def formatearValorParaSQL(valor: Any, html : bool = False) -> str:
         
     return f"'{str(valor).replace("'", "''")}'"
 
+def formatearParametroSQL(valor: Any) -> Any:
+    """
+    Adapta un valor de Python para enviarlo como parámetro de una consulta (`%s`).
+    Sigue las mismas reglas que `formatearValorParaSQL`, pero sin convertirlo a literal: el conector se encarga del escapado.
+    """
+    if isinstance(valor, bool):
+        return 1 if valor else 0
+    if isinstance(valor, dict):
+        return dumps(valor)
+    if isinstance(valor, Enum):
+        return valor.value if isinstance(valor.value, int) else valor.name
+    return valor
+
+# Tipo de Python de cada tipo SQL de MySQL. Lo usan `Tabla` para anotar los modelos y
+# `devolverColumnas` para elegir el tipo de cada arreglo; los ENUM se resuelven aparte.
+TIPOS_SQL : dict[str, type] = \
+{
+    'tinyint': int,
+    'smallint': int,
+    'mediumint': int,
+    'int': int,
+    'bigint': int,
+    'float': float,
+    'double': float,
+    'decimal': Decimal,
+    'datetime': datetime,
+    'timestamp': datetime,
+    'date': date,
+    'time': time,
+    'char': str,
+    'varchar': str,
+    'text': str,
+    'mediumtext': str,
+    'longtext': str,
+    'tinytext': str,
+    'boolean': bool,
+    'bool': bool,
+    'tinyint(1)': bool,
+    'blob': bytes,
+    'mediumblob': bytes,
+    'longblob': bytes,
+    'tinyblob': bytes,
+    'binary': bytes,
+    'varbinary': bytes,
+    'json': dict,
+}
+
+def tipoPythonSQL(tipo_sql: str) -> type:
+    """
+    Devuelve el tipo de Python que corresponde a un tipo SQL (p. ej. `'varchar(255)'` o `'tinyint(1)'`),
+    según `TIPOS_SQL`; `Any` si no lo conoce.
+    """
+    tipo_declarado: Optional[Match[AnyStr]] = match(r'([a-z]+)(\(.*\))?', tipo_sql.lower())
+    if not tipo_declarado:
+        return Any
+    tipo_base: str = tipo_declarado.group(1)
+    tipo_completo: str = tipo_base + (tipo_declarado.group(2) or "")
+    if tipo_completo in TIPOS_SQL:
+        return TIPOS_SQL[tipo_completo]
+    return TIPOS_SQL.get(tipo_base, Any)
+
+def limitarSQL(sql: str, parametros: Any, cantidad: int) -> tuple[str, Any]:
+    """
+    Limita a `cantidad` filas una consulta ya compilada, envolviéndola en `SELECT * FROM (...) AS subconsulta LIMIT n`.
+    No modifica la consulta original; si ésta ya tenía un LIMIT menor, ese sigue valiendo.
+    """
+    if cantidad < 0: raise IndexError("Se solicitó una cantidad negativa de resultados, lo cual es un sinsentido.")
+    return (f"SELECT * FROM ({sql.strip().rstrip(';')}) AS subconsulta LIMIT {int(cantidad)};", parametros or ())
+
 def atributoPublico(nombreAtributo: str) -> str:
     return nombreAtributo.replace('__','',1)
 
@@ -0,0 +1,82 @@
+"""
+Base de datos falsa, en memoria, para medir el ORM sin un servidor MySQL.
+"""
+from bdd import *
+
+
+COLUMNAS_DISCOS : list[Resultado] = \
+[
+    {'Field' : 'id', 'Type' : 'int', 'Key' : 'PRI', 'Extra' : 'auto_increment'},
+    {'Field' : 'nombre', 'Type' : 'varchar(255)', 'Key' : '', 'Extra' : ''},
+    {'Field' : 'precio', 'Type' : 'decimal(10,2)', 'Key' : '', 'Extra' : ''},
+    {'Field' : 'publicado', 'Type' : 'tinyint(1)', 'Key' : '', 'Extra' : ''},
+    {'Field' : 'soporte', 'Type' : "enum('VINILO','CD','DIGITAL')", 'Key' : '', 'Extra' : ''},
+    {'Field' : 'lanzamiento', 'Type' : 'datetime', 'Key' : '', 'Extra' : ''},
+    {'Field' : 'detalles', 'Type' : 'json', 'Key' : '', 'Extra' : ''},
+    {'Field' : 'idAutor', 'Type' : 'int', 'Key' : '', 'Extra' : ''},
+]
+
+def filaDisco(i : int) -> Resultado:
+    return \
+    {
+        'id' : i,
+        'nombre' : f'Disco {i}',
+        'precio' : '1999.90',
+        'publicado' : 1,
+        'soporte' : ('VINILO', 'CD', 'DIGITAL')[i % 3],
+        'lanzamiento' : datetime(2001, 1, 1 + i % 28, 12, 30),
+        'detalles' : '{"pistas": 12, "sello": "Independiente"}',
+        'idAutor' : i % 100,
+    }
+
+
+class BaseDeDatosFalsa():
+    '''
+        Implementación mínima de `ProtocoloBaseDeDatos` que responde `DESCRIBE` con columnas fijas
+        y cualquier otra consulta con filas preparadas de antemano. No hace E/S.
+    '''
+    def __init__(self, columnas : dict[str, list[Resultado]], filas : Optional[list[Resultado]] = None) -> None:
+        self.__columnas = columnas
+        self.__filas = filas or []
+        self.__resultados : list[Resultado] = []
+
+    def __enter__(self) -> 'BaseDeDatosFalsa':
+        return self
+
+    def __exit__(self, exc_type, excl_val, exc_tb) -> None: ...
+
+    def ejecutar(self, consulta) -> 'BaseDeDatosFalsa':
+        sql, _ = BaseDeDatos_MySQL.compilar(consulta)
+        if sql.startswith('DESCRIBE '):
+            self.__resultados = self.__columnas[sql.removeprefix('DESCRIBE ').rstrip(';')]
+        else:
+            self.__resultados = self.__filas
+        return self
+
+    def devolverResultados(self, cantidad : Optional[int] = None) -> Optional[list[Resultado]]:
+        return list(self.__resultados[:cantidad]) or None
+
+    def devolverUnResultado(self) -> Optional[Resultado]:
+        return self.__resultados[0] if self.__resultados else None
+
+    def iterarResultados(self, consulta, tamano_lote : int = 1000, cantidad : Optional[int] = None) -> Iterator[Resultado]:
+        self.ejecutar(consulta)
+        return iter(self.__resultados[:cantidad])
+
+    def devolverIdUltimaInsercion(self) -> Optional[int]:
+        return None
+
+    def maximoPaquete(self) -> int:
+        return 64 * 1024 * 1024
+
+    def incrementoAutonumerico(self) -> int:
+        return 1
+
+    def idsConsecutivos(self) -> bool:
+        return True
+
+    def maximoParametros(self) -> int:
+        return 65535
+
+    def admiteAliasFila(self) -> bool:
+        return True
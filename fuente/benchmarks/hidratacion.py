@@ -0,0 +1,47 @@
+"""
+Compara la hidratación de registros con el decodificador precompilado por `Tabla` contra la
+hidratación genérica de `Registro` (cadena de `issubclass` por columna y por fila). Ambas pasan por
+`Registro.desdeFila`; como referencia se mide también la construcción por la sobrecarga de `__init__`,
+cuyo despacho costaba más que la hidratación misma.
+
+Uso (desde `fuente/`):
+    python -m benchmarks.hidratacion [filas]
+"""
+from sys import argv
+from time import perf_counter
+
+from bdd import *
+from benchmarks.falso import BaseDeDatosFalsa, COLUMNAS_DISCOS, filaDisco
+
+
+def filasPorSegundo(construir : Callable[[Any, Resultado], Any], bdd : BaseDeDatosFalsa, filas : list[Resultado], repeticiones : int = 5) -> float:
+    mejor : float = float('inf')
+    for _ in range(repeticiones):
+        inicio : float = perf_counter()
+        for fila in filas:
+            construir(bdd, fila)
+        mejor = min(mejor, perf_counter() - inicio)
+    return len(filas) / mejor
+
+
+def main(cantidad : int = 20_000) -> None:
+    class Discos(metaclass=Tabla): ...
+
+    bdd = BaseDeDatosFalsa({'Discos' : COLUMNAS_DISCOS})
+    filas : list[Resultado] = [filaDisco(i) for i in range(1, cantidad + 1)]
+    Discos.esquema(bdd)
+
+    precompilado : float = filasPorSegundo(Discos, bdd, filas)
+    # type.__call__ saltea `Tabla.__call__` y construye el registro por la sobrecarga de `Registro.__init__`.
+    sobrecarga : float = filasPorSegundo(lambda bdd, fila : type.__call__(Discos, bdd, fila), bdd, filas)
+    Discos.configurarDecodificador(None)
+    generico : float = filasPorSegundo(Discos, bdd, filas)
+
+    print(f"Hidratación de {cantidad} filas de {len(COLUMNAS_DISCOS)} columnas:")
+    print(f"  genérica:           {generico:12,.0f} filas/s")
+    print(f"  precompilada:       {precompilado:12,.0f} filas/s  (x{precompilado / generico:.2f})")
+    print(f"  por __init__ (ref): {sobrecarga:12,.0f} filas/s  (x{sobrecarga / generico:.2f})")
+
+
+if __name__ == '__main__':
+    main(int(argv[1]) if len(argv) > 1 else 20_000)
@@ -0,0 +1,283 @@
+"""
+Suite de microbenchmarks del ORM contra la base de datos falsa de `benchmarks.falso` (sin servidor).
+
+Mide el armado de `Consulta`, `formatearValorParaSQL`, la hidratación de `Registro` por tipo de
+columna, el costo de `Tabla.__call__` y de resolver el esquema (`__resolverTipo`) y `EnumSQL.desdeCadena`.
+Cada caso informa operaciones por segundo: la mediana de varias repeticiones de al menos
+`DURACION_REPETICION` segundos cada una, medidas con el recolector de basura desactivado.
+
+Uso (desde `fuente/`):
+    python -m benchmarks.suite                                   # mide y compara contra la línea base
+    python -m benchmarks.suite --salida resultados.json          # además guarda los resultados
+    python -m benchmarks.suite --actualizar-base                 # reemplaza la línea base (mediana de 3 corridas)
+    python -m benchmarks.suite --filtro hidratacion --tolerancia 0.5
+
+Termina con código 1 si algún caso quedó por debajo de `(1 - tolerancia)` veces su línea base. Los casos
+más ruidosos (los que crean muchos objetos o clases) tienen una tolerancia propia en `TOLERANCIAS`.
+La línea base depende de la máquina: conviene regenerarla al cambiar de entorno.
+"""
+from argparse import ArgumentParser
+from gc import collect, disable, enable, isenabled
+from json import dump, load
+from math import ceil
+from pathlib import Path
+from platform import python_version, machine
+from statistics import median
+from sys import exit as salir
+from time import perf_counter
+from typing import Callable
+
+from bdd import *
+from benchmarks.falso import BaseDeDatosFalsa, COLUMNAS_DISCOS, filaDisco
+
+
+LINEA_BASE : Path = Path(__file__).with_name('linea_base.json')
+
+# Tipo MySQL de la columna -> generador del valor que devolvería el conector para la fila i.
+TIPOS_COLUMNA : dict[str, tuple[str, Callable[[int], Any]]] = \
+{
+    'int' : ('int', lambda i : i),
+    'varchar' : ('varchar(255)', lambda i : f'valor {i}'),
+    'decimal' : ('decimal(10,2)', lambda i : f'{i}.50'),
+    'bool' : ('tinyint(1)', lambda i : i % 2),
+    'enum' : ("enum('ALFA','BETA','GAMMA')", lambda i : ('ALFA', 'BETA', 'GAMMA')[i % 3]),
+    'datetime' : ('datetime', lambda i : datetime(2001, 1, 1 + i % 28)),
+    'json' : ('json', lambda i : '{"clave": 1, "lista": [1, 2, 3]}'),
+}
+COLUMNAS_POR_MODELO : int = 6
+
+# Un caso es la operación a medir, o `(operación, unidades)` si cada llamada procesa varias unidades (filas, valores).
+Caso = Callable[[], Any] | tuple[Callable[[], Any], int]
+
+
+REPETICIONES : int = 9
+DURACION_REPETICION : float = 0.25
+
+# Tolerancia mínima por prefijo del nombre del caso; el resto usa la de `--tolerancia`. Los casos que crean
+# muchos objetos (o clases) por llamada varían más entre corridas.
+TOLERANCIAS : dict[str, float] = \
+{
+    'hidratacion.' : 0.50,
+    'tabla.' : 0.50,
+    'EnumSQL.' : 0.50,
+}
+
+
+def medir(operacion : Callable[[], Any], repeticiones : int = REPETICIONES, duracion_minima : float = DURACION_REPETICION) -> float:
+    """
+    Operaciones por segundo de `operacion`: calibra cuántas llamadas hacen falta para que cada repetición
+    dure al menos `duracion_minima` segundos y devuelve la mediana de las repeticiones. El recolector de
+    basura se desactiva mientras se mide, para que sus pasadas no caigan al azar en una repetición.
+    """
+    recolector : bool = isenabled()
+    collect()
+    disable()
+    try:
+        veces : int = 1
+        while True:
+            inicio : float = perf_counter()
+            for _ in range(veces): operacion()
+            transcurrido : float = perf_counter() - inicio
+            if transcurrido >= duracion_minima / 10: break
+            veces *= 2
+        veces = max(veces, ceil(veces * duracion_minima / transcurrido))
+
+        tiempos : list[float] = []
+        for _ in range(repeticiones):
+            inicio = perf_counter()
+            for _ in range(veces): operacion()
+            tiempos.append(perf_counter() - inicio)
+    finally:
+        if recolector: enable()
+    return veces / median(tiempos)
+
+
+def tolerancia(nombre : str, general : float) -> float:
+    """Tolerancia del caso `nombre`: la general o, si es mayor, la de su prefijo en `TOLERANCIAS`."""
+    return max([general] + [valor for prefijo, valor in TOLERANCIAS.items() if nombre.startswith(prefijo)])
+
+
+def modelo(nombre : str, columnas : list[Resultado], filas : Optional[list[Resultado]] = None) -> tuple[type, BaseDeDatosFalsa]:
+    """Modelo nuevo (con su propio esquema en caché) y una base falsa que lo describe."""
+    clase : type = Tabla(nombre, (), {})
+    bdd : BaseDeDatosFalsa = BaseDeDatosFalsa({nombre : columnas}, filas)
+    clase.esquema(bdd)
+    return clase, bdd
+
+
+def enumeracion(nombre : str, miembros : list[str]) -> type:
+    # Igual que `Tabla.__resolverTipo` al encontrar un ENUM.
+    return type(nombre, (EnumSQL, Enum), {'_invalido' : 0, **{miembro : i for i, miembro in enumerate(miembros, 1)}})
+
+
+def casosConsulta() -> dict[str, Caso]:
+    columnas : list[str] = [columna['Field'] for columna in COLUMNAS_DISCOS]
+
+    def simple() -> Any:
+        return Consulta().Select('Discos', columnas).Where(id=2).compilar()
+
+    def completa() -> Consulta:
+        return Consulta()\
+            .Select('Discos', columnas, {'Autores' : ['nombre', 'pais']})\
+            .Join('Autores', 'idAutor', 'id', TipoUnion.LEFT)\
+            .Where(publicado=True, soporte='VINILO')\
+            .Where(TipoCondicion.EN, idAutor=[1, 2, 3, 4, 5])\
+            .Limit(100, 50)
+
+    filas : list[tuple] = [tuple(filaDisco(i)[columna] for columna in columnas[1:]) for i in range(100)]
+    plantilla : PlantillaConsulta = Consulta().Select('Discos', columnas).Where(id=0).congelar()
+    return \
+    {
+        'consulta.select_where.compilar' : simple,
+        'consulta.select_join_where_limit.compilar' : lambda : completa().compilar(),
+        'consulta.select_join_where_limit.str' : lambda : str(completa()),
+        'consulta.insert_multiple_100.compilar' : lambda : Consulta().InsertMultiple('Discos', columnas[1:], filas).compilar(),
+        'consulta.plantilla.vincular' : lambda : plantilla.vincular(id=2),
+    }
+
+
+def casosFormateo() -> dict[str, Caso]:
+    Soporte : type = enumeracion('Soporte', ['VINILO', 'CD'])
+    valores : dict[str, list[Any]] = \
+    {
+        'none' : [None] * 100,
+        'int' : list(range(100)),
+        'str' : [f"O'Brien {i}" for i in range(100)],
+        'decimal' : [Decimal(f'{i}.25') for i in range(100)],
+        'datetime' : [datetime(2001, 1, 1 + i % 28, 12, 30) for i in range(100)],
+        'dict' : [{'pistas' : i, 'sello' : 'Independiente'} for i in range(100)],
+        'enum' : [Soporte.CD] * 100,
+    }
+    valores['mixto'] = [valor for lista in valores.values() for valor in lista[:15]][:100]
+    # Cada caso formatea 100 valores: se informa en valores por segundo.
+    return {f'formatearValorParaSQL.{tipo}' : (lambda lista=lista : [formatearValorParaSQL(v) for v in lista], 100) for tipo, lista in valores.items()}
+
+
+def casosHidratacion() -> dict[str, Caso]:
+    casos : dict[str, Caso] = {}
+    filas_por_caso : int = 200
+    for tipo, (tipo_sql, generar) in TIPOS_COLUMNA.items():
+        nombres : list[str] = [f'{tipo}{n}' for n in range(COLUMNAS_POR_MODELO)]
+        columnas : list[Resultado] = [{'Field' : 'id', 'Type' : 'int', 'Key' : 'PRI', 'Extra' : 'auto_increment'}]
+        columnas += [{'Field' : nombre, 'Type' : tipo_sql, 'Key' : '', 'Extra' : ''} for nombre in nombres]
+        clase, bdd = modelo(f'Hidratacion_{tipo}', columnas)
+        filas : list[Resultado] = [{'id' : i, **{nombre : generar(i) for nombre in nombres}} for i in range(filas_por_caso)]
+        casos[f'hidratacion.{tipo}'] = (lambda clase=clase, bdd=bdd, filas=filas : [clase(bdd, fila) for fila in filas], filas_por_caso)
+
+    clase, bdd = modelo('Discos', COLUMNAS_DISCOS)
+    filas = [filaDisco(i) for i in range(filas_por_caso)]
+    casos['hidratacion.mixto'] = (lambda : [clase(bdd, fila) for fila in filas], filas_por_caso)
+    return casos
+
+
+def casosTabla() -> dict[str, Caso]:
+    clase, bdd = modelo('Discos', COLUMNAS_DISCOS)
+    cargado, bdd_con_fila = modelo('Discos', COLUMNAS_DISCOS, [filaDisco(2)])
+    fila_minima : Resultado = {'id' : 1}
+
+    def resolverEsquema() -> Any:
+        clase.refrescarEsquema()
+        return clase.esquema(bdd)
+
+    resolver : Callable[[str, Optional[str], dict[str, Any]], type] = getattr(Tabla, '_Tabla__resolverTipo')
+    tipos_sql : list[tuple[str, Optional[str]]] = [(columna['Type'], columna['Field']) for columna in COLUMNAS_DISCOS]
+    # Como al refrescar el esquema: los enums ya definidos en el modelo se reutilizan.
+    existentes : dict[str, Any] = dict(vars(clase))
+    return \
+    {
+        'tabla.llamada.esquema_en_cache' : lambda : clase(bdd, fila_minima),
+        'tabla.llamada.por_id' : lambda : cargado(bdd_con_fila, id=2),
+        'tabla.esquema.resolver' : resolverEsquema,
+        'tabla.resolverTipo' : (lambda : [resolver(tipo, nombre, existentes) for tipo, nombre in tipos_sql], len(tipos_sql)),
+    }
+
+
+def casosEnum() -> dict[str, Caso]:
+    Soporte : type = enumeracion('Soporte', ['VINILO', 'CD', 'DIGITAL'])
+    validos : list[str] = ['VINILO', 'CD', 'DIGITAL'] * 33 + ['CD']
+    invalidos : list[str] = [f'OTRO{i}' for i in range(100)]
+    return \
+    {
+        'EnumSQL.desdeCadena.valido' : (lambda : [Soporte.desdeCadena(v) for v in validos], 100),
+        'EnumSQL.desdeCadena.invalido' : (lambda : [Soporte.desdeCadena(v) for v in invalidos], 100),
+    }
+
+
+GRUPOS : tuple[Callable[[], dict[str, Caso]], ...] = (casosConsulta, casosFormateo, casosHidratacion, casosTabla, casosEnum)
+
+
+def ejecutar(filtro : Optional[str] = None, repeticiones : int = REPETICIONES, duracion : float = DURACION_REPETICION) -> dict[str, float]:
+    resultados : dict[str, float] = {}
+    for grupo in GRUPOS:
+        for nombre, caso in grupo().items():
+            if filtro and filtro not in nombre: continue
+            operacion, unidades = caso if isinstance(caso, tuple) else (caso, 1)
+            resultados[nombre] = medir(operacion, repeticiones, duracion) * unidades
+            print(f"  {nombre:<45} {resultados[nombre]:>16,.0f} /s")
+    return resultados
+
+
+def comparar(resultados : dict[str, float], base : dict[str, float], tolerancia_general : float) -> list[str]:
+    """Devuelve los casos cuyo rendimiento cayó por debajo de `(1 - tolerancia)` veces la línea base."""
+    regresiones : list[str] = []
+    print(f"\nComparación contra la línea base (tolerancia {tolerancia_general:.0%}, o la de `TOLERANCIAS`):")
+    for nombre, valor in resultados.items():
+        if nombre not in base:
+            print(f"  {nombre:<45} {'(sin línea base)':>16}")
+            continue
+        relacion : float = valor / base[nombre]
+        admitida : float = tolerancia(nombre, tolerancia_general)
+        marca : str = ''
+        if relacion < 1 - admitida:
+            regresiones.append(nombre)
+            marca = f'  <-- REGRESIÓN (tolerancia {admitida:.0%})'
+        print(f"  {nombre:<45} {relacion:>15.2f}x{marca}")
+    return regresiones
+
+
+def documento(resultados : dict[str, float]) -> dict[str, Any]:
+    return {'python' : python_version(), 'maquina' : machine(), 'unidad' : 'operaciones/s', 'estadistico' : 'mediana', 'resultados' : {nombre : round(valor, 1) for nombre, valor in resultados.items()}}
+
+
+def main() -> int:
+    argumentos = ArgumentParser(description="Microbenchmarks del ORM contra una base de datos falsa.")
+    argumentos.add_argument('--salida', type=Path, help="archivo JSON donde guardar los resultados")
+    argumentos.add_argument('--base', type=Path, default=LINEA_BASE, help="línea base contra la cual comparar")
+    argumentos.add_argument('--actualizar-base', action='store_true', help="guardar los resultados como nueva línea base")
+    argumentos.add_argument('--tolerancia', type=float, default=0.40, help="caída relativa admitida antes de informar una regresión (los casos de `TOLERANCIAS` admiten más)")
+    argumentos.add_argument('--filtro', help="sólo los casos cuyo nombre contiene este texto")
+    argumentos.add_argument('--repeticiones', type=int, default=REPETICIONES, help="repeticiones por caso (se informa la mediana)")
+    argumentos.add_argument('--corridas', type=int, help="corridas completas de la suite; se toma la mediana de cada caso (por defecto 3 con --actualizar-base, 1 si no)")
+    argumentos.add_argument('--duracion', type=float, default=DURACION_REPETICION, help="duración mínima de cada repetición, en segundos")
+    opciones = argumentos.parse_args()
+
+    corridas : int = opciones.corridas or (3 if opciones.actualizar_base else 1)
+    mediciones : list[dict[str, float]] = []
+    for corrida in range(1, corridas + 1):
+        print(f"Benchmarks (corrida {corrida} de {corridas}):" if corridas > 1 else "Benchmarks:")
+        mediciones.append(ejecutar(opciones.filtro, opciones.repeticiones, opciones.duracion))
+    resultados : dict[str, float] = {nombre : median(medicion[nombre] for medicion in mediciones) for nombre in mediciones[0]}
+
+    if opciones.salida:
+        with open(opciones.salida, 'w', encoding='utf-8') as archivo:
+            dump(documento(resultados), archivo, indent=2)
+    if opciones.actualizar_base:
+        with open(opciones.base, 'w', encoding='utf-8') as archivo:
+            dump(documento(resultados), archivo, indent=2)
+        print(f"\nLínea base actualizada: {opciones.base}")
+        return 0
+    if not opciones.base.exists():
+        print(f"\nNo hay línea base en {opciones.base}; genérela con --actualizar-base.")
+        return 0
+
+    with open(opciones.base, encoding='utf-8') as archivo:
+        base : dict[str, float] = load(archivo)['resultados']
+    regresiones : list[str] = comparar(resultados, base, opciones.tolerancia)
+    if regresiones:
+        print(f"\n{len(regresiones)} caso(s) con regresión: {', '.join(regresiones)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    salir(main())
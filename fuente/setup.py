@@ -8,4 +8,8 @@ setup(
     author_email     = 'herni@cajadeideas.ar',
     url= 'https://github.com/Hernanatn/bdd.py',
     packages=['bdd'],
+    extras_require={
+        'async': ['aiomysql'],
+        'columnas': ['numpy'],
+    },
 )
\ No newline at end of file
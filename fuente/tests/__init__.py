@@ -0,0 +1,6 @@
+"""
+Pruebas de `bdd`, sin servidor MySQL: los modelos corren sobre `BaseDeDatos_SQLite` y la base falsa de
+`benchmarks.falso`, y las partes propias de `BaseDeDatos_MySQL` sobre la conexión de `tests.dobles`.
+
+> python -m unittest discover -s tests -t .
+"""
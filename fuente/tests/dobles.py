@@ -0,0 +1,129 @@
+"""
+Dobles de prueba: una base SQLite que registra lo que ejecuta y una conexión con la interfaz de
+mysql.connector que por debajo usa sqlite3, para ejercitar `BaseDeDatos_MySQL`, `PoolConexiones` y
+`CacheSentenciasPreparadas` sin servidor.
+"""
+import sqlite3
+
+from bdd import *
+from bdd.sqlite import BaseDeDatos_SQLite
+
+
+class BaseDeDatosRegistrada(BaseDeDatos_SQLite):
+    '''
+        `BaseDeDatos_SQLite` que guarda el SQL de cada `ejecutar` en `ejecutadas`.
+        Con `ids_consecutivos=False` simula `innodb_autoinc_lock_mode = 2`.
+    '''
+
+    def __init__(self, ids_consecutivos : bool = True) -> None:
+        super().__init__()
+        self.ejecutadas : list[str] = []
+        self.ids_consecutivos = ids_consecutivos
+
+    def ejecutar(self, consulta : str | Consulta | tuple[str, tuple[Any]]) -> Self:
+        self.ejecutadas.append(BaseDeDatos_MySQL.compilar(consulta)[0])
+        return super().ejecutar(consulta)
+
+    def idsConsecutivos(self) -> bool:
+        return self.ids_consecutivos
+
+
+class CursorFalso():
+    '''
+        Cursor de mysql.connector (con `dictionary=True`) sobre sqlite3: traduce los marcadores `%s`
+        a `?` y devuelve las filas como diccionarios.
+    '''
+
+    def __init__(self, conexion : 'ConexionFalsa', preparado : bool = False) -> None:
+        self.conexion = conexion
+        self.preparado = preparado
+        self.cerrado = False
+        self.ejecutadas : list[str] = []
+        self.__cursor = None
+
+    def execute(self, sql : str, parametros : Optional[tuple[Any]] = None) -> None:
+        self.ejecutadas.append(sql)
+        self.__cursor = self.conexion.sqlite.execute(sql.replace('%s', '?'), parametros or ())
+
+    @property
+    def with_rows(self) -> bool:
+        return self.__cursor is not None and self.__cursor.description is not None
+
+    @property
+    def rowcount(self) -> int:
+        return self.__cursor.rowcount
+
+    @property
+    def lastrowid(self) -> Optional[int]:
+        return self.__cursor.lastrowid
+
+    def __filas(self, filas : list[tuple]) -> list[Resultado]:
+        nombres : list[str] = [columna[0] for columna in self.__cursor.description]
+        return [dict(zip(nombres, fila)) for fila in filas]
+
+    def fetchall(self) -> list[Resultado]:
+        return self.__filas(self.__cursor.fetchall()) if self.with_rows else []
+
+    def fetchmany(self, cantidad : int) -> list[Resultado]:
+        return self.__filas(self.__cursor.fetchmany(cantidad)) if self.with_rows else []
+
+    def fetchone(self) -> Optional[Resultado]:
+        fila : Optional[tuple] = self.__cursor.fetchone() if self.with_rows else None
+        return None if fila is None else self.__filas([fila])[0]
+
+    def close(self) -> None:
+        self.cerrado = True
+
+
+class ConexionFalsa():
+    '''
+        Conexión de mysql.connector sobre una base SQLite compartida (`sqlite`). `viva = False` hace
+        fallar el ping, como una conexión que el servidor cerró.
+    '''
+
+    def __init__(self, sqlite : sqlite3.Connection) -> None:
+        self.sqlite = sqlite
+        self.viva = True
+        self.cerrada = False
+        self.cursores : list[CursorFalso] = []
+
+    def cursor(self, prepared : bool = False, **opciones : Any) -> CursorFalso:
+        cursor : CursorFalso = CursorFalso(self, prepared)
+        self.cursores.append(cursor)
+        return cursor
+
+    @property
+    def in_transaction(self) -> bool:
+        return self.sqlite.in_transaction
+
+    def commit(self) -> None:
+        self.sqlite.commit()
+
+    def rollback(self) -> None:
+        self.sqlite.rollback()
+
+    def ping(self, reconnect : bool = False) -> None:
+        if not self.viva: raise errorConector()("Lost connection to MySQL server")
+
+    def is_connected(self) -> bool:
+        return not self.cerrada
+
+    def close(self) -> None:
+        self.cerrada = True
+
+
+class FabricaConexiones():
+    '''
+        Reemplazo de `bdd.bdd._conectar`: cada llamada abre una `ConexionFalsa` sobre la misma base
+        SQLite en memoria. Como en mysql.connector, las escrituras abren una transacción implícita
+        que hay que confirmar. Se usa con `unittest.mock.patch('bdd.bdd._conectar', fabrica)`.
+    '''
+
+    def __init__(self) -> None:
+        self.sqlite : sqlite3.Connection = sqlite3.connect(':memory:', check_same_thread=False)
+        self.abiertas : list[ConexionFalsa] = []
+
+    def __call__(self, **parametros : Any) -> ConexionFalsa:
+        conexion : ConexionFalsa = ConexionFalsa(self.sqlite)
+        self.abiertas.append(conexion)
+        return conexion
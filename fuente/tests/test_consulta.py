@@ -0,0 +1,55 @@
+"""
+Construcción de consultas con `Consulta`: listas IN y lotes de INSERT de varias filas.
+"""
+from unittest import TestCase, main
+
+from bdd import *
+from bdd.sqlite import BaseDeDatos_SQLite
+
+
+class PruebaListasEn(TestCase):
+    def test_unMarcadorPorValor(self) -> None:
+        sql, parametros = Consulta().Select('Discos', ['id']).Where(TipoCondicion.EN, id=[1, 2, 3]).compilar()
+        self.assertIn('IN (%s, %s, %s)', sql)
+        self.assertEqual(parametros, (1, 2, 3))
+
+    def test_listaVaciaNoCoincideConNada(self) -> None:
+        consulta : Consulta = Consulta().Select('Discos', ['id']).Where(TipoCondicion.EN, id=[])
+        sql, parametros = consulta.compilar()
+        self.assertIn('IN (NULL)', sql)
+        self.assertFalse(parametros)
+
+        bdd : BaseDeDatos_SQLite = BaseDeDatos_SQLite()
+        with bdd:
+            bdd.ejecutar("CREATE TABLE Discos (id INTEGER PRIMARY KEY)")
+            bdd.ejecutar("INSERT INTO Discos (id) VALUES (1)")
+            self.assertIsNone(bdd.ejecutar(consulta).devolverResultados())
+
+    def test_idsDeLaCondicion(self) -> None:
+        self.assertEqual(Consulta().Update('Discos', nombre='x').Where(TipoCondicion.EN, id=[4, 5]).ids(), (4, 5))
+        self.assertEqual(Consulta().Update('Discos', nombre='x').Where(id=4).ids(), (4,))
+        self.assertIsNone(Consulta().Update('Discos', nombre='x').Where(nombre='y').ids())
+
+    def test_mismaConsultaMismoSQL(self) -> None:
+        # El SQL no depende de los valores: el caché de sentencias preparadas lo reutiliza.
+        primera, _ = Consulta().Select('Discos', ['id']).Where(TipoCondicion.EN, id=[1, 2]).compilar()
+        segunda, _ = Consulta().Select('Discos', ['id']).Where(TipoCondicion.EN, id=[7, 8]).compilar()
+        self.assertEqual(primera, segunda)
+
+
+class PruebaLotesInsertMultiple(TestCase):
+    def test_respetaElMaximoDeParametros(self) -> None:
+        filas : list[tuple] = [(i, f'd{i}') for i in range(10)]
+        lotes = list(Consulta.lotesInsertMultiple('Discos', ['id', 'nombre'], filas, 1_000_000, maximo_parametros=6))
+        self.assertEqual([cantidad for _, cantidad in lotes], [3, 3, 3, 1])
+        self.assertEqual(sum((consulta.compilar()[1] for consulta, _ in lotes), ()), sum(filas, ()))
+
+    def test_respetaElMaximoDeBytes(self) -> None:
+        filas : list[tuple] = [(i, 'x' * 100) for i in range(10)]
+        lotes = list(Consulta.lotesInsertMultiple('Discos', ['id', 'nombre'], filas, 400))
+        self.assertGreater(len(lotes), 1)
+        self.assertEqual(sum(cantidad for _, cantidad in lotes), 10)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Hidratación de registros sobre la base falsa de `benchmarks.falso`: el decodificador precompilado
+(`desdeFila`) debe dar lo mismo que la hidratación genérica.
+"""
+from unittest import TestCase, main
+
+from bdd import *
+from benchmarks.falso import BaseDeDatosFalsa, COLUMNAS_DISCOS, filaDisco
+
+
+def crearModelo(nombre : str) -> tuple[type, BaseDeDatosFalsa]:
+    bdd : BaseDeDatosFalsa = BaseDeDatosFalsa({nombre : COLUMNAS_DISCOS})
+    modelo : type = Tabla(nombre, (), {})
+    modelo.esquema(bdd)
+    return modelo, bdd
+
+
+def valores(registro : Registro) -> dict[str, Any]:
+    return {columna : getattr(registro, columna, None) for columna in registro.columnasCargadas}
+
+
+class PruebaHidratacion(TestCase):
+    def test_convierteLosTiposDeclarados(self) -> None:
+        Discos, bdd = crearModelo('DiscosHidratados')
+        disco = Discos(bdd, filaDisco(4))
+        self.assertEqual(disco.id, 4)
+        self.assertEqual(disco.precio, Decimal('1999.90'))
+        self.assertIs(disco.publicado, True)
+        self.assertIs(disco.soporte, Discos.TipoSoporte.CD)
+        self.assertEqual(disco.detalles, {'pistas' : 12, 'sello' : 'Independiente'})
+        self.assertEqual(disco.cambios(), {})
+
+    def test_desdeFilaIgualALaHidratacionGenerica(self) -> None:
+        Discos, bdd = crearModelo('DiscosPrecompilados')
+        filas : list[Resultado] = [filaDisco(i) for i in range(1, 8)]
+        precompilados : list[dict[str, Any]] = [valores(Discos.desdeFila(bdd, fila)) for fila in filas]
+        Discos.configurarDecodificador(None)
+        genericos : list[dict[str, Any]] = [valores(Discos(bdd, fila)) for fila in filas]
+        self.assertEqual(precompilados, genericos)
+
+    def test_filaSinColumnasLasDejaPendientes(self) -> None:
+        Discos, bdd = crearModelo('DiscosParciales')
+        fila : Resultado = {clave : valor for clave, valor in filaDisco(2).items() if clave != 'detalles'}
+        disco = Discos.desdeFila(bdd, fila)
+        self.assertEqual(disco.columnasPendientes, frozenset({'detalles'}))
+
+
+if __name__ == '__main__':
+    main()
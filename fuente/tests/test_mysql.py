@@ -0,0 +1,135 @@
+"""
+Partes de `BaseDeDatos_MySQL` que no dependen del servidor (pool, sentencias preparadas, caché de
+resultados), sobre las conexiones de `tests.dobles.FabricaConexiones`.
+"""
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from bdd import *
+from tests.dobles import FabricaConexiones, ConexionFalsa
+
+
+class PruebaConConexionesFalsas(TestCase):
+    def setUp(self) -> None:
+        self.fabrica = FabricaConexiones()
+        parche = patch('bdd.bdd._conectar', self.fabrica)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+
+class PruebaPoolConexiones(PruebaConConexionesFalsas):
+    def test_reutilizaLasConexionesDevueltas(self) -> None:
+        pool : PoolConexiones = PoolConexiones({}, minimo=1, maximo=2)
+        primera = pool.obtener()
+        pool.devolver(primera)
+        self.assertIs(pool.obtener(), primera)
+        self.assertEqual(len(self.fabrica.abiertas), 1)
+        self.assertEqual(pool.estadisticas()['prestamos'], 2)
+
+    def test_poolLlenoLevantaErrorPoolLlena(self) -> None:
+        pool : PoolConexiones = PoolConexiones({}, minimo=0, maximo=1, espera_maxima=0.01)
+        pool.obtener()
+        with self.assertRaises(ErrorPoolLlena):
+            pool.obtener()
+
+    def test_descartaLasConexionesQueNoRespondenAlPing(self) -> None:
+        pool : PoolConexiones = PoolConexiones({}, minimo=1, maximo=1)
+        rota : ConexionFalsa = pool.obtener()
+        pool.devolver(rota)
+        rota.viva = False
+        nueva = pool.obtener()
+        self.assertIsNot(nueva, rota)
+        self.assertTrue(rota.cerrada)
+        self.assertEqual(pool.estadisticas()['descartadas'], 1)
+
+    def test_revierteLoNoConfirmadoAlDevolver(self) -> None:
+        pool : PoolConexiones = PoolConexiones({}, minimo=1, maximo=1)
+        conexion : ConexionFalsa = pool.obtener()
+        conexion.sqlite.execute("CREATE TABLE Discos (id INTEGER PRIMARY KEY)")
+        conexion.sqlite.execute("INSERT INTO Discos (id) VALUES (1)")
+        pool.devolver(conexion)
+        self.assertEqual(conexion.sqlite.execute("SELECT COUNT(*) FROM Discos").fetchone(), (0,))
+
+    def test_cerrarCierraLasLibres(self) -> None:
+        pool : PoolConexiones = PoolConexiones({}, minimo=2, maximo=2)
+        pool.cerrar()
+        self.assertTrue(all(conexion.cerrada for conexion in self.fabrica.abiertas))
+        with self.assertRaises(ErrorBDD):
+            pool.obtener()
+
+
+class PruebaCacheSentenciasPreparadas(PruebaConConexionesFalsas):
+    def test_desalojaLaMenosUsada(self) -> None:
+        conexion : ConexionFalsa = self.fabrica()
+        cache : CacheSentenciasPreparadas = CacheSentenciasPreparadas(conexion, capacidad=2)
+        a = cache.obtener('SELECT %s')
+        cache.obtener('SELECT %s, %s')
+        self.assertIs(cache.obtener('SELECT %s'), a)
+        cache.obtener('SELECT %s, %s, %s')
+
+        self.assertEqual(cache.estadisticas(), {"aciertos" : 1, "fallos" : 3, "desalojos" : 1, "preparadas" : 2, "capacidad" : 2})
+        self.assertTrue(conexion.cursores[1].cerrado)
+        self.assertFalse(a.cerrado)
+        self.assertTrue(a.preparado)
+
+    def test_seConservaEntrePrestamosDelPool(self) -> None:
+        pool : PoolConexiones = PoolConexiones({}, minimo=1, maximo=1)
+        bdd : BaseDeDatos_MySQL = BaseDeDatos_MySQL(ConfigBDDMysql(), pool=pool, preparadas=8)
+        for _ in range(3):
+            with bdd:
+                bdd.ejecutar(("SELECT %s AS valor", (1,)))
+                self.assertEqual(bdd.devolverUnResultado(), {'valor' : 1})
+                estadisticas : dict[str, int] = bdd.estadisticasPreparadas()
+        self.assertEqual((estadisticas['fallos'], estadisticas['aciertos']), (1, 2))
+
+
+class PruebaCacheResultados(PruebaConConexionesFalsas):
+    def setUp(self) -> None:
+        super().setUp()
+        self.cache : CacheResultados = CacheResultados(capacidad=16, ttl=None)
+        self.bdd : BaseDeDatos_MySQL = BaseDeDatos_MySQL(ConfigBDDMysql(), pool=PoolConexiones({}, minimo=1, maximo=1), cache=self.cache)
+        with self.bdd:
+            self.bdd.ejecutar("CREATE TABLE Discos (id INTEGER PRIMARY KEY, nombre VARCHAR(50))")
+            self.bdd.ejecutar(Consulta().Insert('Discos', nombre='a'))
+
+    def leer(self) -> list[Resultado]:
+        with self.bdd:
+            return self.bdd.ejecutar(Consulta().Select('Discos', ['id', 'nombre'])).devolverResultados()
+
+    def test_respondeDesdeElCache(self) -> None:
+        self.assertEqual(self.leer(), [{'id' : 1, 'nombre' : 'a'}])
+        self.assertEqual(self.leer(), [{'id' : 1, 'nombre' : 'a'}])
+        self.assertEqual(self.cache.estadisticas()['aciertos'], 1)
+
+    def test_unaEscrituraInvalidaLasLecturasDeSuTabla(self) -> None:
+        self.leer()
+        with self.bdd:
+            self.bdd.ejecutar(Consulta().Update('Discos', nombre='b').Where(id=1))
+        self.assertEqual(self.leer(), [{'id' : 1, 'nombre' : 'b'}])
+        self.assertEqual(self.cache.estadisticas()['invalidadas'], 1)
+
+    def test_unaEscrituraEnOtraTablaNoInvalida(self) -> None:
+        with self.bdd:
+            self.bdd.ejecutar("CREATE TABLE Artistas (id INTEGER PRIMARY KEY, nombre VARCHAR(50))")
+        self.leer()
+        with self.bdd:
+            self.bdd.ejecutar(Consulta().Insert('Artistas', nombre='x'))
+        self.leer()
+        self.assertEqual(self.cache.estadisticas()['aciertos'], 1)
+
+    def test_dentroDeUnaTransaccionNoLeeDelCacheLoEscrito(self) -> None:
+        self.leer()
+        with self.bdd.transaccion():
+            self.bdd.ejecutar(Consulta().Update('Discos', nombre='b').Where(id=1))
+            self.assertEqual(self.bdd.ejecutar(Consulta().Select('Discos', ['nombre'])).devolverResultados(), [{'nombre' : 'b'}])
+        self.assertEqual(self.leer(), [{'id' : 1, 'nombre' : 'b'}])
+
+    def test_analizar(self) -> None:
+        self.assertEqual(CacheResultados.analizar("UPDATE Discos SET nombre = 'x'", "UPDATE Discos SET nombre = 'x'"), (False, frozenset({'Discos'})))
+        self.assertEqual(CacheResultados.analizar("SELECT * FROM Discos JOIN Artistas ON 1", "SELECT * FROM Discos JOIN Artistas ON 1"), (True, frozenset({'Discos', 'Artistas'})))
+        self.assertEqual(CacheResultados.analizar("SELECT * FROM Discos FOR UPDATE", "SELECT * FROM Discos FOR UPDATE"), (True, frozenset()))
+        self.assertEqual(CacheResultados.analizar("CALL limpiar()", "CALL limpiar()"), (False, None))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+`BaseDeDatos_SQLite`: lotes, transacciones anidadas, DESCRIBE emulado y conversión de columnas.
+"""
+import sqlite3
+from unittest import TestCase, main
+
+from bdd import *
+from bdd.sqlite import BaseDeDatos_SQLite
+
+
+class PruebaLote(TestCase):
+    def setUp(self) -> None:
+        self.bdd = BaseDeDatos_SQLite()
+        with self.bdd:
+            self.bdd.ejecutar("CREATE TABLE Discos (id INTEGER PRIMARY KEY, nombre VARCHAR(50))")
+
+    def test_unResultadoPorSentencia(self) -> None:
+        with self.bdd:
+            insercion, lectura = self.bdd.lote([
+                Consulta().Insert('Discos', nombre='a'),
+                Consulta().Select('Discos', ['id', 'nombre']),
+            ])
+        self.assertEqual(insercion.filas_afectadas, 1)
+        self.assertEqual(insercion.id_ultima_insercion, 1)
+        self.assertEqual(lectura.devolverResultados(), [{'id' : 1, 'nombre' : 'a'}])
+
+    def test_seDetieneEnLaPrimeraQueFalla(self) -> None:
+        with self.bdd:
+            primera, fallida, siguiente = self.bdd.lote([
+                Consulta().Insert('Discos', nombre='a'),
+                "SELECT * FROM NoExiste",
+                Consulta().Insert('Discos', nombre='b'),
+            ])
+            filas = self.bdd.ejecutar("SELECT nombre FROM Discos").devolverResultados()
+        self.assertTrue(primera.ejecutada)
+        self.assertIsInstance(fallida.error, sqlite3.Error)
+        with self.assertRaises(sqlite3.Error):
+            fallida.devolverResultados()
+        self.assertFalse(siguiente.ejecutada)
+        with self.assertRaises(ErrorBDD):
+            siguiente.devolverResultados()
+        self.assertEqual(filas, [{'nombre' : 'a'}])
+
+
+class PruebaTransaccion(TestCase):
+    def setUp(self) -> None:
+        self.bdd = BaseDeDatos_SQLite()
+        with self.bdd:
+            self.bdd.ejecutar("CREATE TABLE Discos (id INTEGER PRIMARY KEY, nombre VARCHAR(50))")
+
+    def nombres(self) -> list[str]:
+        with self.bdd:
+            return [fila['nombre'] for fila in self.bdd.ejecutar("SELECT nombre FROM Discos ORDER BY id").devolverResultados() or ()]
+
+    def test_unBloqueInternoFallidoSeRevierteSolo(self) -> None:
+        with self.bdd.transaccion():
+            self.bdd.ejecutar(Consulta().Insert('Discos', nombre='externo'))
+            with self.assertRaises(ValueError):
+                with self.bdd.transaccion():
+                    self.bdd.ejecutar(Consulta().Insert('Discos', nombre='interno'))
+                    raise ValueError()
+            self.assertTrue(self.bdd.enTransaccion)
+        self.assertFalse(self.bdd.enTransaccion)
+        self.assertEqual(self.nombres(), ['externo'])
+
+    def test_unBloqueExternoFallidoRevierteTodo(self) -> None:
+        with self.assertRaises(ValueError):
+            with self.bdd.transaccion():
+                self.bdd.ejecutar(Consulta().Insert('Discos', nombre='externo'))
+                with self.bdd.transaccion():
+                    self.bdd.ejecutar(Consulta().Insert('Discos', nombre='interno'))
+                raise ValueError()
+        self.assertEqual(self.nombres(), [])
+
+    def test_noSePuedeConfirmarDentroDeUnaTransaccion(self) -> None:
+        with self.bdd.transaccion():
+            with self.assertRaises(ErrorBDD):
+                self.bdd.confirmar()
+
+
+class PruebaTipos(TestCase):
+    def setUp(self) -> None:
+        self.bdd = BaseDeDatos_SQLite()
+        with self.bdd:
+            self.bdd.ejecutar("CREATE TABLE Discos (id INTEGER PRIMARY KEY, precio DECIMAL(10,2), lanzamiento DATETIME, soporte TEXT CHECK (soporte IN ('VINILO', 'CD DOBLE', 'D''ARTE')))")
+
+    def test_describeInformaEnumsConSusLiterales(self) -> None:
+        with self.bdd:
+            columnas = {fila['Field'] : fila for fila in self.bdd.ejecutar("DESCRIBE Discos").devolverResultados()}
+        self.assertEqual(columnas['soporte']['Type'], "enum('VINILO','CD DOBLE','D''ARTE')")
+        self.assertEqual(columnas['id']['Extra'], 'auto_increment')
+
+    def test_convierteSegunElTipoDeclarado(self) -> None:
+        with self.bdd:
+            self.bdd.ejecutar(Consulta().Insert('Discos', precio=Decimal('19.90'), lanzamiento=datetime(2001, 2, 3, 4, 5)))
+            fila = self.bdd.ejecutar(Consulta().Select('Discos', ['precio', 'lanzamiento'])).devolverUnResultado()
+        self.assertEqual(fila, {'precio' : Decimal('19.90'), 'lanzamiento' : datetime(2001, 2, 3, 4, 5)})
+
+    def test_noRegistraConvertidoresGlobales(self) -> None:
+        self.assertFalse({'decimal', 'datetime', 'DECIMAL', 'DATETIME'} & set(sqlite3.converters))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+Modelos `Tabla` sobre `BaseDeDatos_SQLite`: carga por lotes, guardado en lote, cambios, relaciones y
+mapa de identidad.
+"""
+from asyncio import run
+from unittest import TestCase, main
+
+from bdd import *
+from tests.dobles import BaseDeDatosRegistrada
+
+
+def crearModelo(bdd : BaseDeDatosRegistrada) -> type:
+    # Una tabla y un modelo nuevos por prueba: el esquema queda en caché por clase.
+    with bdd:
+        bdd.ejecutar("CREATE TABLE Albumes (id INTEGER PRIMARY KEY, nombre VARCHAR(50), precio DECIMAL(10,2), codigo VARCHAR(10) UNIQUE)")
+    return Tabla('Albumes', (), {})
+
+
+class PruebaObtenerMuchos(TestCase):
+    def setUp(self) -> None:
+        self.bdd = BaseDeDatosRegistrada()
+        self.Albumes = crearModelo(self.bdd)
+        self.ids = self.Albumes.guardarTodos(self.bdd, [self.Albumes(self.bdd, {'nombre' : f'a{i}'}) for i in range(5)])
+
+    def test_conservaElOrdenYDevuelveNoneParaLosFaltantes(self) -> None:
+        registros = self.Albumes.obtenerMuchos(self.bdd, [self.ids[3], 999, self.ids[0], self.ids[3]])
+        self.assertEqual([registro and registro.nombre for registro in registros], ['a3', None, 'a0', 'a3'])
+
+    def test_unaConsultaPorLote(self) -> None:
+        self.bdd.ejecutadas.clear()
+        self.Albumes.obtenerMuchos(self.bdd, self.ids, tamano_lote=2)
+        self.assertEqual(len(self.bdd.ejecutadas), 3)
+
+    def test_estrictoLevantaSinResultado(self) -> None:
+        with self.assertRaises(SinResultado):
+            self.Albumes.obtenerMuchos(self.bdd, [self.ids[0], 999], estricto=True)
+
+    def test_listaVaciaNoConsulta(self) -> None:
+        self.bdd.ejecutadas.clear()
+        self.assertEqual(self.Albumes.obtenerMuchos(self.bdd, []), [])
+        self.assertEqual(self.bdd.ejecutadas, [])
+
+
+class PruebaGuardarTodos(TestCase):
+    def setUp(self) -> None:
+        self.bdd = BaseDeDatosRegistrada()
+        self.Albumes = crearModelo(self.bdd)
+
+    def comprobarIds(self, bdd : BaseDeDatosRegistrada) -> None:
+        existente = self.Albumes(bdd, {'nombre' : 'viejo'})
+        existente.guardar()
+        existente.nombre = 'editado'
+        nuevos = [self.Albumes(bdd, {'nombre' : f'n{i}'}) for i in range(3)]
+
+        ids : list[int] = self.Albumes.guardarTodos(bdd, [nuevos[0], existente, nuevos[1], nuevos[2]])
+
+        self.assertEqual(ids, [nuevos[0].id, existente.id, nuevos[1].id, nuevos[2].id])
+        with bdd:
+            filas = bdd.ejecutar("SELECT id, nombre FROM Albumes ORDER BY id").devolverResultados()
+        self.assertEqual({fila['id'] : fila['nombre'] for fila in filas}, {id : nombre for id, nombre in zip(ids, ['n0', 'editado', 'n1', 'n2'])})
+        self.assertTrue(all(registro.cambios() == {} for registro in [existente, *nuevos]))
+
+    def test_idsDeUnInsertDeVariasFilas(self) -> None:
+        self.comprobarIds(self.bdd)
+
+    def test_idsSinIdsConsecutivos(self) -> None:
+        bdd = BaseDeDatosRegistrada(ids_consecutivos=False)
+        self.Albumes = crearModelo(bdd)
+        self.comprobarIds(bdd)
+        self.assertEqual(sum(sql.lstrip().startswith('INSERT') for sql in bdd.ejecutadas), 4)
+
+    def test_fallaSinEscribirNinguno(self) -> None:
+        registros = [self.Albumes(self.bdd, {'nombre' : 'a', 'codigo' : 'X'}), self.Albumes(self.bdd, {'nombre' : 'b', 'codigo' : 'X'})]
+        with self.assertRaises(Exception):
+            self.Albumes.guardarTodos(self.bdd, registros)
+        self.assertEqual([registro.id for registro in registros], [None, None])
+        with self.bdd:
+            self.assertIsNone(self.bdd.ejecutar("SELECT id FROM Albumes").devolverResultados())
+
+
+class PruebaCambios(TestCase):
+    def setUp(self) -> None:
+        self.bdd = BaseDeDatosRegistrada()
+        self.Albumes = crearModelo(self.bdd)
+        self.album = self.Albumes(self.bdd, {'nombre' : 'a', 'precio' : Decimal('1.50')})
+        self.album.guardar()
+
+    def test_cambiosInformaSoloLoModificado(self) -> None:
+        self.assertEqual(self.album.cambios(), {})
+        self.album.nombre = 'b'
+        self.assertEqual(self.album.cambios(), {'nombre' : 'b'})
+        self.album.nombre = 'a'
+        self.assertEqual(self.album.cambios(), {})
+
+    def test_guardarSinCambiosNoConsulta(self) -> None:
+        self.bdd.ejecutadas.clear()
+        self.assertEqual(self.album.guardar(), self.album.id)
+        self.assertEqual(self.bdd.ejecutadas, [])
+        self.assertEqual(self.album.columnasEscritas, ())
+
+    def test_guardarEscribeSoloLoModificado(self) -> None:
+        self.album.precio = Decimal('2.75')
+        self.bdd.ejecutadas.clear()
+        self.album.guardar()
+        self.assertEqual(self.album.columnasEscritas, ('precio',))
+        self.assertNotIn('nombre', self.bdd.ejecutadas[0])
+        self.assertEqual(self.Albumes(self.bdd, self.album.id).precio, Decimal('2.75'))
+
+
+class PruebaInsertarOActualizarTodos(TestCase):
+    def test_escribeYActualizaPorClaveUnica(self) -> None:
+        bdd = BaseDeDatosRegistrada()
+        Albumes = crearModelo(bdd)
+        Albumes.insertarOActualizarTodos(bdd, [{'codigo' : 'A', 'nombre' : 'a'}, {'codigo' : 'B', 'nombre' : 'b'}])
+
+        resultado = Albumes.insertarOActualizarTodos(bdd, [{'codigo' : 'A', 'nombre' : 'a2'}, {'codigo' : 'C', 'nombre' : 'c'}], actualizar=['nombre'])
+
+        # SQLite cuenta 1 por fila insertada o actualizada: todas se informan como insertadas.
+        self.assertEqual(resultado, ResultadoInsertarOActualizar(insertados=2, actualizados=0))
+        with bdd:
+            filas = bdd.ejecutar("SELECT codigo, nombre FROM Albumes ORDER BY codigo").devolverResultados()
+        self.assertEqual([(fila['codigo'], fila['nombre']) for fila in filas], [('A', 'a2'), ('B', 'b'), ('C', 'c')])
+
+
+class BaseDeDatosAsincrona():
+    # Interfaz asincrónica (como `BaseDeDatos_MySQLAsincrono`) sobre una base sincrónica.
+    def __init__(self, bdd : BaseDeDatosRegistrada) -> None:
+        self.bdd = bdd
+
+    async def __aenter__(self) -> 'BaseDeDatosAsincrona':
+        self.bdd.__enter__()
+        return self
+
+    async def __aexit__(self, *excepcion : Any) -> None:
+        self.bdd.__exit__(*excepcion)
+
+    async def ejecutar(self, consulta : str | Consulta | tuple[str, tuple[Any]]) -> 'BaseDeDatosAsincrona':
+        self.bdd.ejecutar(consulta)
+        return self
+
+    async def devolverResultados(self) -> Optional[list[Resultado]]:
+        return self.bdd.devolverResultados()
+
+
+class PruebaRelaciones(TestCase):
+    def setUp(self) -> None:
+        self.bdd = BaseDeDatosRegistrada()
+        with self.bdd:
+            self.bdd.ejecutar("CREATE TABLE Interpretes (id INTEGER PRIMARY KEY, nombre VARCHAR(50))")
+            self.bdd.ejecutar("CREATE TABLE Temas (id INTEGER PRIMARY KEY, nombre VARCHAR(50), idInterprete INT)")
+        self.Temas = Tabla('Temas', (), {'interprete' : Relacion('Interpretes', 'idInterprete')})
+        self.Interpretes = Tabla('Interpretes', (), {'temas' : Relacion('Temas', 'idInterprete', muchos=True)})
+        self.Interpretes.guardarTodos(self.bdd, [self.Interpretes(self.bdd, {'nombre' : f'i{i}'}) for i in range(2)])
+        self.ids = self.Temas.guardarTodos(self.bdd, [self.Temas(self.bdd, {'nombre' : f't{i}', 'idInterprete' : 1 + i % 2}) for i in range(4)])
+
+    def test_precargarHaceUnaConsultaPorRelacion(self) -> None:
+        self.bdd.ejecutadas.clear()
+        temas = self.Temas.obtenerMuchos(self.bdd, self.ids, precargar=['interprete.temas'])
+        self.assertEqual(len(self.bdd.ejecutadas), 3)
+        self.assertEqual([(tema.interprete.nombre, len(tema.interprete.temas)) for tema in temas], [('i0', 2), ('i1', 2), ('i0', 2), ('i1', 2)])
+        self.assertEqual(len(self.bdd.ejecutadas), 3)
+
+    def test_conBaseAsincronaHayQuePrecargar(self) -> None:
+        bdd : BaseDeDatosAsincrona = BaseDeDatosAsincrona(self.bdd)
+
+        async def cargar() -> list[Registro]:
+            temas = await self.Temas.obtenerMuchosAsincrono(bdd, self.ids)
+            with self.assertRaises(ErrorMalaSolicitud):
+                temas[0].interprete
+            await self.Temas.precargarAsincrono(bdd, temas, 'interprete.temas')
+            return temas
+
+        temas = run(cargar())
+        self.assertEqual([(tema.interprete.nombre, len(tema.interprete.temas)) for tema in temas], [('i0', 2), ('i1', 2), ('i0', 2), ('i1', 2)])
+
+
+class PruebaMapaIdentidad(TestCase):
+    def setUp(self) -> None:
+        self.bdd = BaseDeDatosRegistrada()
+        self.Albumes = crearModelo(self.bdd)
+        self.ids = self.Albumes.guardarTodos(self.bdd, [self.Albumes(self.bdd, {'nombre' : f'a{i}'}) for i in range(3)])
+
+    def test_devuelveLaMismaInstanciaSinConsultar(self) -> None:
+        with MapaIdentidad():
+            primero = self.Albumes(self.bdd, self.ids[0])
+            self.bdd.ejecutadas.clear()
+            self.assertIs(self.Albumes(self.bdd, self.ids[0]), primero)
+            self.assertIs(self.Albumes.obtenerMuchos(self.bdd, [self.ids[0]])[0], primero)
+            self.assertEqual(self.bdd.ejecutadas, [])
+
+    def test_unaEscrituraExpiraLosRegistrosQueToca(self) -> None:
+        with MapaIdentidad():
+            primero, segundo = self.Albumes.obtenerMuchos(self.bdd, self.ids[:2])
+            with self.bdd:
+                self.bdd.ejecutar(Consulta().Update('Albumes', nombre='otro').Where(id=self.ids[0]))
+            recargado = self.Albumes(self.bdd, self.ids[0])
+            self.assertIsNot(recargado, primero)
+            self.assertEqual(recargado.nombre, 'otro')
+            self.assertIs(self.Albumes(self.bdd, self.ids[1]), segundo)
+
+    def test_guardarMantieneElRegistroEnElMapa(self) -> None:
+        with MapaIdentidad():
+            album = self.Albumes(self.bdd, self.ids[0])
+            album.nombre = 'editado'
+            album.guardar()
+            self.assertIs(self.Albumes(self.bdd, self.ids[0]), album)
+
+
+if __name__ == '__main__':
+    main()